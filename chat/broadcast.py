@@ -0,0 +1,57 @@
+"""
+Payload de los mensajes de chat que se reparten por WebSocket
+
+Un mensaje nuevo o editado se serializa una sola vez y sin consultas
+(read_by_count sale de los lectores ya conocidos y el remitente y el
+mensaje respondido vienen cargados). El frame común lleva
+is_read_by_me=False; el evento incluye además los ids de quienes ya
+leyeron el mensaje y cada uno de esos miembros parchea su copia
+localmente. El resto reenvía el frame tal cual.
+"""
+from social_network_backend import json_codec
+from social_network_backend.websockets import encode_frame
+from .serializers import MessageSerializer
+
+
+class BroadcastMessageSerializer(MessageSerializer):
+    """MessageSerializer con los datos por usuario precalculados"""
+
+    def get_read_by_count(self, obj):
+        return len(self.context['read_by_ids'])
+
+    def get_is_read_by_me(self, obj):
+        # Valor común; for_viewer() lo corrige para quien ya lo leyó
+        return False
+
+
+class MessageBroadcast:
+    """Construye los eventos de grupo de los mensajes de una sala"""
+
+    def payload(self, message, frame_type, read_by_ids=()):
+        """Frame común a todos los miembros de la sala"""
+        data = BroadcastMessageSerializer(
+            message, context={'read_by_ids': read_by_ids}).data
+        return {'type': frame_type, 'data': data}
+
+    def event(self, handler, message, frame_type, read_by_ids=()):
+        """Evento de grupo con el frame codificado una vez"""
+        return {
+            'type': handler,
+            **encode_frame(self.payload(message, frame_type, read_by_ids)),
+            'read_by': [str(user_id) for user_id in read_by_ids],
+        }
+
+    def for_viewer(self, event, viewer_id):
+        """
+        Frame propio de un miembro si difiere del común (ya leyó el
+        mensaje) o None si puede reenviar el frame común
+        """
+        if str(viewer_id) not in event.get('read_by', ()):
+            return None
+        payload = json_codec.loads(event['frame'])
+        payload['data']['is_read_by_me'] = True
+        return payload
+
+
+# Instancia global del constructor
+message_broadcast = MessageBroadcast()
@@ -1,22 +1,25 @@
 """
 WebSocket consumers para el sistema de chat en tiempo real
 """
-import json
 import logging
-from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from social_network_backend.object_cache import object_cache
+from social_network_backend.websockets import FrameConsumer
+from .broadcast import message_broadcast
 from .models import ChatRoom, Message, OnlineStatus, MessageRead
-from .serializers import MessageSerializer
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
-class ChatConsumer(AsyncWebsocketConsumer):
+class ChatConsumer(FrameConsumer):
     """
-    Consumer para manejar conexiones WebSocket del chat
+    Consumer para manejar conexiones WebSocket del chat.
+
+    Los eventos de la sala llevan el frame codificado una vez por quien
+    los envía; cada miembro solo lo reenvía.
     """
 
     async def connect(self):
@@ -49,15 +52,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
         await self.set_user_online(True)
 
         # Notificar que el usuario se conectó
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'user_status',
+        await self.group_broadcast(self.room_group_name, 'user_status', {
+            'type': 'user_status',
+            'data': {
                 'action': 'user_joined',
                 'user_id': str(self.user.id),
                 'username': self.user.username
             }
-        )
+        })
 
         logger.info(
             f"Usuario {self.user.username} conectado a sala {self.room_id}")
@@ -69,15 +71,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.set_user_online(False)
 
             # Notificar que el usuario se desconectó
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'user_status',
+            await self.group_broadcast(self.room_group_name, 'user_status', {
+                'type': 'user_status',
+                'data': {
                     'action': 'user_left',
                     'user_id': str(self.user.id),
                     'username': self.user.username
                 }
-            )
+            })
 
             # Salir del grupo
             await self.channel_layer.group_discard(
@@ -88,10 +89,17 @@ class ChatConsumer(AsyncWebsocketConsumer):
         logger.info(
             f"Usuario {self.user.username} desconectado de sala {self.room_id}")
 
-    async def receive(self, text_data):
-        """Recibir mensaje del WebSocket"""
+    async def receive(self, text_data=None, bytes_data=None):
+        """Recibir mensaje del WebSocket (texto JSON o binario MessagePack)"""
+        # Solo los errores de decodificación son de formato: un ValueError
+        # de un handler es un error interno
+        try:
+            data = self.decode(text_data, bytes_data)
+        except ValueError:
+            await self.send_error("Formato de mensaje inválido")
+            return
+
         try:
-            data = json.loads(text_data)
             action = data.get('action')
 
             if action == 'send_message':
@@ -107,8 +115,6 @@ class ChatConsumer(AsyncWebsocketConsumer):
             else:
                 await self.send_error("Acción no válida")
 
-        except json.JSONDecodeError:
-            await self.send_error("Formato JSON inválido")
         except Exception as e:
             logger.error(f"Error en receive: {str(e)}")
             await self.send_error("Error interno del servidor")
@@ -129,31 +135,23 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.send_error("Error al crear el mensaje")
             return
 
-        # Serializar mensaje
-        message_data = await self.serialize_message(message)
-
-        # Enviar mensaje a todos los participantes de la sala
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'chat_message',
-                'message': message_data
-            }
-        )
+        # Serializar una vez y enviar a todos los participantes de la sala
+        # (un mensaje nuevo aún no tiene lectores)
+        event = await self.build_message_event('chat_message', message, 'message')
+        await self.channel_layer.group_send(self.room_group_name, event)
 
     async def handle_typing(self, data):
         """Manejar indicador de escritura"""
         is_typing = data.get('is_typing', False)
 
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'typing_indicator',
+        await self.group_broadcast(self.room_group_name, 'typing_indicator', {
+            'type': 'typing',
+            'data': {
                 'user_id': str(self.user.id),
                 'username': self.user.username,
                 'is_typing': is_typing
             }
-        )
+        }, user_id=str(self.user.id))
 
     async def handle_mark_read(self, data):
         """Manejar marcar mensajes como leídos"""
@@ -162,14 +160,13 @@ class ChatConsumer(AsyncWebsocketConsumer):
         if message_ids:
             await self.mark_messages_read(message_ids)
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'messages_read',
+            await self.group_broadcast(self.room_group_name, 'messages_read', {
+                'type': 'messages_read',
+                'data': {
                     'user_id': str(self.user.id),
                     'message_ids': message_ids
                 }
-            )
+            })
 
     async def handle_edit_message(self, data):
         """Manejar edición de mensaje"""
@@ -180,20 +177,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.send_error("El contenido del mensaje no puede estar vacío")
             return
 
-        message = await self.edit_message(message_id, new_content)
-        if not message:
+        edited = await self.edit_message(message_id, new_content)
+        if not edited:
             await self.send_error("No se pudo editar el mensaje")
             return
 
-        message_data = await self.serialize_message(message)
-
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'message_edited',
-                'message': message_data
-            }
-        )
+        message, read_by_ids = edited
+        event = await self.build_message_event(
+            'message_edited', message, 'message_edited', read_by_ids)
+        await self.channel_layer.group_send(self.room_group_name, event)
 
     async def handle_delete_message(self, data):
         """Manejar eliminación de mensaje"""
@@ -204,92 +196,66 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.send_error("No se pudo eliminar el mensaje")
             return
 
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                'type': 'message_deleted',
+        await self.group_broadcast(self.room_group_name, 'message_deleted', {
+            'type': 'message_deleted',
+            'data': {
                 'message_id': message_id,
                 'user_id': str(self.user.id)
             }
-        )
+        })
 
-    # Handlers para eventos del grupo
+    # Handlers para eventos del grupo (frames ya codificados)
 
     async def chat_message(self, event):
         """Enviar mensaje de chat al WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'message',
-            'data': event['message']
-        }))
+        await self.send_message_event(event)
 
     async def typing_indicator(self, event):
         """Enviar indicador de escritura al WebSocket"""
         # No enviar la notificación al usuario que está escribiendo
         if event['user_id'] != str(self.user.id):
-            await self.send(text_data=json.dumps({
-                'type': 'typing',
-                'data': {
-                    'user_id': event['user_id'],
-                    'username': event['username'],
-                    'is_typing': event['is_typing']
-                }
-            }))
+            await self.send_frame(event)
 
     async def user_status(self, event):
         """Enviar cambio de estado de usuario al WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'user_status',
-            'data': {
-                'action': event['action'],
-                'user_id': event['user_id'],
-                'username': event['username']
-            }
-        }))
+        await self.send_frame(event)
 
     async def messages_read(self, event):
         """Enviar notificación de mensajes leídos al WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'messages_read',
-            'data': {
-                'user_id': event['user_id'],
-                'message_ids': event['message_ids']
-            }
-        }))
+        await self.send_frame(event)
 
     async def message_edited(self, event):
         """Enviar mensaje editado al WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'message_edited',
-            'data': event['message']
-        }))
+        await self.send_message_event(event)
 
     async def message_deleted(self, event):
         """Enviar notificación de mensaje eliminado al WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'message_deleted',
-            'data': {
-                'message_id': event['message_id'],
-                'user_id': event['user_id']
-            }
-        }))
+        await self.send_frame(event)
 
     # Métodos de utilidad
 
+    async def send_message_event(self, event):
+        """Reenviar el frame común o, si ya leí el mensaje, mi copia parcheada"""
+        payload = message_broadcast.for_viewer(event, self.user.id)
+        if payload is None:
+            await self.send_frame(event)
+        else:
+            await self.send_payload(payload)
+
     async def send_error(self, message):
         """Enviar mensaje de error al cliente"""
-        await self.send(text_data=json.dumps({
+        await self.send_payload({
             'type': 'error',
             'message': message
-        }))
+        })
 
     @database_sync_to_async
     def check_room_participant(self):
         """Verificar si el usuario es participante de la sala"""
-        try:
-            room = ChatRoom.objects.get(id=self.room_id)
-            return room.participants.filter(id=self.user.id).exists()
-        except ChatRoom.DoesNotExist:
+        room = object_cache.get(ChatRoom, self.room_id)
+        if room is None:
             return False
+        return room.participants.filter(id=self.user.id).exists()
 
     @database_sync_to_async
     def create_message(self, content, message_type, reply_to_id):
@@ -300,7 +266,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
             reply_to = None
             if reply_to_id:
                 try:
-                    reply_to = Message.objects.get(id=reply_to_id, room=room)
+                    # El remitente se incluye en el payload del mensaje
+                    reply_to = Message.objects.select_related('sender').get(
+                        id=reply_to_id, room=room)
                 except Message.DoesNotExist:
                     pass
 
@@ -322,10 +290,9 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return None
 
     @database_sync_to_async
-    def serialize_message(self, message):
-        """Serializar mensaje"""
-        serializer = MessageSerializer(message)
-        return serializer.data
+    def build_message_event(self, handler, message, frame_type, read_by_ids=()):
+        """Evento de grupo del mensaje (sin consultas a la base de datos)"""
+        return message_broadcast.event(handler, message, frame_type, read_by_ids)
 
     @database_sync_to_async
     def mark_messages_read(self, message_ids):
@@ -346,9 +313,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def edit_message(self, message_id, new_content):
-        """Editar mensaje"""
+        """Editar mensaje; devuelve el mensaje y los ids de quienes lo leyeron"""
         try:
-            message = Message.objects.get(
+            message = Message.objects.select_related(
+                'reply_to__sender'
+            ).get(
                 id=message_id,
                 room_id=self.room_id,
                 sender=self.user
@@ -356,7 +325,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
             message.content = new_content
             message.edited_at = timezone.now()
             message.save()
-            return message
+            # El remitente es el usuario conectado
+            message.sender = self.user
+            read_by_ids = list(
+                message.read_by.values_list('user_id', flat=True))
+            return message, read_by_ids
         except Message.DoesNotExist:
             return None
 
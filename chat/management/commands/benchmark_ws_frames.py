@@ -0,0 +1,192 @@
+"""
+Comando de gestión para comparar tamaño y coste de codificación de los
+frames WebSocket en JSON y en MessagePack (social.msgpack.v1)
+
+La fila "evento json+msgpack" es lo que cuesta cada envío a un grupo con
+WEBSOCKET_MSGPACK=True: se codifican los dos formatos y ambos viajan por
+la capa de canales.
+"""
+import json
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from social_network_backend import json_codec, websockets
+
+
+def sample_frames():
+    """Frames representativos con la forma de los serializers reales"""
+    now = timezone.now()
+    sender = {
+        'id': str(uuid.uuid4()),
+        'username': 'maria.gonzalez',
+        'first_name': 'María',
+        'last_name': 'González',
+        'avatar_url': 'https://cdn.example.com/avatars/maria/abc_64.webp',
+        'is_verified': True,
+    }
+    message = {
+        'type': 'message',
+        'data': {
+            'id': str(uuid.uuid4()),
+            'room': str(uuid.uuid4()),
+            'sender': sender,
+            'message_type': 'text',
+            'content': '¿Nos vemos mañana a las 10 en la oficina?',
+            'image': None,
+            'placeholder': '',
+            'dominant_color': '',
+            'file': None,
+            'created_at': now.isoformat(),
+            'updated_at': now.isoformat(),
+            'edited_at': None,
+            'is_deleted': False,
+            'reply_to': None,
+            'read_by_count': 0,
+            'is_read_by_me': False,
+        },
+    }
+    notification = {
+        'type': 'new_notification',
+        'data': {
+            'id': str(uuid.uuid4()),
+            'notification_type': 'like',
+            'title': 'Nuevo like',
+            'message': 'maria.gonzalez le dio like a tu post',
+            'actor': sender,
+            'is_read': False,
+            'created_at': now.isoformat(),
+            'read_at': None,
+            'extra_data': {'post_id': str(uuid.uuid4())},
+            'content_object_data': None,
+            'time_since': 'hace unos segundos',
+        },
+    }
+    typing = {
+        'type': 'typing',
+        'data': {'user_id': sender['id'], 'username': sender['username'],
+                 'is_typing': True},
+    }
+    history = {
+        'type': 'notifications_list',
+        'data': {
+            'notifications': [
+                {**notification['data'], 'id': str(uuid.uuid4()),
+                 'created_at': (now - timedelta(minutes=i)).isoformat()}
+                for i in range(20)
+            ],
+            'page': 1, 'total_pages': 3, 'total_count': 55,
+            'has_next': True, 'has_previous': False,
+        },
+    }
+    return {
+        'chat_message': message,
+        'notification': notification,
+        'typing': typing,
+        'notifications_page': history,
+    }
+
+
+def encoders():
+    """Codificadores a comparar: nombre -> función"""
+    result = {
+        # Lo que hacían los consumers antes: json.dumps por socket
+        'json (stdlib)': lambda payload: json.dumps(payload).encode('utf-8'),
+    }
+    if json_codec.orjson is not None:
+        codec = json_codec.OrjsonCodec()
+        result['json (orjson)'] = codec.dumps
+    if websockets.msgpack is not None:
+        result['msgpack v1'] = websockets.pack
+        # Evento de grupo con WEBSOCKET_MSGPACK: JSON y MessagePack
+        result['evento json+msgpack'] = lambda payload: (
+            json_codec.dumps(payload) + websockets.pack(payload))
+    return result
+
+
+class Command(BaseCommand):
+    """Comando para medir bytes por frame y coste de codificación"""
+    help = ('Compara bytes en el cable y coste de codificación de los frames '
+            'WebSocket en JSON y MessagePack, y el coste de un envío a un grupo')
+
+    def add_arguments(self, parser):
+        """Argumentos del comando"""
+        parser.add_argument(
+            '--number',
+            type=int,
+            default=2000,
+            help='Codificaciones por medición',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Mediciones por caso (se reporta la mediana)',
+        )
+        parser.add_argument(
+            '--members',
+            type=int,
+            default=50,
+            help='Miembros del grupo para el coste de un envío',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Imprime los resultados en JSON',
+        )
+
+    def handle(self, *args, **options):
+        """Ejecuta el benchmark"""
+        if options['number'] < 1 or options['repeat'] < 1:
+            raise CommandError('--number y --repeat deben ser positivos')
+
+        results = []
+        for frame_name, payload in sample_frames().items():
+            for codec_name, encode in encoders().items():
+                encoded = encode(payload)
+                seconds = self._measure(
+                    encode, payload, options['number'], options['repeat'])
+                results.append({
+                    'frame': frame_name,
+                    'codec': codec_name,
+                    'bytes': len(encoded),
+                    'encode_us': seconds * 1e6,
+                    # Antes: una codificación por miembro; ahora una por envío
+                    'group_per_member_us': seconds * 1e6 * options['members'],
+                    'group_once_us': seconds * 1e6,
+                })
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        group = f"grupo x{options['members']} (µs)"
+        self.stdout.write(
+            f"{'frame':<20}{'codec':<22}{'bytes':>8}{'codificar (µs)':>16}"
+            f"{group:>20}{'una vez (µs)':>14}")
+        for result in results:
+            self.stdout.write(
+                f"{result['frame']:<20}{result['codec']:<22}"
+                f"{result['bytes']:>8}{result['encode_us']:>16.2f}"
+                f"{result['group_per_member_us']:>20.1f}"
+                f"{result['group_once_us']:>14.2f}"
+            )
+        if websockets.msgpack is not None:
+            self.stdout.write(
+                "\nCon WEBSOCKET_MSGPACK=True cada envío a un grupo paga la "
+                "fila 'evento json+msgpack' (las dos codificaciones y los dos "
+                "frames en la capa de canales) aunque ningún socket use "
+                "MessagePack; sin él solo se codifica JSON.")
+
+    def _measure(self, encode, payload, number, repeat):
+        """Segundos por codificación (mediana de repeat mediciones)"""
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                encode(payload)
+            runs.append((time.perf_counter() - start) / number)
+        return statistics.median(runs)
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:09
+
+from django.db import migrations, models
+
+
+def record_existing_sources(apps, schema_editor):
+    """Los placeholders existentes se calcularon de la imagen actual"""
+    Message = apps.get_model('chat', 'Message')
+    Message.objects.exclude(placeholder='').update(
+        placeholder_source=models.F('image'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_message_dominant_color_message_placeholder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='placeholder_source',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.RunPython(record_existing_sources, migrations.RunPython.noop),
+    ]
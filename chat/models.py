@@ -91,6 +91,11 @@ class Message(models.Model):
     content = models.TextField()
     image = models.ImageField(upload_to='chat/images/', blank=True, null=True)
     file = models.FileField(upload_to='chat/files/', blank=True, null=True)
+    # Placeholder inline (data URI) y color dominante calculados al subir
+    placeholder = models.TextField(blank=True)
+    dominant_color = models.CharField(max_length=7, blank=True)
+    # Imagen de la que se calculó el placeholder
+    placeholder_source = models.CharField(max_length=500, blank=True)
 
     # Metadatos
     created_at = models.DateTimeField(default=timezone.now)
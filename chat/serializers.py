@@ -5,6 +5,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.db import models
 from .models import ChatRoom, Message, MessageRead, OnlineStatus
+from uploads.media_urls import MediaURLListSerializer
 from users.serializers import UserBasicSerializer
 
 User = get_user_model()
@@ -19,12 +20,15 @@ class MessageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Message
+        list_serializer_class = MediaURLListSerializer
+        media_fields = ['sender.avatar', 'sender.avatar_variants']
         fields = [
             'id', 'room', 'sender', 'message_type', 'content',
-            'image', 'file', 'created_at', 'updated_at', 'edited_at',
+            'image', 'placeholder', 'dominant_color', 'file',
+            'created_at', 'updated_at', 'edited_at',
             'is_deleted', 'reply_to', 'read_by_count', 'is_read_by_me'
         ]
-        read_only_fields = ['id', 'sender',
+        read_only_fields = ['id', 'sender', 'placeholder', 'dominant_color',
                             'created_at', 'updated_at', 'edited_at']
 
     def get_reply_to(self, obj):
@@ -4,10 +4,13 @@ Señales para el sistema de chat
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from social_network_backend.object_cache import object_cache
 from .models import OnlineStatus, Message
 
 User = get_user_model()
 
+object_cache.register('chat.ChatRoom')
+
 
 @receiver(post_save, sender=User)
 def create_online_status(sender, instance, created, **kwargs):
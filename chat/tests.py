@@ -1,12 +1,18 @@
 """
 Tests para el sistema de chat
 """
-from django.test import TestCase
+from unittest import mock
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
-from .models import ChatRoom, Message, OnlineStatus
+from social_network_backend import json_codec, websockets
+from .broadcast import message_broadcast
+from .consumers import ChatConsumer
+from .models import ChatRoom, Message, MessageRead, OnlineStatus
 
 User = get_user_model()
 
@@ -228,3 +234,196 @@ class OnlineStatusTest(TestCase):
         # Verificar actualización
         status.refresh_from_db()
         self.assertTrue(status.is_online)
+
+
+@override_settings(CHANNEL_LAYERS={
+    'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class ChatConsumerBroadcastTest(TransactionTestCase):
+    """Tests para el reparto de mensajes de una sala por WebSocket"""
+
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            email='ws1@example.com', username='ws1', password='testpass123')
+        self.user2 = User.objects.create_user(
+            email='ws2@example.com', username='ws2', password='testpass123')
+        self.room = ChatRoom.objects.create(
+            room_type='direct', created_by=self.user1)
+        self.room.participants.add(self.user1, self.user2)
+
+    def communicator(self, user, subprotocols=None):
+        communicator = WebsocketCommunicator(
+            ChatConsumer.as_asgi(), f'/ws/chat/{self.room.id}/',
+            subprotocols=subprotocols)
+        communicator.scope['user'] = user
+        communicator.scope['url_route'] = {'kwargs': {'room_id': str(self.room.id)}}
+        return communicator
+
+    def test_message_encoded_once_for_all_members(self):
+        """Test el frame se codifica una vez y llega igual a cada miembro"""
+        async_to_sync(self._message_encoded_once_for_all_members)()
+
+    async def _message_encoded_once_for_all_members(self):
+        sender, receiver = self.communicator(self.user1), self.communicator(self.user2)
+        for communicator in (sender, receiver):
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+        # Avisos de conexión
+        await sender.receive_from()
+        await sender.receive_from()
+        await receiver.receive_from()
+
+        with mock.patch('chat.broadcast.encode_frame',
+                        wraps=websockets.encode_frame) as encode:
+            await sender.send_to(text_data=json_codec.dumps_str(
+                {'action': 'send_message', 'content': 'Hola'}))
+            sent = await sender.receive_from()
+            received = await receiver.receive_from()
+
+        self.assertEqual(encode.call_count, 1)
+        self.assertEqual(sent, received)
+        frame = json_codec.loads(received)
+        self.assertEqual(frame['type'], 'message')
+        self.assertEqual(frame['data']['content'], 'Hola')
+
+        # Frame inválido: error solo para quien lo envió
+        await receiver.send_to(text_data='{no es json')
+        error = json_codec.loads(await receiver.receive_from())
+        self.assertEqual(error['type'], 'error')
+        self.assertTrue(await sender.receive_nothing())
+
+        for communicator in (sender, receiver):
+            await communicator.disconnect()
+
+    def test_handler_value_error_is_internal_error(self):
+        """Test un ValueError de un handler no se reporta como formato inválido"""
+        async_to_sync(self._handler_value_error_is_internal_error)()
+
+    async def _handler_value_error_is_internal_error(self):
+        communicator = self.communicator(self.user2)
+        await communicator.connect()
+        await communicator.receive_from()
+
+        await communicator.send_to(text_data='{no es json')
+        error = json_codec.loads(await communicator.receive_from())
+        self.assertEqual(error['message'], 'Formato de mensaje inválido')
+
+        with mock.patch.object(ChatConsumer, 'handle_typing',
+                               side_effect=ValueError('fallo interno')):
+            with self.assertLogs('chat.consumers', 'ERROR'):
+                await communicator.send_to(text_data=json_codec.dumps_str(
+                    {'action': 'typing', 'is_typing': True}))
+                error = json_codec.loads(await communicator.receive_from())
+        self.assertEqual(error['message'], 'Error interno del servidor')
+
+        await communicator.disconnect()
+
+    @override_settings(WEBSOCKET_MSGPACK=False)
+    def test_msgpack_not_offered_by_default(self):
+        """Test sin WEBSOCKET_MSGPACK solo se negocia y codifica JSON"""
+        self.assertNotIn('frame_msgpack', websockets.encode_frame({'type': 'x'}))
+        async_to_sync(self._msgpack_not_offered)()
+
+    async def _msgpack_not_offered(self):
+        communicator = self.communicator(
+            self.user2, subprotocols=['social.msgpack.v1', 'social.json'])
+        connected, subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, 'social.json')
+        await communicator.disconnect()
+
+    @override_settings(WEBSOCKET_MSGPACK=True)
+    def test_msgpack_subprotocol(self):
+        """Test un cliente social.msgpack.v1 recibe frames binarios compactos"""
+        async_to_sync(self._msgpack_subprotocol)()
+
+    async def _msgpack_subprotocol(self):
+        sender = self.communicator(self.user1)
+        receiver = self.communicator(
+            self.user2, subprotocols=['social.msgpack.v1', 'social.json'])
+        connected, _ = await sender.connect()
+        self.assertTrue(connected)
+        connected, subprotocol = await receiver.connect()
+        self.assertEqual(subprotocol, 'social.msgpack.v1')
+        await sender.receive_from()
+        await sender.receive_from()
+        await receiver.receive_output()
+
+        await sender.send_to(text_data=json_codec.dumps_str(
+            {'action': 'send_message', 'content': 'Hola'}))
+        text_frame = json_codec.loads(await sender.receive_from())
+        binary = await receiver.receive_output()
+
+        self.assertIn('bytes', binary)
+        self.assertLess(len(binary['bytes']),
+                        len(json_codec.dumps(text_frame)))
+        self.assertEqual(websockets.unpack(binary['bytes']), text_frame)
+
+        # El cliente binario también envía en MessagePack
+        await receiver.send_to(bytes_data=websockets.pack(
+            {'action': 'typing', 'is_typing': True}))
+        typing = json_codec.loads(await sender.receive_from())
+        self.assertEqual(typing['type'], 'typing')
+        self.assertEqual(typing['data']['username'], 'ws2')
+
+        for communicator in (sender, receiver):
+            await communicator.disconnect()
+
+    def test_edited_message_patched_for_readers(self):
+        """Test quien ya leyó el mensaje recibe is_read_by_me=True al editarse"""
+        message = Message.objects.create(
+            room=self.room, sender=self.user1, content='Original')
+        MessageRead.objects.create(user=self.user2, message=message)
+        async_to_sync(self._edited_message_patched_for_readers)(message)
+
+    async def _edited_message_patched_for_readers(self, message):
+        sender, reader = self.communicator(self.user1), self.communicator(self.user2)
+        for communicator in (sender, reader):
+            await communicator.connect()
+        await sender.receive_from()
+        await sender.receive_from()
+        await reader.receive_from()
+
+        await sender.send_to(text_data=json_codec.dumps_str({
+            'action': 'edit_message', 'message_id': str(message.id),
+            'content': 'Editado'}))
+        own = json_codec.loads(await sender.receive_from())
+        read = json_codec.loads(await reader.receive_from())
+
+        self.assertEqual(own['type'], 'message_edited')
+        self.assertEqual(own['data']['content'], 'Editado')
+        self.assertEqual(own['data']['read_by_count'], 1)
+        self.assertFalse(own['data']['is_read_by_me'])
+        self.assertTrue(read['data']['is_read_by_me'])
+
+        for communicator in (sender, reader):
+            await communicator.disconnect()
+
+
+class MessageBroadcastTest(TestCase):
+    """Tests para el payload de mensajes repartidos por WebSocket"""
+
+    def setUp(self):
+        self.user1 = User.objects.create_user(
+            email='b1@example.com', username='b1', password='testpass123')
+        self.user2 = User.objects.create_user(
+            email='b2@example.com', username='b2', password='testpass123')
+        self.room = ChatRoom.objects.create(
+            room_type='direct', created_by=self.user1)
+        self.original = Message.objects.create(
+            room=self.room, sender=self.user2, content='¿Vienes?')
+
+    def test_new_message_event_without_queries(self):
+        """Test el evento de un mensaje nuevo se construye sin consultas"""
+        message = Message.objects.create(
+            room=self.room, sender=self.user1, content='Sí',
+            reply_to=Message.objects.select_related('sender').get(pk=self.original.pk))
+
+        with self.assertNumQueries(0):
+            event = message_broadcast.event('chat_message', message, 'message')
+
+        frame = json_codec.loads(event['frame'])
+        self.assertEqual(frame['data']['sender']['username'], 'b1')
+        self.assertEqual(frame['data']['reply_to']['sender'], 'b2')
+        self.assertEqual(frame['data']['read_by_count'], 0)
+        self.assertEqual(event['read_by'], [])
+        self.assertIsNone(message_broadcast.for_viewer(event, self.user2.id))
@@ -1,17 +1,16 @@
 """
 WebSocket consumer para notificaciones en tiempo real
 """
-import json
 import logging
-from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth import get_user_model
+from social_network_backend.websockets import FrameConsumer
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
-class NotificationConsumer(AsyncWebsocketConsumer):
+class NotificationConsumer(FrameConsumer):
     """
     Consumer para manejar notificaciones en tiempo real
     """
@@ -54,10 +53,17 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         logger.info(
             f"Usuario {self.user.username} desconectado de notificaciones")
 
-    async def receive(self, text_data):
-        """Recibir mensaje del WebSocket"""
+    async def receive(self, text_data=None, bytes_data=None):
+        """Recibir mensaje del WebSocket (texto JSON o binario MessagePack)"""
+        # Solo los errores de decodificación son de formato: un ValueError
+        # de un handler es un error interno
+        try:
+            data = self.decode(text_data, bytes_data)
+        except ValueError:
+            await self.send_error("Formato de mensaje inválido")
+            return
+
         try:
-            data = json.loads(text_data)
             action = data.get('action')
 
             if action == 'mark_read':
@@ -69,8 +75,6 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             else:
                 await self.send_error("Acción no válida")
 
-        except json.JSONDecodeError:
-            await self.send_error("Formato JSON inválido")
         except Exception as e:
             logger.error(f"Error en receive: {str(e)}")
             await self.send_error("Error interno del servidor")
@@ -83,13 +87,13 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         try:
             count = await self.mark_notifications_read(notification_ids, mark_all)
 
-            await self.send(text_data=json.dumps({
+            await self.send_payload({
                 'type': 'mark_read_response',
                 'data': {
                     'marked_count': count,
                     'success': True
                 }
-            }))
+            })
 
             # Enviar conteo actualizado
             await self.send_unread_count()
@@ -110,10 +114,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         try:
             notifications_data = await self.get_notifications_page(page, page_size)
 
-            await self.send(text_data=json.dumps({
+            await self.send_payload({
                 'type': 'notifications_list',
                 'data': notifications_data
-            }))
+            })
 
         except Exception as e:
             logger.error(f"Error obteniendo notificaciones: {str(e)}")
@@ -122,25 +126,24 @@ class NotificationConsumer(AsyncWebsocketConsumer):
     # Handlers para eventos del grupo
 
     async def notification_message(self, event):
-        """Enviar nueva notificación al WebSocket"""
-        notification = event['notification']
-
-        await self.send(text_data=json.dumps({
-            'type': 'new_notification',
-            'data': notification
-        }))
+        """Enviar nueva notificación al WebSocket (frame ya codificado)"""
+        await self.send_frame(event)
 
         # También enviar conteo actualizado
         await self.send_unread_count()
 
+    async def upload_status(self, event):
+        """Enviar resultado del procesamiento de una imagen subida"""
+        await self.send_frame(event)
+
     # Métodos de utilidad
 
     async def send_error(self, message):
         """Enviar mensaje de error al cliente"""
-        await self.send(text_data=json.dumps({
+        await self.send_payload({
             'type': 'error',
             'message': message
-        }))
+        })
 
     async def send_unread_notifications(self):
         """Enviar notificaciones no leídas al conectarse"""
@@ -148,10 +151,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             notifications_data = await self.get_unread_notifications()
 
             if notifications_data:
-                await self.send(text_data=json.dumps({
+                await self.send_payload({
                     'type': 'unread_notifications',
                     'data': notifications_data
-                }))
+                })
 
             # También enviar conteo
             await self.send_unread_count()
@@ -164,10 +167,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         try:
             count = await self.get_unread_count()
 
-            await self.send(text_data=json.dumps({
+            await self.send_payload({
                 'type': 'unread_count',
                 'data': {'count': count}
-            }))
+            })
 
         except Exception as e:
             logger.error(f"Error enviando conteo no leído: {str(e)}")
@@ -0,0 +1,182 @@
+"""
+Notificación de nuevos posts a los seguidores del autor (fan-out)
+
+El reparto se ejecuta fuera del request, en un pequeño pool de hilos, una
+vez confirmada la transacción que creó el post. Primero se notifica a los
+seguidores que más han interactuado con el autor en los últimos
+NOTIFICATION_FANOUT_PRIORITY_DAYS días (likes y comentarios en sus
+posts) y después al resto, recorriendo los seguidores por keyset sobre el
+índice (following, -created_at) en bloques de
+NOTIFICATION_FANOUT_CHUNK_SIZE. Cada bloque se inserta con
+create_notifications_bulk, así que no hay límite de seguidores ni una
+consulta por destinatario.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from social_network_backend.metrics import metrics
+from .models import NotificationType
+from .services import notification_service
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+
+class FollowerFanoutService:
+    """Servicio que reparte la notificación de un post entre los seguidores"""
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def eager(self):
+        return getattr(settings, 'NOTIFICATION_FANOUT_EAGER', False)
+
+    def schedule(self, post):
+        """Programar el reparto del post al confirmar la transacción"""
+        from social.models import Follow
+
+        if not Follow.objects.filter(following_id=post.author_id).exists():
+            return
+        post_id = post.pk
+        transaction.on_commit(lambda: self._submit(post_id))
+
+    def _submit(self, post_id):
+        if self.eager:
+            self.fan_out(post_id)
+            return
+        self._get_executor().submit(self._run, post_id)
+
+    def _run(self, post_id):
+        try:
+            self.fan_out(post_id)
+        except Exception as e:
+            logger.error(f"Error repartiendo el post {post_id}: {str(e)}")
+        finally:
+            close_old_connections()
+
+    def fan_out(self, post_id):
+        """Notificar el post a todos los seguidores; devuelve las creadas"""
+        from posts.models import Post
+
+        started = time.monotonic()
+        post = Post.objects.select_related('author').filter(pk=post_id).first()
+        if post is None:
+            return 0
+
+        author = post.author
+        notify = dict(
+            actor=author,
+            notification_type=NotificationType.POST_UPLOAD,
+            title="Nuevo post",
+            message=f"{author.get_full_name() or author.username} subió un nuevo post",
+            content_object=post,
+            extra_data={
+                'post_id': str(post.id),
+                'post_content': post.content[:100],
+                'author_username': author.username
+            }
+        )
+
+        priority = self.priority_followers(author)
+        created = len(notification_service.create_notifications_bulk(
+            recipients=priority, **notify))
+
+        skip = {user.pk for user in priority}
+        for chunk in self.iter_follower_chunks(author):
+            recipients = [user for user in chunk if user.pk not in skip]
+            created += len(notification_service.create_notifications_bulk(
+                recipients=recipients, **notify))
+
+        metrics.increment('notifications.fanout_recipients', created)
+        metrics.observe('notifications.fanout_seconds',
+                        time.monotonic() - started)
+        logger.info(f"Post {post.id} notificado a {created} seguidores")
+        return created
+
+    def priority_followers(self, author, limit=None, days=None):
+        """
+        Seguidores con más likes y comentarios recientes en los posts del
+        autor, de mayor a menor interacción
+        """
+        from social.models import Comment, Follow, Like
+
+        limit = settings.NOTIFICATION_FANOUT_PRIORITY_LIMIT if limit is None else limit
+        if limit <= 0:
+            return []
+        days = settings.NOTIFICATION_FANOUT_PRIORITY_DAYS if days is None else days
+        since = timezone.now() - timedelta(days=days)
+        followers = Follow.objects.filter(following=author).values('follower')
+
+        scores = {}
+        for model, user_field in ((Like, 'user'), (Comment, 'author')):
+            rows = model.objects.filter(
+                post__author=author, created_at__gte=since,
+                **{f'{user_field}__in': followers}
+            ).values(user_field).annotate(
+                interactions=Count('id')
+            ).order_by('-interactions')[:limit]
+            for row in rows:
+                scores[row[user_field]] = \
+                    scores.get(row[user_field], 0) + row['interactions']
+
+        top = sorted(scores, key=lambda pk: (-scores[pk], str(pk)))[:limit]
+        users = User.objects.only('id', 'username').in_bulk(top)
+        return [users[pk] for pk in top if pk in users]
+
+    def iter_follower_chunks(self, author, chunk_size=None):
+        """
+        Recorrer los seguidores en bloques por keyset (created_at, id)
+        en lugar de OFFSET, usando el índice (following, -created_at)
+        """
+        from social.models import Follow
+
+        chunk_size = chunk_size or settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+        follows = Follow.objects.filter(following=author).select_related(
+            'follower').only(
+            'id', 'created_at', 'follower__id', 'follower__username'
+        ).order_by('-created_at', '-id')
+
+        cursor = None
+        while True:
+            page = follows
+            if cursor is not None:
+                created_at, pk = cursor
+                page = page.filter(
+                    Q(created_at__lt=created_at) |
+                    Q(created_at=created_at, id__lt=pk))
+            chunk = list(page[:chunk_size])
+            if not chunk:
+                return
+            yield [follow.follower for follow in chunk]
+            if len(chunk) < chunk_size:
+                return
+            cursor = (chunk[-1].created_at, chunk[-1].pk)
+
+    def shutdown(self, wait=True):
+        """Detener el pool (usado en tests y al apagar el proceso)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.NOTIFICATION_FANOUT_WORKERS,
+                    thread_name_prefix='notification-fanout')
+            return self._executor
+
+
+# Instancia global del servicio
+follower_fanout = FollowerFanoutService()
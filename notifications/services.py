@@ -10,6 +10,7 @@ from django.utils import timezone
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 
+from social_network_backend.websockets import encode_frame
 from .models import (
     UserNotification, NotificationSettings, DeviceToken,
     NotificationBatch, NotificationType
@@ -22,8 +23,10 @@ User = get_user_model()
 class NotificationService:
     """Servicio principal para manejar notificaciones"""
 
-    def __init__(self):
-        self.channel_layer = get_channel_layer()
+    @property
+    def channel_layer(self):
+        # Se pide al usarla: crearla comprueba el servidor Redis
+        return get_channel_layer()
 
     def create_notification(
         self,
@@ -104,6 +107,82 @@ class NotificationService:
             logger.error(f"Error creando notificación: {str(e)}")
             return None
 
+    def create_notifications_bulk(
+        self,
+        recipients,
+        notification_type,
+        title,
+        message,
+        actor=None,
+        content_object=None,
+        extra_data=None
+    ):
+        """
+        Crear la misma notificación para varios destinatarios.
+
+        Aplica las mismas reglas que create_notification (preferencias,
+        horario silencioso y duplicados recientes) con un número fijo de
+        consultas en lugar de varias por destinatario. Devuelve las
+        notificaciones creadas.
+        """
+        recipients = {recipient.pk: recipient for recipient in recipients}
+        if not recipients:
+            return []
+
+        try:
+            settings_by_user = self.get_users_settings(recipients.values())
+            allowed = [
+                recipient for pk, recipient in recipients.items()
+                if settings_by_user[pk].is_notification_enabled(notification_type)
+                and not settings_by_user[pk].is_quiet_time()
+            ]
+
+            content_type = None
+            if content_object:
+                content_type = ContentType.objects.get_for_model(content_object)
+
+                # Evitar duplicados recientes (últimos 5 minutos)
+                recent_threshold = timezone.now() - timezone.timedelta(minutes=5)
+                duplicated = set(UserNotification.objects.filter(
+                    recipient__in=[recipient.pk for recipient in allowed],
+                    actor=actor,
+                    notification_type=notification_type,
+                    content_type=content_type,
+                    object_id=content_object.id,
+                    created_at__gte=recent_threshold
+                ).values_list('recipient_id', flat=True))
+                allowed = [recipient for recipient in allowed
+                           if recipient.pk not in duplicated]
+
+            notifications = UserNotification.objects.bulk_create([
+                UserNotification(
+                    recipient=recipient,
+                    actor=actor,
+                    notification_type=notification_type,
+                    title=title,
+                    message=message,
+                    content_object=content_object,
+                    extra_data=extra_data or {}
+                )
+                for recipient in allowed
+            ])
+
+            for notification in notifications:
+                if settings_by_user[notification.recipient_id].in_app_notifications:
+                    self.send_realtime_notification(notification)
+            self.schedule_push_notifications([
+                notification for notification in notifications
+                if settings_by_user[notification.recipient_id].push_notifications
+            ])
+
+            logger.info(
+                f"{len(notifications)} notificaciones {notification_type} creadas en bloque")
+            return notifications
+
+        except Exception as e:
+            logger.error(f"Error creando notificaciones en bloque: {str(e)}")
+            return []
+
     def send_realtime_notification(self, notification):
         """Enviar notificación en tiempo real via WebSocket"""
         try:
@@ -119,12 +198,15 @@ class NotificationService:
             from .serializers import NotificationSerializer
             notification_data = NotificationSerializer(notification).data
 
-            # Enviar via WebSocket
+            # Enviar via WebSocket con el frame ya codificado
             async_to_sync(self.channel_layer.group_send)(
                 user_group,
                 {
                     'type': 'notification_message',
-                    'notification': notification_data
+                    **encode_frame({
+                        'type': 'new_notification',
+                        'data': notification_data
+                    })
                 }
             )
 
@@ -135,16 +217,22 @@ class NotificationService:
             logger.error(
                 f"Error enviando notificación en tiempo real: {str(e)}")
 
-    def schedule_push_notification(self, notification):
-        """Programar push notification"""
+    def schedule_push_notification(self, notification, device_tokens=None):
+        """
+        Programar push notification.
+
+        device_tokens permite pasar los tokens activos ya cargados (lo usa
+        el envío en bloque para no consultarlos uno a uno).
+        """
         try:
             # Obtener tokens de dispositivos activos
-            device_tokens = DeviceToken.objects.filter(
-                user=notification.recipient,
-                is_active=True
-            )
+            if device_tokens is None:
+                device_tokens = list(DeviceToken.objects.filter(
+                    user=notification.recipient,
+                    is_active=True
+                ))
 
-            if not device_tokens.exists():
+            if not device_tokens:
                 logger.info(
                     f"No hay tokens de dispositivo para {notification.recipient.username}")
                 return
@@ -159,6 +247,29 @@ class NotificationService:
         except Exception as e:
             logger.error(f"Error programando push notification: {str(e)}")
 
+    def schedule_push_notifications(self, notifications):
+        """
+        Programar push notifications de varios destinatarios por la misma
+        vía que schedule_push_notification, con los tokens en una consulta
+        """
+        if not notifications:
+            return
+        try:
+            tokens_by_user = {}
+            for device_token in DeviceToken.objects.filter(
+                user__in=[n.recipient_id for n in notifications],
+                is_active=True
+            ):
+                tokens_by_user.setdefault(
+                    device_token.user_id, []).append(device_token)
+        except Exception as e:
+            logger.error(f"Error programando push notifications: {str(e)}")
+            return
+
+        for notification in notifications:
+            self.schedule_push_notification(
+                notification, tokens_by_user.get(notification.recipient_id, []))
+
     def get_user_settings(self, user):
         """Obtener configuración de notificaciones del usuario"""
         settings, created = NotificationSettings.objects.get_or_create(
@@ -177,6 +288,26 @@ class NotificationService:
         )
         return settings
 
+    def get_users_settings(self, users):
+        """
+        Configuración de notificaciones de varios usuarios, por id.
+
+        Crea en bloque la configuración por defecto de quien no la tenga.
+        """
+        users = list(users)
+        settings_by_user = {
+            settings.user_id: settings
+            for settings in NotificationSettings.objects.filter(user__in=users)
+        }
+        missing = [NotificationSettings(user=user) for user in users
+                   if user.pk not in settings_by_user]
+        if missing:
+            NotificationSettings.objects.bulk_create(
+                missing, ignore_conflicts=True)
+            settings_by_user.update(
+                (settings.user_id, settings) for settings in missing)
+        return settings_by_user
+
     def mark_notifications_read(
         self,
         user,
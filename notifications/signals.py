@@ -6,6 +6,7 @@ from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
 from .services import notification_service
+from .fanout import follower_fanout
 from .models import NotificationType
 
 User = get_user_model()
@@ -103,29 +104,10 @@ def create_message_notification(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender='posts.Post')
 def create_post_upload_notification(sender, instance, created, **kwargs):
-    """Crear notificación cuando un usuario seguido sube un post"""
+    """Notificar a los seguidores cuando un usuario sube un post"""
     if created:
-        # Obtener seguidores del autor
-        from social.models import Follow
-
-        followers = Follow.objects.filter(
-            following=instance.author).select_related('follower')
-
-        # Crear notificaciones para máximo 50 seguidores por vez (para evitar spam)
-        for follow in followers[:50]:
-            notification_service.create_notification(
-                recipient=follow.follower,
-                actor=instance.author,
-                notification_type=NotificationType.POST_UPLOAD,
-                title="Nuevo post",
-                message=f"{instance.author.get_full_name() or instance.author.username} subió un nuevo post",
-                content_object=instance,
-                extra_data={
-                    'post_id': str(instance.id),
-                    'post_content': instance.content[:100],
-                    'author_username': instance.author.username
-                }
-            )
+        # El reparto entre seguidores se hace fuera del request
+        follower_fanout.schedule(instance)
 
 
 @receiver(post_save, sender='chat.ChatRoom')
@@ -155,56 +137,55 @@ def create_chat_invite_notification(sender, instance, created, **kwargs):
 # Señales para manejar menciones en posts y comentarios
 @receiver(post_save, sender='posts.Post')
 def create_mention_notification_post(sender, instance, created, **kwargs):
-    """Crear notificación para menciones en posts"""
-    if created:
-        _process_mentions(instance.content, instance.author, instance, 'post')
+    """Crear notificación para menciones en posts (también al editarlos)"""
+    if _content_changed(instance, created):
+        _process_mentions(instance.content, instance.author, instance, 'post',
+                          created)
 
 
 @receiver(post_save, sender='social.Comment')
 def create_mention_notification_comment(sender, instance, created, **kwargs):
-    """Crear notificación para menciones en comentarios"""
-    if created:
+    """Crear notificación para menciones en comentarios (también al editarlos)"""
+    if _content_changed(instance, created):
         _process_mentions(instance.content, instance.author,
-                          instance, 'comment')
-
-
-def _process_mentions(content, author, content_object, content_type):
-    """Procesar menciones en el contenido y crear notificaciones"""
-    import re
-
-    # Buscar menciones @username
-    mentions = re.findall(r'@(\w+)', content)
-
-    for username in mentions:
-        try:
-            mentioned_user = User.objects.get(username=username)
-            if mentioned_user != author:  # No notificar al autor
-
-                if content_type == 'post':
-                    title = "Te mencionaron"
-                    message = f"{author.get_full_name() or author.username} te mencionó en un post"
-                    obj = content_object
-                else:  # comment
-                    title = "Te mencionaron"
-                    message = f"{author.get_full_name() or author.username} te mencionó en un comentario"
-                    obj = content_object.post  # Para comentarios, usar el post
-
-                notification_service.create_notification(
-                    recipient=mentioned_user,
-                    actor=author,
-                    notification_type=NotificationType.MENTION,
-                    title=title,
-                    message=message,
-                    content_object=obj,
-                    extra_data={
-                        'mention_context': content_type,
-                        'mentioned_in': content[:100],
-                        'author_username': author.username
-                    }
-                )
-
-        except User.DoesNotExist:
-            continue  # Usuario mencionado no existe
+                          instance, 'comment', created)
+
+
+def _content_changed(instance, created):
+    # save() actualiza _loaded_content después de emitir post_save
+    return created or instance.content != getattr(
+        instance, '_loaded_content', None)
+
+
+def _process_mentions(content, author, content_object, content_type,
+                      created=False):
+    """Registrar las menciones del contenido y notificar solo las nuevas"""
+    from social.mentions import mention_service
+
+    mentioned_users = mention_service.record(content_object, author, created)
+    if not mentioned_users:
+        return
+
+    if content_type == 'post':
+        message = f"{author.get_full_name() or author.username} te mencionó en un post"
+        obj = content_object
+    else:  # comment
+        message = f"{author.get_full_name() or author.username} te mencionó en un comentario"
+        obj = content_object.post  # Para comentarios, usar el post
+
+    notification_service.create_notifications_bulk(
+        recipients=mentioned_users,
+        actor=author,
+        notification_type=NotificationType.MENTION,
+        title="Te mencionaron",
+        message=message,
+        content_object=obj,
+        extra_data={
+            'mention_context': content_type,
+            'mentioned_in': content[:100],
+            'author_username': author.username
+        }
+    )
 
 
 # Señal para limpiar notificaciones cuando se elimina el objeto relacionado
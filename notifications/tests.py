@@ -1,7 +1,8 @@
 """
 Tests para el sistema de notificaciones
 """
-from django.test import TestCase, Client
+from unittest import mock
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APIClient
@@ -12,7 +13,8 @@ from notifications.models import (
     NotificationBatch, NotificationType
 )
 from notifications.services import notification_service
-from social.models import Follow, Like, Comment
+from notifications.fanout import follower_fanout
+from social.models import Follow, Like, Comment, Mention
 from posts.models import Post
 
 User = get_user_model()
@@ -110,6 +112,25 @@ class NotificationServiceTests(TestCase):
         self.assertEqual(notification.recipient, self.user1)
         self.assertEqual(notification.extra_data['test'], True)
 
+    def test_bulk_push_uses_single_push_path(self):
+        """Test el envío en bloque pasa por schedule_push_notification"""
+        token = DeviceToken.objects.create(
+            user=self.user1, token='token-user1', platform='android')
+
+        with mock.patch.object(
+                notification_service, 'schedule_push_notification') as push:
+            notifications = notification_service.create_notifications_bulk(
+                [self.user1, self.user2],
+                notification_type=NotificationType.POST_UPLOAD,
+                title="Nuevo post",
+                message="Hay un post nuevo"
+            )
+
+        self.assertEqual(len(notifications), 2)
+        tokens = {call.args[0].recipient_id: call.args[1]
+                  for call in push.call_args_list}
+        self.assertEqual(tokens, {self.user1.pk: [token], self.user2.pk: []})
+
     def test_get_user_stats(self):
         """Test obtener estadísticas de usuario"""
         # Crear algunas notificaciones
@@ -224,3 +245,163 @@ class NotificationSignalTests(TestCase):
 
         self.assertIsNotNone(notification)
         self.assertIn("like", notification.message)
+
+
+class MentionNotificationTests(TestCase):
+    """Tests para la resolución de menciones en bloque"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='autor', email='autor@test.com', password='testpass123')
+        self.mentioned = [
+            User.objects.create_user(
+                username=f'amigo{i}', email=f'amigo{i}@test.com',
+                password='testpass123')
+            for i in range(5)
+        ]
+
+    def test_post_mentions_batched(self):
+        """Test las menciones de un post no hacen consultas por username"""
+        post = Post.objects.create(author=self.author, content='Hola')
+        post.content = ' '.join(
+            f'@{user.username}' for user in self.mentioned * 2) + ' @nadie @autor'
+
+        from notifications.signals import _process_mentions
+        with self.assertNumQueries(7):
+            _process_mentions(post.content, self.author, post, 'post',
+                              created=True)
+
+        self.assertEqual(
+            set(Mention.objects.filter(post=post).values_list(
+                'mentioned_user__username', flat=True)),
+            {user.username for user in self.mentioned})
+        notifications = UserNotification.objects.filter(
+            notification_type=NotificationType.MENTION)
+        self.assertEqual(notifications.count(), 5)
+        self.assertFalse(notifications.filter(recipient=self.author).exists())
+
+    def test_comment_mentions_respect_settings(self):
+        """Test las menciones en comentarios respetan las preferencias"""
+        post = Post.objects.create(author=self.author, content='Post')
+        NotificationSettings.objects.create(
+            user=self.mentioned[0], mentions_enabled=False)
+
+        comment = Comment.objects.create(
+            post=post, author=self.author,
+            content='@amigo0 @amigo1 mirad esto')
+
+        self.assertEqual(
+            Mention.objects.filter(comment=comment).count(), 2)
+        recipients = set(UserNotification.objects.filter(
+            notification_type=NotificationType.MENTION
+        ).values_list('recipient__username', flat=True))
+        self.assertEqual(recipients, {'amigo1'})
+
+    def test_edit_reconciles_mentions(self):
+        """Test editar el contenido borra las menciones quitadas y solo
+        notifica las nuevas"""
+        post = Post.objects.create(
+            author=self.author, content='@amigo0 @amigo1 hola')
+        mentions = UserNotification.objects.filter(
+            notification_type=NotificationType.MENTION)
+        self.assertEqual(mentions.count(), 2)
+
+        post = Post.objects.get(pk=post.pk)
+        post.content = '@amigo1 @amigo2 hola'
+        post.save()
+
+        self.assertEqual(
+            set(Mention.objects.filter(post=post).values_list(
+                'mentioned_user__username', flat=True)),
+            {'amigo1', 'amigo2'})
+        self.assertEqual(mentions.count(), 3)
+        self.assertEqual(
+            mentions.filter(recipient__username='amigo2').count(), 1)
+
+        # Guardar sin cambiar el contenido no vuelve a resolver menciones
+        from notifications.signals import create_mention_notification_post
+        with self.assertNumQueries(0):
+            create_mention_notification_post(Post, post, created=False)
+
+        comment = Comment.objects.create(
+            post=post, author=self.author, content='@amigo3')
+        comment = Comment.objects.get(pk=comment.pk)
+        comment.content = 'sin menciones'
+        comment.save()
+        self.assertFalse(Mention.objects.filter(comment=comment).exists())
+
+    @override_settings(MENTIONS_MAX_PER_CONTENT=2)
+    def test_mentions_capped(self):
+        """Test solo se resuelven los primeros usernames distintos"""
+        post = Post.objects.create(
+            author=self.author,
+            content=' '.join(f'@{user.username}' for user in self.mentioned))
+
+        self.assertEqual(
+            list(Mention.objects.filter(post=post).order_by(
+                'mentioned_user__username').values_list(
+                'mentioned_user__username', flat=True)),
+            ['amigo0', 'amigo1'])
+
+
+@override_settings(NOTIFICATION_FANOUT_EAGER=True,
+                   NOTIFICATION_FANOUT_CHUNK_SIZE=3)
+class FollowerFanoutTests(TestCase):
+    """Tests para el reparto de nuevos posts entre seguidores"""
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='autor', email='autor@test.com', password='testpass123')
+        self.followers = []
+        for i in range(7):
+            follower = User.objects.create_user(
+                username=f'seguidor{i}', email=f'seguidor{i}@test.com',
+                password='testpass123')
+            Follow.objects.create(follower=follower, following=self.author)
+            self.followers.append(follower)
+
+    def test_all_followers_notified_in_chunks(self):
+        """Test se notifica a todos los seguidores, bloque a bloque"""
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(author=self.author, content='Nuevo')
+
+        recipients = UserNotification.objects.filter(
+            notification_type=NotificationType.POST_UPLOAD,
+            object_id=post.id
+        ).values_list('recipient_id', flat=True)
+        self.assertCountEqual(
+            recipients, [follower.id for follower in self.followers])
+
+        chunks = list(follower_fanout.iter_follower_chunks(self.author))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 1])
+
+    def test_fan_out_is_idempotent(self):
+        """Test repetir el reparto no duplica notificaciones"""
+        post = Post.objects.create(author=self.author, content='Nuevo')
+
+        self.assertEqual(follower_fanout.fan_out(post.id), 7)
+        self.assertEqual(follower_fanout.fan_out(post.id), 0)
+
+    def test_recent_interactions_first(self):
+        """Test los seguidores que más interactúan van primero"""
+        old_post = Post.objects.create(author=self.author, content='Viejo')
+        Like.objects.create(user=self.followers[4], post=old_post, like_type='post')
+        Comment.objects.create(
+            post=old_post, author=self.followers[4], content='Bien')
+        Comment.objects.create(
+            post=old_post, author=self.followers[2], content='Genial')
+
+        priority = follower_fanout.priority_followers(self.author)
+        self.assertEqual(priority, [self.followers[4], self.followers[2]])
+
+    def test_no_followers_not_scheduled(self):
+        """Test un autor sin seguidores no encola el reparto"""
+        lonely = User.objects.create_user(
+            username='solo', email='solo@test.com', password='testpass123')
+
+        with mock.patch.object(follower_fanout, '_submit') as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                Post.objects.create(author=lonely, content='Nadie me lee')
+
+        # Pueden quedar otros callbacks (la caché de objetos), no el reparto
+        submit.assert_not_called()
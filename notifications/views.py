@@ -32,6 +32,8 @@ class NotificationViewSet(viewsets.ModelViewSet):
     """ViewSet para notificaciones"""
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = NotificationPagination
+    # Lecturas desde réplicas (ver social_network_backend/replicas.py)
+    replica_read_actions = {'list'}
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -0,0 +1,99 @@
+"""
+Indexación de los hashtags de los posts
+
+Una sola rutina mantiene PostHashtag y Hashtag.posts_count: compara los
+hashtags que ya tenía el post con los de su contenido actual, crea en
+bloque los Hashtag que falten, inserta en bloque los PostHashtag nuevos,
+borra los que sobran y aplica los cambios de posts_count en un único
+UPDATE. El número de consultas no depende de cuántos hashtags tenga el
+post.
+
+Cada cambio de posts_count renueva el sello de versión del hashtag
+(hashtag_scope), que forma parte del ETag del detalle de los posts que lo
+usan.
+"""
+import re
+from django.db.models import Case, F, When
+from django.db.models.functions import Greatest
+
+from social_network_backend.etags import version_stamps
+from .models import Hashtag, PostHashtag
+from .trending import hashtag_trends
+
+HASHTAG_PATTERN = re.compile(r'#(\w+)')
+
+
+def hashtag_scope(name):
+    """Ámbito del sello de versión del contador de un hashtag (ETag)"""
+    return f'posts:hashtag:{name}'
+
+
+def extract_hashtags(text):
+    """Hashtags del texto en minúsculas, sin repetir y en orden de aparición"""
+    return list(dict.fromkeys(
+        tag.lower() for tag in HASHTAG_PATTERN.findall(text or '')))
+
+
+class HashtagIndexService:
+    """Servicio que sincroniza los hashtags de un post con su contenido"""
+
+    def index(self, post, created=False):
+        """
+        Sincronizar los hashtags del post con su contenido.
+
+        Devuelve los conjuntos (añadidos, eliminados).
+        """
+        new = set(extract_hashtags(post.content))
+        old = set() if created else set(
+            PostHashtag.objects.filter(post=post).values_list(
+                'hashtag__name', flat=True))
+
+        added, removed = new - old, old - new
+        if not added and not removed:
+            return added, removed
+
+        if added:
+            Hashtag.objects.bulk_create(
+                [Hashtag(name=name) for name in added], ignore_conflicts=True)
+            hashtag_ids = Hashtag.objects.filter(
+                name__in=added).values_list('id', flat=True)
+            PostHashtag.objects.bulk_create([
+                PostHashtag(post=post, hashtag_id=hashtag_id)
+                for hashtag_id in hashtag_ids
+            ], ignore_conflicts=True)
+
+        if removed:
+            PostHashtag.objects.filter(
+                post=post, hashtag__name__in=removed).delete()
+
+        self._apply_deltas(added, removed)
+        hashtag_trends.record(added, 1)
+        hashtag_trends.record(removed, -1, post.created_at)
+        return added, removed
+
+    def unindex(self, post):
+        """
+        Descontar los hashtags de un post que se va a borrar.
+
+        Las filas de PostHashtag las elimina el borrado en cascada.
+        """
+        names = set(PostHashtag.objects.filter(post=post).values_list(
+            'hashtag__name', flat=True))
+        if names:
+            self._apply_deltas(set(), names)
+            hashtag_trends.record(names, -1, post.created_at)
+        return names
+
+    def _apply_deltas(self, added, removed):
+        """Sumar o restar un post a cada hashtag con un único UPDATE"""
+        Hashtag.objects.filter(name__in=added | removed).update(
+            posts_count=Case(
+                When(name__in=added, then=F('posts_count') + 1),
+                default=Greatest(F('posts_count') - 1, 0),
+            )
+        )
+        version_stamps.bump(*(hashtag_scope(name) for name in added | removed))
+
+
+# Instancia global del servicio
+hashtag_index = HashtagIndexService()
@@ -0,0 +1,43 @@
+"""
+Comando de gestión para recalcular los hashtags en tendencia
+"""
+import time
+from django.core.management.base import BaseCommand
+
+from posts.trending import hashtag_trends
+
+
+class Command(BaseCommand):
+    """Comando para regenerar la tabla de hashtags en tendencia"""
+    help = ('Calcula la puntuación con decaimiento de la actividad reciente '
+            'de cada hashtag y guarda el ranking de tendencias')
+
+    def add_arguments(self, parser):
+        """Argumentos del comando"""
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Número de hashtags del ranking (por defecto TRENDING_HASHTAGS_LIMIT)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Repetir el cálculo cada N segundos (0 = una sola pasada)',
+        )
+
+    def handle(self, *args, **options):
+        """Ejecuta el cálculo una vez o en bucle"""
+        while True:
+            trending = hashtag_trends.compute(limit=options['limit'])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Tendencias actualizadas: {len(trending)} hashtags.'))
+            for item in trending[:10]:
+                self.stdout.write(
+                    f'  {item.rank}. #{item.hashtag.name} ({item.score:.2f})')
+
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_post_dominant_color_post_placeholder_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HashtagActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot', models.PositiveSmallIntegerField()),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Actividad de hashtag',
+                'verbose_name_plural': 'Actividad de hashtags',
+                'db_table': 'hashtag_activity',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingHashtag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveIntegerField(db_index=True)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Hashtag en tendencia',
+                'verbose_name_plural': 'Hashtags en tendencia',
+                'db_table': 'trending_hashtags',
+                'ordering': ['rank'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='hashtag',
+            index=models.Index(fields=['name'], name='hashtag_name_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddField(
+            model_name='trendinghashtag',
+            name='hashtag',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='posts.hashtag'),
+        ),
+        migrations.AddField(
+            model_name='hashtagactivity',
+            name='hashtag',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='posts.hashtag'),
+        ),
+        migrations.AddIndex(
+            model_name='hashtagactivity',
+            index=models.Index(fields=['bucket_start'], name='hashtag_act_bucket__a1d3dd_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='hashtagactivity',
+            unique_together={('hashtag', 'slot')},
+        ),
+    ]
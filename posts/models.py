@@ -2,7 +2,6 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 import uuid
-import re
 from utils import post_image_path, post_multiple_images_path, FileUploadHandler
 
 User = get_user_model()
@@ -17,6 +16,11 @@ class Post(models.Model):
         User, on_delete=models.CASCADE, related_name='posts')
     content = models.TextField(max_length=2000)
     image = models.ImageField(upload_to=post_image_path, blank=True, null=True)
+    # Manifiesto de variantes responsivas de la imagen
+    image_variants = models.JSONField(default=dict, blank=True)
+    # Placeholder inline (data URI) y color dominante calculados al subir
+    placeholder = models.TextField(blank=True)
+    dominant_color = models.CharField(max_length=7, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -47,35 +51,40 @@ class Post(models.Model):
         """Obtiene la URL completa de la imagen usando el FileUploadHandler"""
         return FileUploadHandler.get_file_url(self.image)
 
-    def get_image_url(self):
-        """Método alternativo para compatibilidad"""
-        return self.image_url
+    def get_image_url(self, size=None):
+        """Obtiene la URL de la imagen o de la variante del tamaño indicado"""
+        if size is None:
+            return self.image_url
+        return FileUploadHandler.get_variant_url(
+            self.image, self.image_variants, size)
+
+    @property
+    def image_variant_urls(self):
+        """URLs de las variantes de la imagen agrupadas por tamaño"""
+        return FileUploadHandler.get_variant_urls(
+            self.image, self.image_variants)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Contenido cargado, para reindexar hashtags solo si cambia
+        instance._loaded_content = instance.__dict__.get('content')
+        return instance
 
     def extract_hashtags(self):
         """Extrae hashtags del contenido del post"""
-        hashtag_pattern = r'#(\w+)'
-        hashtags = re.findall(hashtag_pattern, self.content)
-        return [tag.lower() for tag in hashtags]
+        from .hashtags import extract_hashtags
+        return extract_hashtags(self.content)
 
     def save(self, *args, **kwargs):
-        """Override del save para extraer hashtags automáticamente"""
+        """Override del save para indexar los hashtags automáticamente"""
+        adding = self._state.adding
         super().save(*args, **kwargs)
 
-        # Extraer y crear hashtags solo si no existen
-        hashtags = self.extract_hashtags()
-        for hashtag_name in hashtags:
-            hashtag, created = Hashtag.objects.get_or_create(name=hashtag_name)
-            # Usar get_or_create para evitar duplicados
-            post_hashtag, created = PostHashtag.objects.get_or_create(
-                post=self,
-                hashtag=hashtag
-            )
-
-            # Actualizar contador solo si es necesario
-            current_count = hashtag.posts.count()
-            if hashtag.posts_count != current_count:
-                hashtag.posts_count = current_count
-                hashtag.save()
+        if adding or self.content != getattr(self, '_loaded_content', None):
+            from .hashtags import hashtag_index
+            hashtag_index.index(self, created=adding)
+            self._loaded_content = self.content
 
     def delete_image(self):
         """Elimina la imagen del almacenamiento"""
@@ -93,6 +102,10 @@ class PostImage(models.Model):
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to=post_multiple_images_path)
+    image_variants = models.JSONField(default=dict, blank=True)
+    # Placeholder inline (data URI) y color dominante calculados al subir
+    placeholder = models.TextField(blank=True)
+    dominant_color = models.CharField(max_length=7, blank=True)
     alt_text = models.CharField(max_length=200, blank=True, null=True)
     order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(default=timezone.now)
@@ -111,9 +124,18 @@ class PostImage(models.Model):
         """Obtiene la URL completa de la imagen usando el FileUploadHandler"""
         return FileUploadHandler.get_file_url(self.image)
 
-    def get_image_url(self):
-        """Método alternativo para compatibilidad"""
-        return self.image_url
+    def get_image_url(self, size=None):
+        """Obtiene la URL de la imagen o de la variante del tamaño indicado"""
+        if size is None:
+            return self.image_url
+        return FileUploadHandler.get_variant_url(
+            self.image, self.image_variants, size)
+
+    @property
+    def image_variant_urls(self):
+        """URLs de las variantes de la imagen agrupadas por tamaño"""
+        return FileUploadHandler.get_variant_urls(
+            self.image, self.image_variants)
 
     def delete_image(self):
         """Elimina la imagen del almacenamiento"""
@@ -136,6 +158,11 @@ class Hashtag(models.Model):
         verbose_name = 'Hashtag'
         verbose_name_plural = 'Hashtags'
         ordering = ['-posts_count', 'name']
+        indexes = [
+            # Autocompletado por prefijo (LIKE 'abc%' en PostgreSQL)
+            models.Index(fields=['name'], name='hashtag_name_prefix_idx',
+                         opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return f"#{self.name}"
@@ -156,3 +183,53 @@ class PostHashtag(models.Model):
         unique_together = ['post', 'hashtag']
         verbose_name = 'Post Hashtag'
         verbose_name_plural = 'Posts Hashtags'
+
+
+class HashtagActivity(models.Model):
+    """
+    Buffer circular de usos por hora de cada hashtag
+
+    Cada hashtag tiene como mucho TRENDING_WINDOW_HOURS filas, una por
+    posición (slot = hora % ventana). Al escribir en un slot cuya hora ya
+    pasó, el contador se reinicia, así que la tabla no crece con el tiempo.
+    """
+    hashtag = models.ForeignKey(
+        Hashtag, on_delete=models.CASCADE, related_name='activity')
+    slot = models.PositiveSmallIntegerField()
+    bucket_start = models.DateTimeField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'hashtag_activity'
+        unique_together = ['hashtag', 'slot']
+        verbose_name = 'Actividad de hashtag'
+        verbose_name_plural = 'Actividad de hashtags'
+        indexes = [
+            models.Index(fields=['bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"#{self.hashtag.name} {self.bucket_start:%Y-%m-%d %H}h: {self.count}"
+
+
+class TrendingHashtag(models.Model):
+    """
+    Ranking precalculado de hashtags en tendencia
+
+    Lo regenera periódicamente el comando compute_trending_hashtags a partir
+    de HashtagActivity con decaimiento exponencial.
+    """
+    hashtag = models.OneToOneField(
+        Hashtag, on_delete=models.CASCADE, related_name='trending')
+    score = models.FloatField()
+    rank = models.PositiveIntegerField(db_index=True)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'trending_hashtags'
+        verbose_name = 'Hashtag en tendencia'
+        verbose_name_plural = 'Hashtags en tendencia'
+        ordering = ['rank']
+
+    def __str__(self):
+        return f"{self.rank}. #{self.hashtag.name} ({self.score:.2f})"
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import Post, PostImage, Hashtag, PostHashtag
-import re
+from .models import Post, PostImage, Hashtag
+from uploads.media_urls import MediaURLListSerializer
+from utils import AVATAR_THUMBNAIL_SIZE, FEED_IMAGE_SIZE
 
 User = get_user_model()
 
@@ -11,13 +12,18 @@ class PostImageSerializer(serializers.ModelSerializer):
     Serializer para las imágenes de posts
     """
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.ReadOnlyField(source='image_variant_urls')
 
     class Meta:
         model = PostImage
-        fields = ['id', 'image', 'image_url', 'alt_text', 'order']
+        list_serializer_class = MediaURLListSerializer
+        media_fields = ['image', 'image_variants']
+        fields = ['id', 'image', 'image_url', 'image_variants',
+                  'placeholder', 'dominant_color', 'alt_text', 'order']
+        read_only_fields = ['placeholder', 'dominant_color']
 
     def get_image_url(self, obj):
-        return obj.get_image_url()
+        return obj.get_image_url(FEED_IMAGE_SIZE)
 
 
 class HashtagSerializer(serializers.ModelSerializer):
@@ -29,6 +35,18 @@ class HashtagSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'posts_count']
 
 
+class TrendingHashtagSerializer(HashtagSerializer):
+    """
+    Serializer para hashtags en tendencia con su puntuación (None si el
+    ranking no está al día)
+    """
+    score = serializers.FloatField(
+        source='trending_score', read_only=True, allow_null=True)
+
+    class Meta(HashtagSerializer.Meta):
+        fields = HashtagSerializer.Meta.fields + ['score']
+
+
 class PostAuthorSerializer(serializers.ModelSerializer):
     """
     Serializer simplificado para el autor de un post
@@ -44,7 +62,7 @@ class PostAuthorSerializer(serializers.ModelSerializer):
         ]
 
     def get_avatar_url(self, obj):
-        return obj.get_avatar_url()
+        return obj.get_avatar_url(AVATAR_THUMBNAIL_SIZE)
 
 
 class PostCreateSerializer(serializers.ModelSerializer):
@@ -74,15 +92,12 @@ class PostCreateSerializer(serializers.ModelSerializer):
         images_data = validated_data.pop('images', [])
         request = self.context.get('request')
 
-        # Crear el post
+        # Crear el post (Post.save indexa los hashtags)
         post = Post.objects.create(
             author=request.user,
             **validated_data
         )
 
-        # Procesar hashtags
-        self._process_hashtags(post)
-
         # Crear imágenes adicionales
         for i, image_data in enumerate(images_data):
             PostImage.objects.create(
@@ -97,23 +112,6 @@ class PostCreateSerializer(serializers.ModelSerializer):
 
         return post
 
-    def _process_hashtags(self, post):
-        """
-        Extraer y procesar hashtags del contenido
-        """
-        hashtag_pattern = r'#(\w+)'
-        hashtags = re.findall(hashtag_pattern, post.content.lower())
-
-        for hashtag_name in set(hashtags):  # Usar set para evitar duplicados
-            hashtag, created = Hashtag.objects.get_or_create(name=hashtag_name)
-            # Usar get_or_create para evitar duplicados
-            PostHashtag.objects.get_or_create(post=post, hashtag=hashtag)
-
-            # Actualizar contador de posts del hashtag
-            current_count = hashtag.posts.count()
-            if hashtag.posts_count != current_count:
-                hashtag.posts_count = current_count
-                hashtag.save()
 
 
 class PostSerializer(serializers.ModelSerializer):
@@ -124,20 +122,25 @@ class PostSerializer(serializers.ModelSerializer):
     images = PostImageSerializer(many=True, read_only=True)
     hashtags = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.ReadOnlyField(source='image_variant_urls')
     is_liked = serializers.SerializerMethodField()
     time_since_posted = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
+        list_serializer_class = MediaURLListSerializer
+        media_fields = ['image', 'image_variants',
+                        'author.avatar', 'author.avatar_variants']
         fields = [
-            'id', 'author', 'content', 'image', 'image_url', 'images',
+            'id', 'author', 'content', 'image', 'image_url',
+            'image_variants', 'images',
             'hashtags', 'likes_count', 'comments_count', 'shares_count',
             'is_public', 'allow_comments', 'is_liked', 'created_at',
             'updated_at', 'time_since_posted'
         ]
 
     def get_image_url(self, obj):
-        return obj.get_image_url()
+        return obj.get_image_url(FEED_IMAGE_SIZE)
 
     def get_hashtags(self, obj):
         hashtags = Hashtag.objects.filter(posts__post=obj)
@@ -186,36 +189,6 @@ class PostUpdateSerializer(serializers.ModelSerializer):
                 "El contenido no puede estar vacío.")
         return value
 
-    def update(self, instance, validated_data):
-        # Actualizar hashtags si el contenido cambió
-        old_content = instance.content
-        instance = super().update(instance, validated_data)
-
-        if 'content' in validated_data and old_content != instance.content:
-            # Eliminar hashtags anteriores
-            PostHashtag.objects.filter(post=instance).delete()
-            # Procesar nuevos hashtags
-            self._process_hashtags(instance)
-
-        return instance
-
-    def _process_hashtags(self, post):
-        """
-        Extraer y procesar hashtags del contenido
-        """
-        hashtag_pattern = r'#(\w+)'
-        hashtags = re.findall(hashtag_pattern, post.content.lower())
-
-        for hashtag_name in set(hashtags):
-            hashtag, created = Hashtag.objects.get_or_create(name=hashtag_name)
-            # Usar get_or_create para evitar duplicados
-            PostHashtag.objects.get_or_create(post=post, hashtag=hashtag)
-
-            # Actualizar contador de posts del hashtag
-            current_count = hashtag.posts.count()
-            if hashtag.posts_count != current_count:
-                hashtag.posts_count = current_count
-                hashtag.save()
 
 
 class PostListSerializer(serializers.ModelSerializer):
@@ -224,18 +197,23 @@ class PostListSerializer(serializers.ModelSerializer):
     """
     author = PostAuthorSerializer(read_only=True)
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.ReadOnlyField(source='image_variant_urls')
     is_liked = serializers.SerializerMethodField()
     time_since_posted = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
+        list_serializer_class = MediaURLListSerializer
+        media_fields = ['image', 'image_variants',
+                        'author.avatar', 'author.avatar_variants']
         fields = [
-            'id', 'author', 'content', 'image_url', 'likes_count',
+            'id', 'author', 'content', 'image_url', 'image_variants',
+            'placeholder', 'dominant_color', 'likes_count',
             'comments_count', 'is_liked', 'created_at', 'time_since_posted'
         ]
 
     def get_image_url(self, obj):
-        return obj.get_image_url()
+        return obj.get_image_url(FEED_IMAGE_SIZE)
 
     def get_is_liked(self, obj):
         request = self.context.get('request')
@@ -0,0 +1,41 @@
+"""
+Señales para mantener los contadores y la actividad de hashtags, la
+caché de posts y la versión de sus imágenes adicionales
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from social_network_backend.etags import version_stamps
+from social_network_backend.object_cache import object_cache
+from uploads.variants import media_fields_updated
+from .hashtags import hashtag_index
+from .models import PostImage
+
+object_cache.register('posts.Post')
+
+
+def post_images_scope(post_id):
+    """Ámbito del sello de versión de las imágenes de un post (ETag)"""
+    return f'posts:images:{post_id}'
+
+
+@receiver(pre_delete, sender='posts.Post')
+def unindex_post_hashtags(sender, instance, **kwargs):
+    """Descontar los hashtags del post antes de borrarlo en cascada"""
+    hashtag_index.unindex(instance)
+
+
+@receiver(post_save, sender='posts.PostImage')
+@receiver(post_delete, sender='posts.PostImage')
+def bump_post_images_version(sender, instance, **kwargs):
+    """Las imágenes adicionales no cambian updated_at del post"""
+    version_stamps.bump(post_images_scope(instance.post_id))
+
+
+@receiver(media_fields_updated, sender=PostImage)
+def bump_post_images_variants_version(sender, pk, **kwargs):
+    """Renovar la versión al registrar las variantes de una imagen"""
+    post_id = PostImage.objects.filter(pk=pk).values_list(
+        'post_id', flat=True).first()
+    if post_id is not None:
+        version_stamps.bump(post_images_scope(post_id))
@@ -1,3 +1,287 @@
-from django.test import TestCase
+"""
+Tests para la indexación de hashtags y los hashtags en tendencia
+"""
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from .models import Post, Hashtag, PostHashtag, HashtagActivity, TrendingHashtag
+from .trending import hashtag_trends
+
+User = get_user_model()
+
+
+class HashtagIndexTest(APITestCase):
+    """Tests para la indexación de hashtags en una sola pasada"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='tagger',
+            email='tagger@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def counts(self):
+        return dict(Hashtag.objects.values_list('name', 'posts_count'))
+
+    def test_query_count_does_not_grow_with_tags(self):
+        """Test crear un post con 10 hashtags usa un número fijo de consultas"""
+        content = ' '.join(f'#tag{i}' for i in range(10))
+
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(author=self.user, content=content)
+
+        self.assertLessEqual(len(queries), 10)
+        self.assertEqual(PostHashtag.objects.count(), 10)
+        self.assertEqual(set(self.counts().values()), {1})
+
+    def test_edit_diffs_hashtags(self):
+        """Test editar el contenido solo toca los hashtags que cambian"""
+        post = Post.objects.create(author=self.user, content='#uno #dos')
+        Post.objects.create(author=self.user, content='#dos')
+
+        response = self.client.patch(
+            reverse('posts:post_update', kwargs={'pk': post.id}),
+            {'content': '#dos #tres'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counts(), {'uno': 0, 'dos': 2, 'tres': 1})
+        self.assertEqual(
+            set(post.post_hashtags.values_list('hashtag__name', flat=True)),
+            {'dos', 'tres'})
+
+    def test_unchanged_content_skips_index(self):
+        """Test guardar sin cambiar el contenido no consulta hashtags"""
+        post = Post.objects.create(author=self.user, content='#fijo')
+        post = Post.objects.get(pk=post.pk)
+        post.is_public = False
+
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+
+        self.assertEqual(len(queries), 1)
+
+    def test_delete_decrements_counts(self):
+        """Test borrar un post descuenta sus hashtags"""
+        post = Post.objects.create(author=self.user, content='#borrar #Borrar')
+        post.delete()
+
+        self.assertEqual(self.counts(), {'borrar': 0})
+
+
+@override_settings(TRENDING_WINDOW_HOURS=48, TRENDING_HALF_LIFE_HOURS=6)
+class HashtagTrendingTest(APITestCase):
+    """Tests para el motor de tendencias y el autocompletado"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='trends',
+            email='trends@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_post_creation_records_activity(self):
+        """Test crear un post suma en el bucket de la hora actual"""
+        Post.objects.create(author=self.user, content='Hola #django #python')
+        Post.objects.create(author=self.user, content='Otra vez #django')
+
+        counts = dict(HashtagActivity.objects.values_list(
+            'hashtag__name', 'count'))
+        self.assertEqual(counts, {'django': 2, 'python': 1})
+
+    def test_post_deletion_discounts_activity(self):
+        """Test borrar un post resta su uso"""
+        post = Post.objects.create(author=self.user, content='#efimero')
+        post.delete()
+
+        self.assertEqual(
+            HashtagActivity.objects.get(hashtag__name='efimero').count, 0)
+
+    def test_ring_slot_is_reused(self):
+        """Test un slot de una hora fuera de la ventana se reinicia"""
+        hashtag = Hashtag.objects.create(name='ciclo')
+        now = timezone.now()
+        slot, bucket_start = hashtag_trends.bucket_for(now)
+        HashtagActivity.objects.create(
+            hashtag=hashtag, slot=slot, count=3,
+            bucket_start=bucket_start - timedelta(hours=48))
+
+        hashtag_trends.record(['ciclo'], 1, now)
+
+        activity = HashtagActivity.objects.get(hashtag__name='ciclo')
+        self.assertEqual(activity.count, 1)
+        self.assertEqual(activity.bucket_start, bucket_start)
+        self.assertEqual(HashtagActivity.objects.count(), 1)
+
+    def test_compute_applies_decay(self):
+        """Test la actividad reciente pesa más que la antigua"""
+        Hashtag.objects.bulk_create(
+            [Hashtag(name='antiguo'), Hashtag(name='reciente')])
+        now = timezone.now()
+        hashtag_trends.record(['antiguo'], 4, now - timedelta(hours=12))
+        hashtag_trends.record(['reciente'], 2, now)
+
+        trending = hashtag_trends.compute(now)
+
+        self.assertEqual([item.hashtag.name for item in trending],
+                         ['reciente', 'antiguo'])
+        self.assertAlmostEqual(trending[1].score, 1.0)
+
+        response = self.client.get(reverse('posts:trending_hashtags'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['name'] for item in response.data['results']],
+            ['reciente', 'antiguo'])
+        self.assertEqual(TrendingHashtag.objects.count(), 2)
+
+    def test_trending_falls_back_to_most_used(self):
+        """Test sin un ranking reciente se sirven los hashtags más usados"""
+        Hashtag.objects.bulk_create([
+            Hashtag(name='popular', posts_count=9),
+            Hashtag(name='nicho', posts_count=2),
+            Hashtag(name='vacio', posts_count=0),
+        ])
+        url = reverse('posts:trending_hashtags')
+
+        # Nunca calculado
+        response = self.client.get(url)
+        self.assertEqual(
+            [item['name'] for item in response.data['results']],
+            ['popular', 'nicho'])
+        self.assertIsNone(response.data['results'][0]['score'])
+
+        # Calculado hace demasiado tiempo
+        hashtag_trends.record(['nicho'], 1)
+        hashtag_trends.compute(timezone.now() - timedelta(hours=3))
+        response = self.client.get(url)
+        self.assertEqual(response.data['results'][0]['name'], 'popular')
+
+        hashtag_trends.compute()
+        response = self.client.get(url)
+        self.assertEqual(
+            [item['name'] for item in response.data['results']], ['nicho'])
+        self.assertIsNotNone(response.data['results'][0]['score'])
+
+    def test_autocomplete_by_prefix(self):
+        """Test el autocompletado pone el exacto primero y luego los más usados"""
+        Hashtag.objects.bulk_create([
+            Hashtag(name='dev', posts_count=1),
+            Hashtag(name='devops', posts_count=30),
+            Hashtag(name='develop', posts_count=10),
+            Hashtag(name='design', posts_count=99),
+        ])
+
+        response = self.client.get(
+            reverse('posts:hashtag_autocomplete'), {'q': '#Dev'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['name'] for item in response.data],
+                         ['dev', 'devops', 'develop'])
+
+
+@override_settings(SHARED_CACHE=True)
+class PostConditionalGetTest(APITestCase):
+    """Tests para los ETags del detalle y las estadísticas de un post"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='lector', email='lector@example.com', password='testpass123')
+        self.author = User.objects.create_user(
+            username='autor', email='autor@example.com', password='testpass123')
+        self.post = Post.objects.create(author=self.author, content='Hola #etag')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('posts:post_detail', kwargs={'pk': self.post.pk})
+
+    def test_unchanged_post_not_modified(self):
+        """Test con el mismo ETag se responde 304 sin serializar"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.content)
+        # El like y los hashtags: post y autor vienen de la caché
+        self.assertEqual(len(queries.captured_queries), 2)
+
+    def test_changes_produce_new_etag(self):
+        """Test editar el post o darle like cambia el ETag"""
+        from social.models import Like
+
+        etag = self.client.get(self.url)['ETag']
+
+        Like.objects.create(user=self.user, post=self.post, like_type='post')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_liked'])
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        self.post.content = 'Editado'
+        self.post.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['content'], 'Editado')
+
+    def test_hashtag_count_changes_etag(self):
+        """Test otro post con el mismo hashtag cambia posts_count y el ETag"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['hashtags'][0]['posts_count'], 1)
+        etag = response['ETag']
+
+        Post.objects.create(author=self.user, content='Yo también #etag')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['hashtags'][0]['posts_count'], 2)
+        etag = response['ETag']
+
+        # Un hashtag que el post no usa no invalida su ETag
+        Post.objects.create(author=self.user, content='Otro tema #ajeno')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_no_etag_without_shared_cache(self):
+        """Test sin caché compartida el detalle no usa sellos ni ETag"""
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('ETag', response)
+
+    def test_stats_not_modified_until_counters_change(self):
+        """Test las estadísticas responden 304 mientras no cambian los contadores"""
+        url = reverse('posts:post_stats', kwargs={'pk': self.post.pk})
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.post.shares_count = 3
+        self.post.save(update_fields=['shares_count'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['shares_count'], 3)
+
+    def test_private_stats_forbidden(self):
+        """Test las estadísticas de un post privado ajeno siguen dando 403"""
+        self.post.is_public = False
+        self.post.save()
+
+        response = self.client.get(
+            reverse('posts:post_stats', kwargs={'pk': self.post.pk}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertNotIn('ETag', response)
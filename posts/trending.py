@@ -0,0 +1,163 @@
+"""
+Motor de hashtags en tendencia
+
+Los usos de cada hashtag se cuentan en buckets por hora guardados como un
+buffer circular (HashtagActivity): crear un post suma en el bucket de la
+hora actual y borrarlo resta en el bucket de su hora de creación si sigue
+dentro de la ventana.
+
+Periódicamente compute() suma los buckets de la ventana con decaimiento
+exponencial (un uso pierde la mitad de su peso cada
+TRENDING_HALF_LIFE_HOURS horas) y guarda los mejores en TrendingHashtag,
+que es lo que sirve la API. Si el ranking no existe o tiene más de
+TRENDING_MAX_AGE_HOURS horas (nadie ejecuta compute_trending_hashtags) la
+API sirve los hashtags con más posts.
+"""
+import heapq
+import logging
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.utils import timezone
+
+from social_network_backend.lookups import prefix_filter
+from social_network_backend.metrics import metrics
+from .models import Hashtag, HashtagActivity, TrendingHashtag
+
+logger = logging.getLogger(__name__)
+
+
+class HashtagTrendService:
+    """Servicio que registra actividad y calcula las tendencias"""
+
+    @property
+    def window_hours(self):
+        return settings.TRENDING_WINDOW_HOURS
+
+    def bucket_for(self, moment):
+        """Devolver (slot, inicio de la hora) para un instante"""
+        bucket_start = moment.replace(minute=0, second=0, microsecond=0)
+        hours = int(bucket_start.timestamp() // 3600)
+        return hours % self.window_hours, bucket_start
+
+    def window_start(self, now=None):
+        _, current = self.bucket_for(now or timezone.now())
+        return current - timedelta(hours=self.window_hours - 1)
+
+    def record(self, names, delta, moment=None):
+        """
+        Sumar delta al bucket de la hora de moment para cada hashtag.
+
+        El número de consultas no depende de cuántos hashtags haya: se crean
+        los slots que falten y un único UPDATE suma en el bucket actual o
+        reinicia los slots que guardaban horas anteriores.
+        """
+        names = set(names)
+        if not names or not delta:
+            return
+
+        moment = moment or timezone.now()
+        slot, bucket_start = self.bucket_for(moment)
+        if bucket_start < self.window_start():
+            # Fuera de la ventana: el bucket ya fue reutilizado
+            return
+
+        hashtag_ids = Hashtag.objects.filter(name__in=names).values('id')
+        activity = HashtagActivity.objects.filter(
+            hashtag_id__in=hashtag_ids, slot=slot)
+
+        if delta < 0:
+            activity.filter(
+                bucket_start=bucket_start, count__gte=-delta
+            ).update(count=F('count') + delta)
+            return
+
+        HashtagActivity.objects.bulk_create([
+            HashtagActivity(hashtag_id=hashtag_id, slot=slot,
+                            bucket_start=bucket_start, count=0)
+            for hashtag_id in hashtag_ids.values_list('id', flat=True)
+        ], ignore_conflicts=True)
+
+        activity.filter(bucket_start__lte=bucket_start).update(
+            count=Case(
+                When(bucket_start=bucket_start, then=F('count') + delta),
+                default=Value(delta),
+                output_field=IntegerField(),
+            ),
+            bucket_start=bucket_start,
+        )
+
+    def compute(self, now=None, limit=None):
+        """
+        Recalcular la tabla de tendencias y devolver los registros creados
+        """
+        started = time.monotonic()
+        now = now or timezone.now()
+        limit = limit or settings.TRENDING_HASHTAGS_LIMIT
+        _, current = self.bucket_for(now)
+        half_life = settings.TRENDING_HALF_LIFE_HOURS
+
+        scores = {}
+        rows = HashtagActivity.objects.filter(
+            bucket_start__gte=self.window_start(now),
+            bucket_start__lte=current,
+            count__gt=0
+        ).values_list('hashtag_id', 'bucket_start', 'count')
+        for hashtag_id, bucket_start, count in rows.iterator():
+            age_hours = (current - bucket_start).total_seconds() / 3600
+            scores[hashtag_id] = scores.get(hashtag_id, 0.0) + \
+                count * 0.5 ** (age_hours / half_life)
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        trending = [
+            TrendingHashtag(hashtag_id=hashtag_id, score=score,
+                            rank=rank, computed_at=now)
+            for rank, (hashtag_id, score) in enumerate(top, start=1)
+        ]
+        with transaction.atomic():
+            TrendingHashtag.objects.all().delete()
+            TrendingHashtag.objects.bulk_create(trending)
+
+        metrics.observe('trending_hashtags.compute_seconds',
+                        time.monotonic() - started)
+        return trending
+
+    def ranking(self, now=None):
+        """
+        Hashtags en tendencia con su puntuación (trending_score).
+
+        Sin un ranking reciente se devuelven los más usados, con
+        trending_score None.
+        """
+        now = now or timezone.now()
+        computed_at = TrendingHashtag.objects.values_list(
+            'computed_at', flat=True).first()
+        max_age = timedelta(hours=settings.TRENDING_MAX_AGE_HOURS)
+        if computed_at is not None and now - computed_at <= max_age:
+            return Hashtag.objects.filter(trending__isnull=False).annotate(
+                trending_score=F('trending__score')
+            ).order_by('trending__rank')
+
+        metrics.increment('trending_hashtags.fallback')
+        return Hashtag.objects.filter(posts_count__gt=0).annotate(
+            trending_score=Value(None, output_field=FloatField())
+        ).order_by('-posts_count')[:settings.TRENDING_HASHTAGS_LIMIT]
+
+    def autocomplete(self, prefix, limit=10):
+        """Hashtags que empiezan por prefix, el exacto primero"""
+        prefix = prefix.strip().lstrip('#').lower()
+        if not prefix:
+            return Hashtag.objects.none()
+
+        return Hashtag.objects.filter(
+            posts_count__gt=0, **prefix_filter(prefix, 'name')
+        ).annotate(
+            exact=Case(When(name=prefix, then=Value(0)), default=Value(1),
+                       output_field=IntegerField())
+        ).order_by('exact', '-posts_count', 'name')[:limit]
+
+
+# Instancia global del servicio
+hashtag_trends = HashtagTrendService()
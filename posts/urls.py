@@ -22,4 +22,6 @@ urlpatterns = [
          views.HashtagPostsView.as_view(), name='hashtag_posts'),
     path('hashtags/trending/', views.TrendingHashtagsView.as_view(),
          name='trending_hashtags'),
+    path('hashtags/autocomplete/', views.HashtagAutocompleteView.as_view(),
+         name='hashtag_autocomplete'),
 ]
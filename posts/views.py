@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth import get_user_model
 from rest_framework import generics, status, permissions
@@ -7,12 +8,20 @@ from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Q
+from django.http import Http404
 
 from .models import Post, Hashtag, PostHashtag
 from .serializers import (
     PostCreateSerializer, PostSerializer, PostUpdateSerializer,
-    PostListSerializer, HashtagSerializer
+    PostListSerializer, HashtagSerializer, TrendingHashtagSerializer
 )
+from .hashtags import hashtag_scope
+from .signals import post_images_scope
+from .trending import hashtag_trends
+from social_network_backend.etags import (
+    ConditionalRetrieveMixin, conditional_response, make_etag, version_stamps
+)
+from social_network_backend.object_cache import object_cache
 
 User = get_user_model()
 
@@ -36,9 +45,9 @@ class PostCreateView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class PostDetailView(generics.RetrieveAPIView):
+class PostDetailView(ConditionalRetrieveMixin, generics.RetrieveAPIView):
     """
-    Vista para obtener un post específico
+    Vista para obtener un post específico (con ETag)
     """
     queryset = Post.objects.all()
     serializer_class = PostSerializer
@@ -52,6 +61,43 @@ class PostDetailView(generics.RetrieveAPIView):
             Q(is_public=True) | Q(author=user)
         )
 
+    def get_object(self):
+        """Leer el post y su autor desde la caché de objetos"""
+        post = object_cache.get(Post, self.kwargs['pk'])
+        if post is None or not (post.is_public or post.author_id == self.request.user.pk):
+            raise Http404
+        author = object_cache.get(User, post.author_id)
+        if author is not None:
+            post.author = author
+        self.check_object_permissions(self.request, post)
+        return post
+
+    def get_etag(self, post):
+        """
+        Versión del post, sus imágenes, sus hashtags (posts_count) y su
+        autor y el like del usuario
+        """
+        from social.models import Like
+
+        if not version_stamps.enabled:
+            return None
+        author = post.author
+        is_liked = Like.objects.filter(
+            user=self.request.user, post=post, like_type='post'
+        ).exists()
+        hashtags = sorted(PostHashtag.objects.filter(post=post).values_list(
+            'hashtag__name', flat=True))
+        return make_etag(
+            'post', post.pk, post.updated_at, post.likes_count,
+            post.comments_count, post.shares_count, post.image_variants,
+            version_stamps.get(post_images_scope(post.pk)),
+            [(name, version_stamps.get(hashtag_scope(name)))
+             for name in hashtags],
+            author.updated_at, author.avatar_variants, is_liked,
+            # Texto relativo ("hace 5 minutos") que cambia con el tiempo
+            PostSerializer().get_time_since_posted(post),
+        )
+
 
 class PostUpdateView(generics.UpdateAPIView):
     """
@@ -149,6 +195,8 @@ class FeedView(generics.ListAPIView):
     """
     serializer_class = PostListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Lecturas desde réplicas (ver social_network_backend/replicas.py)
+    replica_read_actions = {'get'}
 
     def get_queryset(self):
         user = self.request.user
@@ -187,12 +235,28 @@ class HashtagPostsView(generics.ListAPIView):
 
 class TrendingHashtagsView(generics.ListAPIView):
     """
-    Vista para hashtags en tendencia
+    Vista para hashtags en tendencia (ranking precalculado por
+    compute_trending_hashtags, o los más usados si no está al día)
+    """
+    serializer_class = TrendingHashtagSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return hashtag_trends.ranking()
+
+
+class HashtagAutocompleteView(generics.ListAPIView):
+    """
+    Vista de autocompletado de hashtags por prefijo
     """
-    queryset = Hashtag.objects.filter(
-        posts_count__gt=0).order_by('-posts_count')[:20]
     serializer_class = HashtagSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return hashtag_trends.autocomplete(
+            self.request.query_params.get('q', ''),
+            settings.HASHTAG_AUTOCOMPLETE_LIMIT)
 
 
 @api_view(['GET'])
@@ -217,18 +281,22 @@ def post_stats_view(request, pk):
     """
     Vista para obtener estadísticas detalladas de un post
     """
-    post = get_object_or_404(Post, pk=pk)
+    post = object_cache.get(Post, pk)
+    if post is None:
+        raise Http404
 
     # Verificar permisos
-    if not post.is_public and post.author != request.user:
+    if not post.is_public and post.author_id != request.user.pk:
         return Response({
             'error': 'No tienes permisos para ver este post'
         }, status=status.HTTP_403_FORBIDDEN)
 
-    return Response({
+    etag = make_etag('post_stats', post.pk, post.updated_at, post.likes_count,
+                     post.comments_count, post.shares_count)
+    return conditional_response(request, etag, lambda: Response({
         'likes_count': post.likes_count,
         'comments_count': post.comments_count,
         'shares_count': post.shares_count,
         'created_at': post.created_at,
         'updated_at': post.updated_at,
-    })
+    }), view='post_stats_view')
@@ -39,7 +39,7 @@ else
 fi
 
 print_status "Instalando dependencias..."
-pip install -r requirements.txt
+pip install -r requirements-dev.txt
 
 print_status "Creando directorios de media..."
 mkdir -p media/avatars media/posts media/uploads
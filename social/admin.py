@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Follow, Like, Comment, Notification
+from .models import Follow, Like, Comment, Notification, Mention
 
 
 @admin.register(Follow)
@@ -149,3 +149,20 @@ class NotificationAdmin(admin.ModelAdmin):
             f'{updated} notificaciones marcadas como no leídas.'
         )
     mark_as_unread.short_description = "Marcar como no leídas"
+
+
+@admin.register(Mention)
+class MentionAdmin(admin.ModelAdmin):
+    """
+    Admin para el modelo Mention
+    """
+    list_display = ['mentioned_user', 'author', 'post', 'comment', 'created_at']
+    list_filter = ['created_at']
+    search_fields = ['mentioned_user__username', 'author__username']
+    readonly_fields = ['id', 'created_at']
+    raw_id_fields = ['post', 'comment', 'mentioned_user', 'author']
+    ordering = ['-created_at']
+
+    def has_add_permission(self, request):
+        # Las menciones se crean al publicar posts y comentarios
+        return False
@@ -0,0 +1,67 @@
+"""
+Resolución de menciones (@username) en posts y comentarios
+
+Los usernames mencionados se extraen sin repetir y con un máximo de
+MENTIONS_MAX_PER_CONTENT, se resuelven con una sola consulta username__in
+y se guardan en bloque como filas de Mention, que permiten consultar
+después dónde se ha mencionado a un usuario. Al editar el contenido se
+comparan con las filas existentes: se borran las menciones que ya no
+están y solo se crean (y notifican) las nuevas.
+"""
+import re
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .models import Comment, Mention
+
+MENTION_PATTERN = re.compile(r'@(\w+)')
+
+User = get_user_model()
+
+
+def extract_mentions(text, limit=None):
+    """Usernames mencionados sin repetir, en orden de aparición y con tope"""
+    limit = settings.MENTIONS_MAX_PER_CONTENT if limit is None else limit
+    usernames = dict.fromkeys(MENTION_PATTERN.findall(text or ''))
+    return list(usernames)[:limit]
+
+
+class MentionService:
+    """Servicio que resuelve y registra las menciones de un contenido"""
+
+    def record(self, content_object, author, created=False):
+        """
+        Sincronizar las menciones de un post o comentario con su contenido.
+
+        Devuelve los usuarios mencionados por primera vez que existen, sin
+        incluir al autor. Con created no se consultan las menciones previas.
+        """
+        usernames = extract_mentions(content_object.content)
+        users = list(User.objects.filter(
+            username__in=usernames, is_active=True).exclude(
+            pk=author.pk)) if usernames else []
+
+        if isinstance(content_object, Comment):
+            post_id, comment = content_object.post_id, content_object
+        else:
+            post_id, comment = content_object.pk, None
+        mentions = Mention.objects.filter(post_id=post_id, comment=comment)
+
+        existing = set() if created else set(
+            mentions.values_list('mentioned_user_id', flat=True))
+        removed = existing - {user.pk for user in users}
+        if removed:
+            mentions.filter(mentioned_user_id__in=removed).delete()
+
+        added = [user for user in users if user.pk not in existing]
+        if added:
+            Mention.objects.bulk_create([
+                Mention(post_id=post_id, comment=comment,
+                        mentioned_user=user, author=author)
+                for user in added
+            ], ignore_conflicts=True)
+        return added
+
+
+# Instancia global del servicio
+mention_service = MentionService()
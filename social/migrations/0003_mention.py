@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_hashtag_trending'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('social', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Mention',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions_made', to=settings.AUTH_USER_MODEL)),
+                ('comment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='social.comment')),
+                ('mentioned_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='posts.post')),
+            ],
+            options={
+                'verbose_name': 'Mención',
+                'verbose_name_plural': 'Menciones',
+                'db_table': 'mentions',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['mentioned_user', '-created_at'], name='mentions_mention_2a5326_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mention',
+            constraint=models.UniqueConstraint(condition=models.Q(('comment__isnull', True)), fields=('post', 'mentioned_user'), name='unique_post_mention'),
+        ),
+        migrations.AddConstraint(
+            model_name='mention',
+            constraint=models.UniqueConstraint(condition=models.Q(('comment__isnull', False)), fields=('comment', 'mentioned_user'), name='unique_comment_mention'),
+        ),
+    ]
@@ -209,9 +209,17 @@ class Comment(models.Model):
     def __str__(self):
         return f"Comentario de {self.author.username} en post de {self.post.author.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Contenido cargado, para sincronizar menciones solo si cambia
+        instance._loaded_content = instance.__dict__.get('content')
+        return instance
+
     def save(self, *args, **kwargs):
         is_new = self.pk is None
         super().save(*args, **kwargs)
+        self._loaded_content = self.content
 
         if is_new:
             # Actualizar contador de comentarios del post
@@ -294,3 +302,57 @@ class Notification(models.Model):
 
     def __str__(self):
         return f"Notificación para {self.recipient.username}: {self.message}"
+
+
+class Mention(models.Model):
+    """
+    Mención de un usuario (@username) en un post o en un comentario
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    post = models.ForeignKey(
+        'posts.Post',
+        on_delete=models.CASCADE,
+        related_name='mentions'
+    )
+    comment = models.ForeignKey(
+        Comment,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        null=True,
+        blank=True
+    )
+    mentioned_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions_made'
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'mentions'
+        verbose_name = 'Mención'
+        verbose_name_plural = 'Menciones'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['mentioned_user', '-created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'mentioned_user'],
+                condition=models.Q(comment__isnull=True),
+                name='unique_post_mention'
+            ),
+            models.UniqueConstraint(
+                fields=['comment', 'mentioned_user'],
+                condition=models.Q(comment__isnull=False),
+                name='unique_comment_mention'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.author.username} mencionó a {self.mentioned_user.username}"
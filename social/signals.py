@@ -0,0 +1,7 @@
+"""
+Señales de la app social
+"""
+from social_network_backend.object_cache import object_cache
+
+# Invalidar la caché de comentarios al guardarlos o borrarlos
+object_cache.register('social.Comment')
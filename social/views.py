@@ -7,9 +7,12 @@ from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.db.models import Q
+from django.http import Http404
 
 from .models import Follow, Like, Comment, Notification
 from posts.models import Post
+from social_network_backend.object_cache import object_cache
+from social_network_backend.replicas import replica_reads
 from .serializers import (
     FollowSerializer, CommentSerializer, CommentCreateSerializer,
     LikeSerializer, NotificationSerializer, FollowerSerializer,
@@ -91,6 +94,7 @@ def unfollow_user(request, username):
         }, status=status.HTTP_200_OK)
 
 
+@replica_reads
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def followers_list(request, username):
@@ -375,7 +379,9 @@ def comment_detail(request, comment_id):
     """
     Obtener detalles de un comentario específico
     """
-    comment = get_object_or_404(Comment, id=comment_id)
+    comment = object_cache.get(Comment, comment_id)
+    if comment is None:
+        raise Http404
     serializer = CommentSerializer(comment, context={'request': request})
 
     return Response(serializer.data)
@@ -6,6 +6,7 @@ from notifications.routing import websocket_urlpatterns as notifications_websock
 from chat.routing import websocket_urlpatterns as chat_websocket_urlpatterns
 import os
 from django.core.asgi import get_asgi_application
+from channels.layers import get_channel_layer
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 from channels.security.websocket import AllowedHostsOriginValidator
@@ -32,3 +33,8 @@ application = ProtocolTypeRouter({
         )
     ),
 })
+
+# Crear la capa de canales al arrancar: la comprobación de Redis (y el
+# cambio a CHANNEL_LAYER_FALLBACK) queda en el log antes de la primera
+# conexión
+get_channel_layer()
@@ -0,0 +1,49 @@
+"""
+Configuración de la caché a partir de CACHE_URL
+
+    locmem://[nombre]           memoria del proceso (por defecto)
+    file:///ruta/al/directorio  archivos en disco, compartida entre procesos
+    redis://host:6379/1         Redis o compatible (Valkey, KeyDB, ...)
+    dummy://                    sin caché
+
+locmem:// y dummy:// no se comparten entre procesos: lo que se invalida
+con señales (caché de objetos, sellos de ETag, usuario del JWT) solo se
+borra en el proceso que escribe. Ver is_shared_cache y SHARED_CACHE.
+"""
+from urllib.parse import urlparse
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+# Backends cuyo contenido no ven los demás procesos
+PROCESS_LOCAL_SCHEMES = ('locmem', 'dummy')
+
+
+def is_shared_cache(url):
+    """Si la caché de la URL es común a todos los procesos"""
+    return urlparse(url).scheme not in PROCESS_LOCAL_SCHEMES
+
+
+def cache_config(url, timeout=300, key_prefix=''):
+    """Construir la entrada de CACHES para una URL"""
+    parsed = urlparse(url)
+    if parsed.scheme not in BACKENDS:
+        raise ValueError(f"Backend de caché no soportado: {parsed.scheme!r}")
+
+    cache = {
+        'BACKEND': BACKENDS[parsed.scheme],
+        'TIMEOUT': timeout,
+        'KEY_PREFIX': key_prefix,
+    }
+    if parsed.scheme == 'locmem':
+        cache['LOCATION'] = parsed.netloc
+    elif parsed.scheme == 'file':
+        cache['LOCATION'] = parsed.path
+    elif parsed.scheme in ('redis', 'rediss'):
+        cache['LOCATION'] = url
+    return cache
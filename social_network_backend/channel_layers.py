@@ -0,0 +1,241 @@
+"""
+Capa de canales (Django Channels) a partir de CHANNEL_LAYER_URL
+
+    memory://                   memoria del proceso, acotada (un solo nodo)
+    redis://host:6379/0         channels_redis (conjuntos ordenados y Lua)
+    redis+pubsub://host:6379/0  channels_redis sobre PUBLISH/SUBSCRIBE
+    rediss:// y rediss+pubsub:// lo mismo con TLS
+
+Las capas Redis se construyen la primera vez que se pide la capa (al
+arrancar el servidor ASGI) y antes se comprueba el servidor con un PING
+de timeout corto. Si no responde y hay CHANNEL_LAYER_FALLBACK se usa esa
+capa y se registra un aviso; así un nodo sin Redis sigue repartiendo los
+eventos entre sus propios sockets en lugar de fallar en cada group_send.
+La capa elegida se mantiene mientras viva el proceso (no se vuelve a
+Redis cuando responde), por eso el respaldo solo está activo por defecto
+con DEBUG.
+
+Todas las capas miden la latencia de group_send
+(channels.group_send_seconds) y cuentan los mensajes que no llegan
+(channels.dropped_messages, con el motivo). La capa Redis con conjuntos
+ordenados descarta en el servidor los mensajes a canales llenos sin
+avisar, así que ahí solo se cuentan los envíos que fallan.
+"""
+import asyncio
+import functools
+import logging
+import time
+from urllib.parse import urlparse, urlunparse
+
+from channels.exceptions import ChannelFull
+from channels.layers import InMemoryChannelLayer
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+MEMORY_LAYER = 'social_network_backend.channel_layers.BoundedInMemoryChannelLayer'
+LAYER_FACTORY = 'social_network_backend.channel_layers.build_channel_layer'
+
+REDIS_SCHEMES = ('redis', 'rediss')
+PUBSUB_SUFFIX = '+pubsub'
+
+
+class LayerFull(ChannelFull):
+    """La capa en memoria alcanzó el máximo de canales"""
+
+
+class MeasuredGroupSendMixin:
+    """Mide group_send y cuenta los envíos que fallan"""
+
+    layer_label = ''
+
+    async def _group_send(self, group, message):
+        await super().group_send(group, message)
+
+    async def group_send(self, group, message):
+        started = time.monotonic()
+        try:
+            await self._group_send(group, message)
+        except Exception:
+            metrics.increment('channels.dropped_messages',
+                              layer=self.layer_label, reason='error')
+            raise
+        finally:
+            metrics.observe('channels.group_send_seconds',
+                            time.monotonic() - started, layer=self.layer_label)
+
+
+class BoundedInMemoryChannelLayer(MeasuredGroupSendMixin, InMemoryChannelLayer):
+    """
+    InMemoryChannelLayer con límite de canales y mensajes descartados
+    contados por motivo.
+
+    Cada canal ya estaba acotado (capacity mensajes); aquí se acota además
+    el número de canales con mensajes pendientes, para que los sockets que
+    dejan de leer no hagan crecer la memoria del proceso sin límite.
+    """
+
+    layer_label = 'memory'
+
+    def __init__(self, max_channels=10000, **kwargs):
+        super().__init__(**kwargs)
+        self.max_channels = max_channels
+
+    async def send(self, channel, message):
+        if channel not in self.channels and len(self.channels) >= self.max_channels:
+            self._clean_expired()
+            if len(self.channels) >= self.max_channels:
+                raise LayerFull(channel)
+        await super().send(channel, message)
+
+    async def group_send(self, group, message):
+        started = time.monotonic()
+        assert isinstance(message, dict), "Message is not a dict"
+        self.require_valid_group_name(group)
+        self._clean_expired()
+
+        channels = list(self.groups.get(group, {}))
+        results = await asyncio.gather(
+            *(self.send(channel, message) for channel in channels),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, LayerFull):
+                reason = 'layer_full'
+            elif isinstance(result, ChannelFull):
+                reason = 'channel_full'
+            elif isinstance(result, Exception):
+                reason = 'error'
+            else:
+                continue
+            metrics.increment('channels.dropped_messages',
+                              layer=self.layer_label, reason=reason)
+        metrics.observe('channels.group_send_seconds',
+                        time.monotonic() - started, layer=self.layer_label)
+
+
+@functools.lru_cache(maxsize=None)
+def _redis_layer_classes():
+    # channels_redis solo hace falta si se configura una capa Redis
+    from channels_redis.core import RedisChannelLayer
+    from channels_redis.pubsub import RedisPubSubChannelLayer
+
+    class MeasuredRedisChannelLayer(MeasuredGroupSendMixin, RedisChannelLayer):
+        layer_label = 'redis'
+
+    class MeasuredRedisPubSubChannelLayer(
+            MeasuredGroupSendMixin, RedisPubSubChannelLayer):
+        layer_label = 'redis_pubsub'
+
+        async def _group_send(self, group, message):
+            # La capa pub/sub delega cada operación en la del bucle actual
+            await self._get_layer().group_send(group, message)
+
+    return MeasuredRedisChannelLayer, MeasuredRedisPubSubChannelLayer
+
+
+def parse_layer_url(url):
+    """
+    Separar una URL de capa en (tipo, dirección Redis).
+
+    tipo es 'memory', 'redis' o 'redis_pubsub'; ValueError si el esquema
+    no está soportado.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == 'memory':
+        return 'memory', None
+    scheme, pubsub = parsed.scheme, False
+    if scheme.endswith(PUBSUB_SUFFIX):
+        scheme, pubsub = scheme[:-len(PUBSUB_SUFFIX)], True
+    if scheme not in REDIS_SCHEMES:
+        raise ValueError(f"Capa de canales no soportada: {parsed.scheme!r}")
+    address = urlunparse(parsed._replace(scheme=scheme))
+    return ('redis_pubsub' if pubsub else 'redis'), address
+
+
+def probe_redis(address, timeout=0.5):
+    """
+    Enviar PING al servidor Redis.
+
+    Devuelve None si responde o el mensaje de error si no.
+    """
+    import redis
+
+    client = redis.Redis.from_url(
+        address, socket_timeout=timeout, socket_connect_timeout=timeout)
+    try:
+        client.ping()
+    except Exception as e:
+        return str(e) or e.__class__.__name__
+    finally:
+        client.close()
+    return None
+
+
+def channel_layer_config(
+    url,
+    fallback='',
+    probe_timeout=0.5,
+    capacity=100,
+    expiry=60,
+    group_expiry=86400,
+    max_channels=10000,
+):
+    """Construir la entrada de CHANNEL_LAYERS para una URL"""
+    # Validar ya al cargar settings, no en el primer envío
+    kind, _ = parse_layer_url(url)
+    if fallback:
+        parse_layer_url(fallback)
+
+    options = {
+        'capacity': capacity,
+        'expiry': expiry,
+        'group_expiry': group_expiry,
+        'max_channels': max_channels,
+    }
+    if kind == 'memory':
+        return {'BACKEND': MEMORY_LAYER, 'CONFIG': options}
+    return {
+        'BACKEND': LAYER_FACTORY,
+        'CONFIG': {
+            'url': url,
+            'fallback': fallback,
+            'probe_timeout': probe_timeout,
+            **options,
+        },
+    }
+
+
+def build_channel_layer(url, fallback='', probe_timeout=0.5, capacity=100,
+                        expiry=60, group_expiry=86400, max_channels=10000):
+    """
+    Crear la capa de canales (lo llama Channels la primera vez que se pide).
+
+    Con una URL Redis primero se comprueba el servidor; si no responde se
+    usa fallback si está configurado.
+    """
+    kind, address = parse_layer_url(url)
+    if kind == 'memory':
+        return BoundedInMemoryChannelLayer(
+            capacity=capacity, expiry=expiry, group_expiry=group_expiry,
+            max_channels=max_channels)
+
+    error = probe_redis(address, probe_timeout)
+    if error is not None:
+        metrics.increment('channels.probe_failures', layer=kind)
+        if fallback:
+            logger.warning(
+                "Capa de canales %s no disponible (%s); usando %s",
+                kind, error, parse_layer_url(fallback)[0])
+            return build_channel_layer(
+                fallback, probe_timeout=probe_timeout, capacity=capacity, expiry=expiry,
+                group_expiry=group_expiry, max_channels=max_channels)
+        logger.error("Capa de canales %s no disponible: %s", kind, error)
+
+    redis_layer, pubsub_layer = _redis_layer_classes()
+    hosts = [{'address': address}]
+    if kind == 'redis_pubsub':
+        return pubsub_layer(hosts=hosts)
+    return redis_layer(hosts=hosts, capacity=capacity, expiry=expiry,
+                       group_expiry=group_expiry)
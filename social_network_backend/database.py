@@ -0,0 +1,66 @@
+"""
+Configuración de la base de datos a partir de DATABASE_URL
+
+PostgreSQL usa conexiones persistentes (CONN_MAX_AGE) con comprobación de
+salud al reutilizarlas; delante puede ir PgBouncer en modo transacción,
+en cuyo caso hay que desactivar los cursores del lado del servidor.
+SQLite queda para un solo nodo y se abre con el backend propio
+db_backends.sqlite3 (WAL, synchronous=NORMAL y busy_timeout).
+"""
+import time
+import dj_database_url
+from django.db import connections
+
+SQLITE_ENGINE = 'social_network_backend.db_backends.sqlite3'
+
+
+def database_config(
+    url,
+    conn_max_age=60,
+    conn_health_checks=True,
+    connect_timeout=5,
+    disable_server_side_cursors=False,
+    sqlite_timeout=5,
+    sqlite_journal_mode='WAL',
+    sqlite_synchronous='NORMAL',
+):
+    """Construir la entrada de DATABASES para una URL"""
+    db = dj_database_url.parse(
+        url, conn_max_age=conn_max_age, conn_health_checks=conn_health_checks)
+    options = db.setdefault('OPTIONS', {})
+
+    if db['ENGINE'] == 'django.db.backends.sqlite3':
+        db['ENGINE'] = SQLITE_ENGINE
+        options.update({
+            'timeout': sqlite_timeout,
+            'journal_mode': sqlite_journal_mode,
+            'synchronous': sqlite_synchronous,
+        })
+    elif db['ENGINE'] == 'django.db.backends.postgresql':
+        options.setdefault('connect_timeout', connect_timeout)
+        db['DISABLE_SERVER_SIDE_CURSORS'] = disable_server_side_cursors
+    return db
+
+
+def check_databases(aliases=None):
+    """
+    Ejecutar SELECT 1 en cada alias de base de datos.
+
+    Devuelve {alias: {'ok', 'vendor', 'latency_ms'[, 'error']}}.
+    """
+    results = {}
+    for alias in aliases or connections:
+        connection = connections[alias]
+        started = time.monotonic()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            results[alias] = {'ok': True}
+        except Exception as e:
+            results[alias] = {'ok': False, 'error': str(e)}
+        results[alias].update(
+            vendor=connection.vendor,
+            latency_ms=round((time.monotonic() - started) * 1000, 2),
+        )
+    return results
@@ -0,0 +1,30 @@
+"""
+Backend SQLite con ajustes para varios workers en un solo nodo
+
+Al abrir cada conexión activa el modo WAL (los lectores no bloquean al
+escritor) y synchronous=NORMAL. El busy_timeout lo fija la opción timeout
+de sqlite3.connect: un escritor espera a que se libere el bloqueo en lugar
+de fallar con "database is locked".
+"""
+from django.db.backends.sqlite3 import base
+
+# Opciones propias que no se pasan a sqlite3.connect
+PRAGMA_OPTIONS = ('journal_mode', 'synchronous')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in PRAGMA_OPTIONS:
+            params.pop(option, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        options = self.settings_dict['OPTIONS']
+        if options.get('journal_mode'):
+            conn.execute(f"PRAGMA journal_mode = {options['journal_mode']}")
+        if options.get('synchronous'):
+            conn.execute(f"PRAGMA synchronous = {options['synchronous']}")
+        return conn
@@ -0,0 +1,137 @@
+"""
+ETags y GET condicionales
+
+Los clientes vuelven a pedir periódicamente perfiles, posts y el feed de
+stories. Las vistas marcadas calculan un ETag débil a partir de datos
+baratos (updated_at y contadores del objeto ya cacheado, o un sello de
+versión en la caché) y, si coincide con If-None-Match, responden 304 sin
+ejecutar el serializer ni sus consultas.
+
+- make_etag(*partes): ETag débil W/"..." a partir de valores cualesquiera.
+- conditional_response(request, etag, render): 304 o render() con ETag.
+- ConditionalRetrieveMixin: para vistas RetrieveAPIView con get_etag().
+- version_stamps: sellos de versión en la caché que se renuevan con
+  bump() al cambiar los datos de un ámbito (por ejemplo el feed).
+
+Los sellos se renuevan solo en la caché del proceso que escribe. Sin una
+caché compartida (SHARED_CACHE=False) version_stamps.enabled es False y
+las vistas que dependen de un sello no calculan ETag (get_etag devuelve
+None): responden siempre el cuerpo completo.
+"""
+import hashlib
+import json
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from uploads.media_urls import media_url_resolver
+from .metrics import metrics
+
+# Las respuestas dependen del usuario: el cliente puede guardarlas pero
+# debe revalidarlas siempre
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts):
+    """ETag débil a partir de las partes que determinan la respuesta"""
+    # El periodo de las URLs firmadas forma parte de cualquier respuesta
+    # con media: al renovarse, el cliente recibe el cuerpo completo
+    payload = json.dumps([media_url_resolver.url_epoch(), *parts],
+                         default=str, sort_keys=True)
+    digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def _opaque(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def etag_matches(request, etag):
+    """Verificar si If-None-Match contiene el ETag (comparación débil)"""
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(',')]
+    return '*' in candidates or _opaque(etag) in map(_opaque, candidates)
+
+
+def conditional_response(request, etag, render, view=''):
+    """
+    Responder 304 si el cliente ya tiene esta versión o la respuesta de
+    render() en caso contrario; ambas llevan el ETag.
+
+    Con etag None se responde render() sin GET condicional.
+    """
+    if etag is None:
+        return render()
+    if etag_matches(request, etag):
+        metrics.increment('http.not_modified', view=view)
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = render()
+    if response.status_code in (status.HTTP_200_OK,
+                                status.HTTP_304_NOT_MODIFIED):
+        response['ETag'] = etag
+        response['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+class ConditionalRetrieveMixin:
+    """
+    Mixin para vistas de detalle con GET condicional.
+
+    Las vistas implementan get_etag(instance) con datos que no requieran
+    serializar el objeto, o devuelven None para no usar ETag.
+    """
+
+    def get_etag(self, instance):
+        """Sin redefinir, la vista responde sin ETag"""
+        return None
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return conditional_response(
+            request, self.get_etag(instance),
+            lambda: Response(self.get_serializer(instance).data),
+            view=type(self).__name__)
+
+
+class VersionStamps:
+    """Sellos de versión por ámbito guardados en la caché"""
+
+    @property
+    def enabled(self):
+        """Solo con una caché compartida todos los procesos ven los cambios"""
+        return settings.SHARED_CACHE
+
+    def key(self, scope):
+        return f'etag:version:{scope}'
+
+    def get(self, scope):
+        """Sello actual del ámbito; se crea si no existe o expiró"""
+        key = self.key(scope)
+        stamp = cache.get(key)
+        if stamp is None:
+            stamp = uuid.uuid4().hex
+            # Si otro proceso creó el sello a la vez, usar el suyo
+            if not cache.add(key, stamp, settings.ETAG_VERSION_TIMEOUT):
+                stamp = cache.get(key) or stamp
+        return stamp
+
+    def get_many(self, scopes):
+        """Sellos de varios ámbitos (en el mismo orden) con una lectura"""
+        found = cache.get_many([self.key(scope) for scope in scopes])
+        return [found.get(self.key(scope)) or self.get(scope)
+                for scope in scopes]
+
+    def bump(self, *scopes):
+        """Renovar el sello de cada ámbito tras un cambio"""
+        for scope in scopes:
+            cache.set(self.key(scope), uuid.uuid4().hex,
+                      settings.ETAG_VERSION_TIMEOUT)
+
+
+# Instancia global de los sellos
+version_stamps = VersionStamps()
@@ -0,0 +1,37 @@
+"""
+Comprobaciones de salud para balanceadores y orquestadores
+"""
+from rest_framework import status
+from rest_framework.decorators import (
+    api_view, authentication_classes, permission_classes
+)
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from uploads.storage_health import storage_health
+from .database import check_databases
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def health_check(request):
+    """
+    Estado de las bases de datos y del almacenamiento; 503 si alguna base
+    de datos no responde.
+
+    El almacenamiento se informa con el último resultado guardado, que se
+    renueva en segundo plano (ver uploads.storage_health), y sin cambiar
+    el código: sin S3 no se pueden subir archivos pero el resto de la API
+    sigue funcionando.
+    """
+    databases = check_databases()
+    healthy = all(result['ok'] for result in databases.values())
+    return Response(
+        {
+            'status': 'ok' if healthy else 'error',
+            'databases': databases,
+            'storage': storage_health.status(),
+        },
+        status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
@@ -0,0 +1,120 @@
+"""
+Codificación JSON rápida para la API REST y los WebSockets
+
+JSON_CODEC elige la implementación: 'orjson', 'json' (biblioteca estándar)
+o 'auto' (orjson si está instalado). Los tipos que orjson no conoce, y las
+fechas, pasan por el codificador de DRF para que la salida sea la misma
+que con JSONRenderer (fechas con milisegundos y 'Z', Decimal, lazy
+strings, etc.).
+
+FastJSONRenderer y FastJSONParser sustituyen a los de DRF en
+REST_FRAMEWORK; los consumers usan dumps_str() y loads().
+"""
+import json
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+class StdlibCodec:
+    """Codec con el módulo json de la biblioteca estándar"""
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(
+            obj, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'),
+            allow_nan=False).encode('utf-8')
+
+    def loads(self, data):
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            data = bytes(data).decode('utf-8')
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """Codec con orjson y el codificador de DRF para el resto de tipos"""
+    name = 'orjson'
+
+    def __init__(self):
+        self.options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, default=_encoder.default, option=self.options)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+_codecs = {}
+
+
+def get_codec():
+    """Codec configurado en JSON_CODEC (se crea una vez por nombre)"""
+    name = getattr(settings, 'JSON_CODEC', 'auto')
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+    codec = _codecs.get(name)
+    if codec is None:
+        if name == 'json':
+            codec = StdlibCodec()
+        elif name == 'orjson':
+            if orjson is None:
+                raise ImproperlyConfigured(
+                    "JSON_CODEC='orjson' requiere el paquete orjson")
+            codec = OrjsonCodec()
+        else:
+            raise ImproperlyConfigured(f"JSON_CODEC desconocido: {name}")
+        _codecs[name] = codec
+    return codec
+
+
+def dumps(obj):
+    """Codificar a bytes UTF-8"""
+    return get_codec().dumps(obj)
+
+
+def dumps_str(obj):
+    """Codificar a str (frames de texto de WebSocket)"""
+    return get_codec().dumps(obj).decode('utf-8')
+
+
+def loads(data):
+    """Decodificar desde str o bytes; lanza ValueError si no es JSON válido"""
+    return get_codec().loads(data)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer que codifica con el codec configurado"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # La salida indentada (API navegable, ?indent) queda para DRF
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser que decodifica con el codec configurado"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                data = data.decode(encoding)
+            return loads(data)
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
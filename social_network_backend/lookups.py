@@ -0,0 +1,20 @@
+"""
+Condiciones de consulta compartidas por las apps
+
+Lo que depende del motor de base de datos pero no de ningún modelo
+(búsqueda de usuarios, autocompletado de hashtags).
+"""
+from django.db import connection
+
+
+def prefix_filter(prefix, field='term'):
+    """
+    Condición de prefijo que aprovecha el índice del campo.
+
+    En PostgreSQL LIKE 'prefijo%' usa un índice varchar_pattern_ops; en
+    SQLite el LIKE de Django lleva ESCAPE y no usa índices, así que se
+    expresa como rango.
+    """
+    if connection.vendor == 'postgresql':
+        return {f'{field}__startswith': prefix}
+    return {f'{field}__gte': prefix, f'{field}__lt': prefix + chr(0x10FFFF)}
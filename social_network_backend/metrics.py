@@ -0,0 +1,63 @@
+"""
+Métricas simples en memoria del proceso
+
+Contadores y resúmenes (conteo, suma, máximo) identificados por nombre y
+etiquetas opcionales. Pensado para medir trabajos internos (limpiezas,
+envíos a grupos, etc.) sin depender de un sistema externo; snapshot()
+devuelve el estado actual para registrarlo o exponerlo.
+"""
+import threading
+
+
+def _key(name, labels):
+    if not labels:
+        return name
+    suffix = ','.join(f'{k}={v}' for k, v in sorted(labels.items()))
+    return f'{name}{{{suffix}}}'
+
+
+class Metrics:
+    """Registro de métricas seguro entre hilos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._summaries = {}
+
+    def increment(self, name, value=1, **labels):
+        """Sumar un valor a un contador"""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Registrar una observación (por ejemplo una latencia)"""
+        key = _key(name, labels)
+        with self._lock:
+            summary = self._summaries.setdefault(
+                key, {'count': 0, 'sum': 0.0, 'max': 0.0})
+            summary['count'] += 1
+            summary['sum'] += value
+            summary['max'] = max(summary['max'], value)
+
+    def get(self, name, **labels):
+        """Valor actual de un contador"""
+        with self._lock:
+            return self._counters.get(_key(name, labels), 0)
+
+    def snapshot(self):
+        """Copia del estado actual de todas las métricas"""
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'summaries': {k: dict(v) for k, v in self._summaries.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+
+# Instancia global del registro
+metrics = Metrics()
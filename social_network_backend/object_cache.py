@@ -0,0 +1,188 @@
+"""
+Caché de lectura de objetos por clave primaria
+
+object_cache.get(Model, pk) devuelve la instancia desde la caché o la
+carga de la base de datos y la guarda (read-through). Se guardan solo los
+valores de las columnas; la instancia se reconstruye con Model.from_db,
+así que las relaciones se cargan aparte como siempre.
+
+Contra las avalanchas al expirar una entrada popular:
+
+- single-flight: solo quien obtiene el candado (cache.add) recalcula; el
+  resto espera un momento a que aparezca el valor en lugar de ir todos a
+  la base de datos;
+- stale-while-revalidate: una entrada pasados OBJECT_CACHE_TIMEOUT
+  segundos sigue sirviéndose OBJECT_CACHE_STALE_TIMEOUT segundos más
+  mientras una sola petición la recalcula.
+
+Los modelos registrados con register() se invalidan en post_save y
+post_delete (y de nuevo al confirmar la transacción). Las instancias
+cacheadas son para leer: las escrituras deben partir de la base de datos.
+
+Esa invalidación solo llega a los demás procesos si la caché es
+compartida: con SHARED_CACHE=False (locmem:// o dummy:// fuera de DEBUG)
+get() y get_by() leen siempre de la base de datos.
+"""
+import logging
+import time
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_delete, post_save
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Intervalo entre comprobaciones mientras otro recalcula
+LOCK_POLL_INTERVAL = 0.02
+
+
+def _label(model):
+    return model._meta.label_lower
+
+
+class ObjectCache:
+    """Caché read-through con single-flight y stale-while-revalidate"""
+
+    def __init__(self):
+        self._registered = set()
+
+    def key(self, model, pk):
+        return f'obj:{_label(model)}:{pk}'
+
+    def lookup_key(self, model, field, value):
+        return f'obj:{_label(model)}:{field}:{value}'
+
+    def register(self, model):
+        """Invalidar la caché de un modelo al guardarlo o borrarlo"""
+        model = apps.get_model(model) if isinstance(model, str) else model
+        if model in self._registered:
+            return
+        self._registered.add(model)
+        uid = f'object_cache:{_label(model)}'
+        post_save.connect(self._on_change, sender=model, weak=False,
+                          dispatch_uid=uid)
+        post_delete.connect(self._on_change, sender=model, weak=False,
+                            dispatch_uid=uid)
+
+    def get(self, model, pk):
+        """Instancia con esa clave primaria o None si no existe"""
+        if not settings.SHARED_CACHE:
+            return self._load(model, pk)
+        key = self.key(model, pk)
+        entry = cache.get(key)
+
+        if entry is not None:
+            if entry['fresh_until'] > time.time():
+                metrics.increment('object_cache.hits', model=_label(model))
+                return self._build(model, entry)
+            # Caducada: la recalcula solo quien obtiene el candado
+            if self._acquire(key):
+                metrics.increment('object_cache.refreshes', model=_label(model))
+                try:
+                    return self._refresh(model, pk, key)
+                finally:
+                    self._release(key)
+            metrics.increment('object_cache.stale_hits', model=_label(model))
+            return self._build(model, entry)
+
+        metrics.increment('object_cache.misses', model=_label(model))
+        if self._acquire(key):
+            try:
+                return self._refresh(model, pk, key)
+            finally:
+                self._release(key)
+
+        # Otro proceso está cargando el objeto: esperar a su resultado
+        deadline = time.monotonic() + settings.OBJECT_CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return self._build(model, entry)
+        metrics.increment('object_cache.lock_timeouts', model=_label(model))
+        return self._load(model, pk)
+
+    def get_by(self, model, field, value):
+        """
+        Instancia por un campo único (username, por ejemplo).
+
+        Se cachea el pk correspondiente y se comprueba que el objeto
+        cacheado sigue teniendo ese valor.
+        """
+        if not settings.SHARED_CACHE:
+            return self._manager(model).filter(**{field: value}).first()
+        lookup_key = self.lookup_key(model, field, value)
+        pk = cache.get(lookup_key)
+        if pk is not None:
+            obj = self.get(model, pk)
+            if obj is not None and getattr(obj, field) == value:
+                return obj
+
+        pk = self._manager(model).filter(
+            **{field: value}).values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        cache.set(lookup_key, pk, self.timeout)
+        return self.get(model, pk)
+
+    def invalidate(self, model, pk):
+        """Descartar la entrada de un objeto"""
+        cache.delete(self.key(model, pk))
+
+    @property
+    def timeout(self):
+        return settings.OBJECT_CACHE_TIMEOUT + settings.OBJECT_CACHE_STALE_TIMEOUT
+
+    def _on_change(self, sender, instance, **kwargs):
+        key = self.key(sender, instance.pk)
+        cache.delete(key)
+        # Una lectura concurrente pudo cachear la fila antes del commit
+        transaction.on_commit(lambda: cache.delete(key))
+
+    def _refresh(self, model, pk, key):
+        obj = self._load(model, pk)
+        values = None
+        if obj is not None:
+            values = {field.attname: self._raw_value(obj, field)
+                      for field in model._meta.concrete_fields}
+        cache.set(key, {
+            'values': values,
+            'fresh_until': time.time() + settings.OBJECT_CACHE_TIMEOUT,
+        }, self.timeout)
+        return obj
+
+    def _raw_value(self, obj, field):
+        value = getattr(obj, field.attname)
+        # Los FileField se guardan como el nombre del archivo
+        return value.name if isinstance(value, FieldFile) else value
+
+    def _manager(self, model):
+        # Siempre la primaria: una réplica atrasada dejaría la fila vieja en
+        # caché mucho más allá de la ventana de lectura tras escritura
+        return model._default_manager.db_manager(DEFAULT_DB_ALIAS)
+
+    def _load(self, model, pk):
+        return self._manager(model).filter(pk=pk).first()
+
+    def _build(self, model, entry):
+        values = entry['values']
+        if values is None:
+            return None
+        names = [field.attname for field in model._meta.concrete_fields
+                 if field.attname in values]
+        return model.from_db(DEFAULT_DB_ALIAS, names,
+                             [values[name] for name in names])
+
+    def _acquire(self, key):
+        return cache.add(f'{key}:lock', 1, settings.OBJECT_CACHE_LOCK_TIMEOUT)
+
+    def _release(self, key):
+        cache.delete(f'{key}:lock')
+
+
+# Instancia global de la caché
+object_cache = ObjectCache()
@@ -0,0 +1,195 @@
+"""
+Servidor local que habla el protocolo de Redis para las pruebas
+
+Implementa lo que usan la comprobación de arranque y la capa de canales
+redis+pubsub:// (PING, PUBLISH, SUBSCRIBE, UNSUBSCRIBE y los comandos de
+conexión de los clientes, en RESP2 o RESP3 según pida HELLO). No guarda
+datos: los comandos de la capa con conjuntos ordenados y Lua (redis://)
+responden con error.
+
+    with RedisStandIn() as server:
+        url = server.url  # redis://127.0.0.1:<puerto>/0
+"""
+import socketserver
+import threading
+
+
+def _bulk(value):
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def _array(*items):
+    return b'*%d\r\n' % len(items) + b''.join(items)
+
+
+def _push(client, *items):
+    # Los mensajes de pub/sub son arrays en RESP2 y "push" en RESP3
+    prefix = b'>' if client.protocol == 3 else b'*'
+    return prefix + b'%d\r\n' % len(items) + b''.join(items)
+
+
+def _integer(value):
+    return b':%d\r\n' % value
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Una conexión de cliente"""
+
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+        self.channels = set()
+        self.protocol = 2
+
+    def write(self, data):
+        with self.write_lock:
+            self.wfile.write(data)
+            self.wfile.flush()
+
+    def read_command(self):
+        """Leer un comando (array de bulk strings); None al cerrar"""
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Comando en línea (por ejemplo desde telnet)
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        try:
+            while True:
+                command = self.read_command()
+                if command is None:
+                    break
+                if not command:
+                    continue
+                name = command[0].decode('utf-8', 'replace').upper()
+                if name == 'QUIT':
+                    self.write(b'+OK\r\n')
+                    break
+                self.server.dispatch(self, name, command[1:])
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            self.server.unsubscribe_all(self)
+
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    """Servidor RESP en memoria, en un hilo, para usar con with"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), _Handler)
+        self._lock = threading.Lock()
+        self.subscribers = {}
+        self.commands = []
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def dispatch(self, client, name, args):
+        """Ejecutar un comando y responder al cliente"""
+        self.commands.append(name)
+        if name == 'PING':
+            if client.channels and client.protocol == 2:
+                client.write(_array(_bulk('pong'), _bulk(args[0] if args else b'')))
+            else:
+                client.write(_bulk(args[0]) if args else b'+PONG\r\n')
+        elif name == 'HELLO':
+            client.write(self.hello(client, args))
+        elif name == 'ECHO':
+            client.write(_bulk(args[0]))
+        elif name in ('SELECT', 'CLIENT', 'FLUSHDB', 'FLUSHALL', 'AUTH'):
+            client.write(b'+OK\r\n')
+        elif name == 'PUBLISH':
+            client.write(_integer(self.publish(args[0], args[1])))
+        elif name == 'SUBSCRIBE':
+            for channel in args:
+                client.write(self.subscribe(client, channel))
+        elif name == 'UNSUBSCRIBE':
+            channels = args or list(client.channels)
+            for channel in channels:
+                client.write(self.unsubscribe(client, channel))
+            if not channels:
+                client.write(_push(client, _bulk('unsubscribe'), b'$-1\r\n',
+                                   _integer(0)))
+        else:
+            client.write(b"-ERR unknown command '%s'\r\n" % name.encode('utf-8'))
+
+    def hello(self, client, args):
+        """Negociar la versión del protocolo (HELLO [2|3])"""
+        if args:
+            if args[0] not in (b'2', b'3'):
+                return b'-NOPROTO unsupported protocol version\r\n'
+            client.protocol = int(args[0])
+        fields = [
+            _bulk('server'), _bulk('redis'),
+            _bulk('version'), _bulk('7.0.0'),
+            _bulk('proto'), _integer(client.protocol),
+            _bulk('mode'), _bulk('standalone'),
+            _bulk('role'), _bulk('master'),
+        ]
+        if client.protocol == 3:
+            return b'%%%d\r\n' % (len(fields) // 2) + b''.join(fields)
+        return _array(*fields)
+
+    def publish(self, channel, payload):
+        with self._lock:
+            clients = list(self.subscribers.get(channel, ()))
+        for client in clients:
+            try:
+                client.write(_push(
+                    client, _bulk('message'), _bulk(channel), _bulk(payload)))
+            except OSError:
+                pass
+        return len(clients)
+
+    def subscribe(self, client, channel):
+        with self._lock:
+            self.subscribers.setdefault(channel, set()).add(client)
+            client.channels.add(channel)
+            count = len(client.channels)
+        return _push(client, _bulk('subscribe'), _bulk(channel), _integer(count))
+
+    def unsubscribe(self, client, channel):
+        with self._lock:
+            clients = self.subscribers.get(channel)
+            if clients is not None:
+                clients.discard(client)
+                if not clients:
+                    del self.subscribers[channel]
+            client.channels.discard(channel)
+            count = len(client.channels)
+        return _push(client, _bulk('unsubscribe'), _bulk(channel),
+                     _integer(count))
+
+    def unsubscribe_all(self, client):
+        for channel in list(client.channels):
+            self.unsubscribe(client, channel)
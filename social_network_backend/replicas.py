@@ -0,0 +1,234 @@
+"""
+Lecturas desde réplicas de la base de datos
+
+Las vistas de solo lectura con más tráfico (feed, perfiles, seguidores,
+bandeja de stories, lista de notificaciones) se marcan con
+replica_read_actions o con el decorador replica_reads. Para esas vistas,
+y solo en peticiones de lectura (GET, HEAD, OPTIONS), ReplicaRouter envía las lecturas a uno de
+los alias de DATABASE_REPLICAS. El resto de consultas siguen en default.
+
+Para leer lo que uno mismo acaba de escribir:
+
+- una petición que escribe usa default para el resto de sus lecturas;
+- tras una petición con escrituras, las lecturas del mismo usuario van a
+  default durante REPLICA_STICKY_SECONDS segundos. La marca viaja en una
+  cookie firmada (llega a cualquier worker) y se guarda también en la
+  caché para los clientes que no envían cookies.
+
+La marca en la caché solo la ven los demás workers con una caché
+compartida, así que con SHARED_CACHE=False no se lee de réplicas.
+
+Una réplica cuyo retraso supera REPLICA_MAX_LAG_SECONDS, o que no
+responde, se descarta hasta la siguiente medición. Si no queda ninguna se
+lee de default.
+"""
+import contextvars
+import logging
+import random
+import threading
+import time
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Consulta del retraso de replicación por motor; sin entrada se asume 0
+LAG_QUERIES = {
+    'postgresql': (
+        "SELECT CASE WHEN pg_is_in_recovery() THEN "
+        "COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+        "ELSE 0 END"
+    ),
+}
+
+# Cookie firmada con el usuario que acaba de escribir
+PIN_COOKIE = 'db_pin'
+PIN_COOKIE_SALT = 'social_network_backend.replicas.pin'
+
+_request_state = contextvars.ContextVar('replica_request_state', default=None)
+
+
+def replica_pin_key(user_id):
+    return f'db:replica_pin:{user_id}'
+
+
+def replicas_enabled():
+    """Hay réplicas y una caché compartida para fijar al usuario en default"""
+    return bool(settings.DATABASE_REPLICAS) and settings.SHARED_CACHE
+
+
+def replica_reads(view):
+    """Marcar una vista de función para leer de réplicas en GET"""
+    view.replica_reads = True
+    return view
+
+
+class RequestState:
+    """Estado del enrutado durante una petición"""
+
+    def __init__(self, request, replica_allowed):
+        self.request = request
+        self.replica_allowed = replica_allowed
+        self.wrote = False
+        self._pinned = None
+        self._resolving = False
+
+    def pinned(self):
+        """Verificar si el usuario escribió hace menos de REPLICA_STICKY_SECONDS"""
+        if self._pinned is None:
+            if self._resolving:
+                # Consulta hecha mientras se resuelve el propio request.user
+                return False
+            self._resolving = True
+            try:
+                user = getattr(self.request, 'user', None)
+            finally:
+                self._resolving = False
+            if user is None or not user.is_authenticated:
+                # Aún no autenticado: no memorizar la respuesta
+                return False
+            self._pinned = (self._pin_cookie() == str(user.pk)
+                            or cache.get(replica_pin_key(user.pk)) is not None)
+        return self._pinned
+
+    def _pin_cookie(self):
+        # get_signed_cookie descarta las cookies con más de max_age segundos
+        return self.request.get_signed_cookie(
+            PIN_COOKIE, default=None, salt=PIN_COOKIE_SALT,
+            max_age=settings.REPLICA_STICKY_SECONDS)
+
+
+class ReplicaLagMonitor:
+    """Mide y recuerda el retraso de cada réplica durante unos segundos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lags = {}
+
+    def record(self, alias, lag):
+        """Guardar una medición (None si la réplica no responde)"""
+        with self._lock:
+            self._lags[alias] = (lag, time.monotonic())
+        if lag is not None:
+            metrics.observe('db.replica_lag_seconds', lag, alias=alias)
+
+    def lag(self, alias):
+        """Retraso en segundos de la réplica o None si no está disponible"""
+        with self._lock:
+            entry = self._lags.get(alias)
+        if entry and time.monotonic() - entry[1] < settings.REPLICA_LAG_CHECK_INTERVAL:
+            return entry[0]
+        lag = self.measure(alias)
+        self.record(alias, lag)
+        return lag
+
+    def measure(self, alias):
+        connection = connections[alias]
+        query = LAG_QUERIES.get(connection.vendor)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query or 'SELECT 0')
+                return float(cursor.fetchone()[0] or 0)
+        except Exception as e:
+            logger.warning(f"Réplica {alias} no disponible: {str(e)}")
+            return None
+
+    def reset(self):
+        with self._lock:
+            self._lags.clear()
+
+
+# Instancia global del monitor
+replica_lag_monitor = ReplicaLagMonitor()
+
+
+class ReplicaRouter:
+    """Router que envía a réplicas las lecturas de las vistas marcadas"""
+
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or not state.replica_allowed or state.wrote:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or state.pinned():
+            metrics.increment('db.replica_reads', target='primary')
+            return DEFAULT_DB_ALIAS
+
+        healthy = [
+            alias for alias in settings.DATABASE_REPLICAS
+            if self._lag_ok(replica_lag_monitor.lag(alias))
+        ]
+        if not healthy:
+            metrics.increment('db.replica_reads', target='fallback')
+            return DEFAULT_DB_ALIAS
+
+        metrics.increment('db.replica_reads', target='replica')
+        return random.choice(healthy)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def _lag_ok(self, lag):
+        return lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Habilitar las réplicas para las vistas marcadas y fijar al usuario en
+    default tras una escritura
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestState(request, replica_allowed=False)
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+
+        if not state.wrote or not replicas_enabled():
+            return response
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            cache.set(replica_pin_key(user.pk), True,
+                      settings.REPLICA_STICKY_SECONDS)
+            response.set_signed_cookie(
+                PIN_COOKIE, str(user.pk), salt=PIN_COOKIE_SALT,
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True,
+                secure=request.is_secure(), samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _request_state.get()
+        if state is None or not replicas_enabled():
+            return None
+        if request.method in SAFE_METHODS:
+            state.replica_allowed = self.is_replica_view(request, view_func)
+        return None
+
+    def is_replica_view(self, request, view_func):
+        if getattr(view_func, 'replica_reads', False):
+            return True
+        cls = getattr(view_func, 'cls', None)
+        read_actions = getattr(cls, 'replica_read_actions', ())
+        # En los viewsets el nombre es la acción; en las vistas, el método
+        actions = getattr(view_func, 'actions', None) or {}
+        method = request.method.lower()
+        return actions.get(method, method) in read_actions
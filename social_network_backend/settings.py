@@ -10,9 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 from datetime import timedelta
+from social_network_backend.caches import cache_config, is_shared_cache
+from social_network_backend.channel_layers import channel_layer_config
+from social_network_backend.database import database_config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -58,6 +62,7 @@ INSTALLED_APPS = [
     'chat',  # Nueva app de chat
     'notifications',  # Sistema de notificaciones
     'stories',  # Sistema de stories temporales
+    'uploads',  # Procesamiento de imágenes en segundo plano
 ]
 
 MIDDLEWARE = [
@@ -67,6 +72,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'social_network_backend.replicas.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -93,14 +99,92 @@ WSGI_APPLICATION = 'social_network_backend.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+#
+# DATABASE_URL elige el backend: postgresql://... en producción o
+# sqlite:///... para un solo nodo (ver social_network_backend/database.py)
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+    'default': database_config(
+        config('DATABASE_URL', default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}"),
+        # Segundos que se reutiliza cada conexión (0 = cerrar por petición)
+        conn_max_age=config('DB_CONN_MAX_AGE', default=60, cast=int),
+        conn_health_checks=config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        connect_timeout=config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        # True detrás de PgBouncer en modo transacción
+        disable_server_side_cursors=config(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
+        sqlite_timeout=config('SQLITE_BUSY_TIMEOUT', default=5, cast=int),
+        sqlite_journal_mode=config('SQLITE_JOURNAL_MODE', default='WAL'),
+        sqlite_synchronous=config('SQLITE_SYNCHRONOUS', default='NORMAL'),
+    )
+}
+
+# Réplicas de solo lectura (URLs separadas por comas). Reciben las lecturas
+# de las vistas marcadas con replica_read_actions / replica_reads
+for index, url in enumerate(
+        config('DATABASE_REPLICA_URLS', default='', cast=Csv()), start=1):
+    DATABASES[f'replica_{index}'] = {
+        **database_config(
+            url,
+            conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+            conn_health_checks=DATABASES['default']['CONN_HEALTH_CHECKS'],
+        ),
+        # En tests las réplicas apuntan a la base de datos de test de default
+        'TEST': {'MIRROR': 'default'},
     }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['social_network_backend.replicas.ReplicaRouter']
+
+# Segundos que un usuario lee de default tras escribir (leer lo propio).
+# Las réplicas solo se usan con SHARED_CACHE (ver replicas.py)
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+# Retraso máximo tolerado y cada cuánto se vuelve a medir
+REPLICA_MAX_LAG_SECONDS = config(
+    'REPLICA_MAX_LAG_SECONDS', default=2, cast=float)
+REPLICA_LAG_CHECK_INTERVAL = config(
+    'REPLICA_LAG_CHECK_INTERVAL', default=5, cast=float)
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#
+# CACHE_URL elige el backend: locmem://, file:///ruta o redis://host:6379/1
+# (ver social_network_backend/caches.py)
+
+CACHE_URL = config('CACHE_URL', default='locmem://')
+
+CACHES = {
+    'default': cache_config(
+        CACHE_URL,
+        timeout=config('CACHE_DEFAULT_TIMEOUT', default=300, cast=int),
+        key_prefix=config('CACHE_KEY_PREFIX', default='social'),
+    )
 }
 
+# La caché de objetos, los sellos de versión de los ETags y la caché del
+# usuario del JWT se invalidan con señales en el proceso que escribe, así
+# que con varios workers necesitan una caché compartida (file:// o
+# redis://). Con locmem:// o dummy:// se desactivan salvo en DEBUG
+# (runserver, un solo proceso); fuera de DEBUG manage.py check avisa
+# (users.W001)
+SHARED_CACHE = config('SHARED_CACHE',
+                      default=is_shared_cache(CACHE_URL) or DEBUG, cast=bool)
+
+# Caché de objetos por clave primaria (User, Post, Comment, ChatRoom):
+# segundos frescos, segundos extra sirviendo el valor viejo mientras una
+# sola petición lo recalcula, y espera máxima de quien no recalcula
+OBJECT_CACHE_TIMEOUT = config('OBJECT_CACHE_TIMEOUT', default=300, cast=int)
+OBJECT_CACHE_STALE_TIMEOUT = config(
+    'OBJECT_CACHE_STALE_TIMEOUT', default=60, cast=int)
+OBJECT_CACHE_LOCK_TIMEOUT = config(
+    'OBJECT_CACHE_LOCK_TIMEOUT', default=5, cast=int)
+OBJECT_CACHE_LOCK_WAIT = config(
+    'OBJECT_CACHE_LOCK_WAIT', default=0.2, cast=float)
+
+# Segundos que se conserva un sello de versión de ETag sin cambios (al
+# expirar se genera otro y los clientes reciben una respuesta completa)
+ETAG_VERSION_TIMEOUT = config('ETAG_VERSION_TIMEOUT', default=86400, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -147,6 +231,8 @@ if USE_S3:
     AWS_SESSION_TOKEN = config('AWS_SESSION_TOKEN', default='')
     AWS_STORAGE_BUCKET_NAME = config('AWS_STORAGE_BUCKET_NAME')
     AWS_S3_REGION_NAME = config('AWS_S3_REGION_NAME', default='us-east-1')
+    # Endpoint alternativo compatible con S3 (MinIO, moto, etc.)
+    AWS_S3_ENDPOINT_URL = config('AWS_S3_ENDPOINT_URL', default=None)
     AWS_S3_CUSTOM_DOMAIN = config(
         'AWS_S3_CUSTOM_DOMAIN', default=f'{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com')
 
@@ -166,35 +252,15 @@ if USE_S3:
     MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/media/'
     STATIC_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/static/'
 
-    # Verificar credenciales al inicio (especial para Academy)
-    def test_s3_credentials():
-        """Verificar si las credenciales S3 están funcionando"""
-        try:
-            import boto3
-            from botocore.exceptions import ClientError, NoCredentialsError
-
-            s3_client = boto3.client(
-                's3',
-                aws_access_key_id=AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-                aws_session_token=AWS_SESSION_TOKEN if AWS_SESSION_TOKEN else None,
-                region_name=AWS_S3_REGION_NAME
-            )
-            s3_client.head_bucket(Bucket=AWS_STORAGE_BUCKET_NAME)
-            print("✅ Credenciales S3 válidas")
-            return True
-        except (ClientError, NoCredentialsError) as e:
-            print(f"❌ Error con credenciales S3: {e}")
-            print("🔄 Cambiando a almacenamiento local automáticamente")
-            return False
-        except Exception as e:
-            print(f"⚠️ Error verificando S3: {e}")
-            return False
-
-    # Solo usar S3 si las credenciales son válidas
-    if not test_s3_credentials():
-        USE_S3 = False
-        print("📁 Usando almacenamiento local por error en credenciales S3")
+# Las credenciales y el bucket no se comprueban aquí (sería una llamada de
+# red en cada arranque): lo hace uploads.storage_health en segundo plano la
+# primera vez que se usa S3, el endpoint /health/ o manage.py check_storage
+STORAGE_CHECK_ON_FIRST_USE = config(
+    'STORAGE_CHECK_ON_FIRST_USE', default=True, cast=bool)
+# Segundos de espera de esa comprobación
+STORAGE_CHECK_TIMEOUT = config('STORAGE_CHECK_TIMEOUT', default=3, cast=float)
+# Segundos que vale un resultado antes de renovarlo en segundo plano
+STORAGE_CHECK_INTERVAL = config('STORAGE_CHECK_INTERVAL', default=60, cast=float)
 
 # Configuración de almacenamiento local (fallback o desarrollo)
 if not USE_S3:
@@ -204,29 +270,100 @@ if not USE_S3:
     STATIC_URL = '/static/'
     STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-    DEFAULT_FILE_STORAGE = 'django.core.files.storage.FileSystemStorage'
+    DEFAULT_FILE_STORAGE = 'uploads.storage.DedupFileSystemStorage'
     STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 
+# Guardar una sola vez los archivos con contenido idéntico (refcount por hash)
+UPLOAD_DEDUP_ENABLED = config('UPLOAD_DEDUP_ENABLED', default=True, cast=bool)
+
+# Subidas directas al almacenamiento con URL firmada
+DIRECT_UPLOAD_EXPIRY = config('DIRECT_UPLOAD_EXPIRY', default=900, cast=int)
+DIRECT_UPLOAD_MAX_IMAGE_SIZE = config(
+    'DIRECT_UPLOAD_MAX_IMAGE_SIZE', default=5 * 1024 * 1024, cast=int)
+DIRECT_UPLOAD_MAX_VIDEO_SIZE = config(
+    'DIRECT_UPLOAD_MAX_VIDEO_SIZE', default=100 * 1024 * 1024, cast=int)
+
+# Subidas reanudables por bloques (videos de stories). S3 exige partes
+# de al menos 5MB salvo la última
+CHUNKED_UPLOAD_CHUNK_SIZE = config(
+    'CHUNKED_UPLOAD_CHUNK_SIZE', default=5 * 1024 * 1024, cast=int)
+CHUNKED_UPLOAD_EXPIRY_HOURS = config(
+    'CHUNKED_UPLOAD_EXPIRY_HOURS', default=24, cast=int)
+CHUNKED_UPLOAD_TEMP_DIR = config(
+    'CHUNKED_UPLOAD_TEMP_DIR',
+    default=str(Path(tempfile.gettempdir()) / 'chunked-uploads'))
+
+# Limpieza de temp-uploads caducadas (comando sweep_temp_uploads)
+TEMP_UPLOAD_TTL_HOURS = config('TEMP_UPLOAD_TTL_HOURS', default=24, cast=int)
+TEMP_UPLOAD_SWEEP_BATCH_SIZE = config(
+    'TEMP_UPLOAD_SWEEP_BATCH_SIZE', default=1000, cast=int)
+TEMP_UPLOAD_SWEEP_WORKERS = config(
+    'TEMP_UPLOAD_SWEEP_WORKERS', default=8, cast=int)
+
+# Procesamiento de imágenes fuera del request (pool de procesos)
+IMAGE_PROCESSING_WORKERS = config(
+    'IMAGE_PROCESSING_WORKERS', default=2, cast=int)
+# Máximo de imágenes encoladas o en proceso antes de responder 503
+IMAGE_PROCESSING_MAX_PENDING = config(
+    'IMAGE_PROCESSING_MAX_PENDING', default=20, cast=int)
+IMAGE_PROCESSING_RETRY_AFTER = config(
+    'IMAGE_PROCESSING_RETRY_AFTER', default=5, cast=int)
+IMAGE_PROCESSING_START_METHOD = config(
+    'IMAGE_PROCESSING_START_METHOD', default='spawn')
+# Procesar en línea sin pool (tests y depuración)
+IMAGE_PROCESSING_EAGER = config(
+    'IMAGE_PROCESSING_EAGER', default=False, cast=bool)
+
+# Límite de píxeles por imagen (se valida leyendo solo la cabecera) para
+# rechazar imágenes pequeñas en bytes pero enormes al decodificarse
+IMAGE_MAX_PIXELS = config('IMAGE_MAX_PIXELS', default=50_000_000, cast=int)
+
+# Variantes responsivas de imágenes (lado mayor en píxeles y formatos)
+IMAGE_VARIANT_SIZES = [
+    int(size) for size in config(
+        'IMAGE_VARIANT_SIZES', default='64,320,1080').split(',')
+]
+IMAGE_VARIANT_FORMATS = config(
+    'IMAGE_VARIANT_FORMATS', default='webp,jpeg').split(',')
+IMAGE_VARIANT_QUALITY = config('IMAGE_VARIANT_QUALITY', default=80, cast=int)
+
+# Lado mayor del placeholder inline (LQIP) calculado al subir cada imagen
+IMAGE_PLACEHOLDER_SIZE = config('IMAGE_PLACEHOLDER_SIZE', default=16, cast=int)
+
+# Caché de URLs de archivos media (entradas) y margen antes de la
+# caducidad, como fracción de la validez, para renovar URLs firmadas
+MEDIA_URL_CACHE_SIZE = config('MEDIA_URL_CACHE_SIZE', default=10000, cast=int)
+MEDIA_URL_SIGNED_MARGIN = config(
+    'MEDIA_URL_SIGNED_MARGIN', default=0.1, cast=float)
+
 # Django Channels Configuration
 ASGI_APPLICATION = 'social_network_backend.asgi.application'
 
-# Channel Layers para Redis (fallback a in-memory si Redis no está disponible)
-try:
-    CHANNEL_LAYERS = {
-        'default': {
-            'BACKEND': 'channels_redis.core.RedisChannelLayer',
-            'CONFIG': {
-                "hosts": [('127.0.0.1', 6379)],
-            },
-        },
-    }
-except:
-    # Fallback a in-memory para desarrollo sin Redis
-    CHANNEL_LAYERS = {
-        'default': {
-            'BACKEND': 'channels.layers.InMemoryChannelLayer',
-        },
-    }
+# Channel Layers
+# CHANNEL_LAYER_URL elige la capa: memory:// (un solo nodo), redis://host:6379/0
+# o redis+pubsub://host:6379/0 (ver social_network_backend/channel_layers.py).
+# Si Redis no responde al PING de arranque se usa CHANNEL_LAYER_FALLBACK
+# (vacío para no caer a otra capa). La elección no se revisa después, así
+# que fuera de DEBUG no hay respaldo por defecto: un nodo en memoria no
+# reparte eventos con los demás aunque Redis vuelva
+CHANNEL_LAYERS = {
+    'default': channel_layer_config(
+        config('CHANNEL_LAYER_URL', default='redis://127.0.0.1:6379/0'),
+        fallback=config('CHANNEL_LAYER_FALLBACK',
+                        default='memory://' if DEBUG else ''),
+        probe_timeout=config(
+            'CHANNEL_LAYER_PROBE_TIMEOUT', default=0.5, cast=float),
+        # Mensajes pendientes por canal antes de descartar
+        capacity=config('CHANNEL_LAYER_CAPACITY', default=100, cast=int),
+        # Segundos que un mensaje espera a ser leído
+        expiry=config('CHANNEL_LAYER_EXPIRY', default=60, cast=int),
+        group_expiry=config(
+            'CHANNEL_LAYER_GROUP_EXPIRY', default=86400, cast=int),
+        # Canales con mensajes pendientes en la capa en memoria
+        max_channels=config(
+            'CHANNEL_LAYER_MAX_CHANNELS', default=10000, cast=int),
+    )
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -236,10 +373,28 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom user model
 AUTH_USER_MODEL = 'users.User'
 
+# Codec JSON de la API y los WebSockets: auto (orjson si está instalado),
+# orjson o json
+JSON_CODEC = config('JSON_CODEC', default='auto')
+
+# Ofrecer el protocolo WebSocket social.msgpack.v1 (requiere msgpack). Con
+# él activo cada evento de grupo se codifica también en MessagePack, lo
+# que duplica el coste de codificación y el tamaño en la capa de canales
+WEBSOCKET_MSGPACK = config('WEBSOCKET_MSGPACK', default=False, cast=bool)
+
 # Django REST Framework settings
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'social_network_backend.json_codec.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'social_network_backend.json_codec.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -278,6 +433,44 @@ SIMPLE_JWT = {
     'JTI_CLAIM': 'jti',
 }
 
+# Segundos que se cachea el usuario resuelto desde el token JWT
+JWT_USER_CACHE_TTL = config('JWT_USER_CACHE_TTL', default=60, cast=int)
+
+# Typeahead de usuarios: longitud mínima, resultados y presupuesto en ms
+USER_SEARCH_MIN_LENGTH = config('USER_SEARCH_MIN_LENGTH', default=1, cast=int)
+USER_SEARCH_TYPEAHEAD_LIMIT = config(
+    'USER_SEARCH_TYPEAHEAD_LIMIT', default=10, cast=int)
+USER_SEARCH_BUDGET_MS = config('USER_SEARCH_BUDGET_MS', default=150, cast=int)
+
+# Hashtags en tendencia: horas del buffer circular, vida media del
+# decaimiento y tamaño del ranking precalculado
+TRENDING_WINDOW_HOURS = config('TRENDING_WINDOW_HOURS', default=48, cast=int)
+TRENDING_HALF_LIFE_HOURS = config(
+    'TRENDING_HALF_LIFE_HOURS', default=6, cast=float)
+TRENDING_HASHTAGS_LIMIT = config('TRENDING_HASHTAGS_LIMIT', default=20, cast=int)
+# Antigüedad máxima del ranking; después se sirven los hashtags más usados
+TRENDING_MAX_AGE_HOURS = config('TRENDING_MAX_AGE_HOURS', default=2, cast=float)
+HASHTAG_AUTOCOMPLETE_LIMIT = config(
+    'HASHTAG_AUTOCOMPLETE_LIMIT', default=10, cast=int)
+
+# Máximo de usernames distintos resueltos por post o comentario
+MENTIONS_MAX_PER_CONTENT = config(
+    'MENTIONS_MAX_PER_CONTENT', default=20, cast=int)
+
+# Reparto de nuevos posts entre seguidores: hilos, tamaño de bloque y
+# cuántos seguidores con interacción reciente se notifican primero
+NOTIFICATION_FANOUT_WORKERS = config(
+    'NOTIFICATION_FANOUT_WORKERS', default=2, cast=int)
+NOTIFICATION_FANOUT_CHUNK_SIZE = config(
+    'NOTIFICATION_FANOUT_CHUNK_SIZE', default=500, cast=int)
+NOTIFICATION_FANOUT_PRIORITY_LIMIT = config(
+    'NOTIFICATION_FANOUT_PRIORITY_LIMIT', default=200, cast=int)
+NOTIFICATION_FANOUT_PRIORITY_DAYS = config(
+    'NOTIFICATION_FANOUT_PRIORITY_DAYS', default=30, cast=int)
+# Repartir en línea sin pool (tests y depuración)
+NOTIFICATION_FANOUT_EAGER = config(
+    'NOTIFICATION_FANOUT_EAGER', default=False, cast=bool)
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Solo para desarrollo
 CORS_ALLOWED_ORIGINS = [
@@ -0,0 +1,136 @@
+"""
+Coste de importación al arrancar un proceso (como python -X importtime)
+
+Ejecuta el arranque en un proceso nuevo con -X importtime, agrega el
+tiempo propio de cada módulo por paquete raíz (o por módulo) y lo compara
+con una línea base guardada en JSON. Lo usa el comando profile_startup.
+
+-X importtime solo registra las sentencias import: lo que Django carga con
+importlib.import_module (settings, URLConf, models de cada app) aparece a
+través de sus dependencias. Por eso los scripts importan settings y las
+URLs explícitamente antes de que Django lo haga.
+"""
+import os
+import statistics
+import subprocess
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+_SETUP = (
+    "import os\n"
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', "
+    "'social_network_backend.settings')\n"
+    "import social_network_backend.settings\n"
+    "import django\n"
+    "django.setup()\n"
+)
+_URLS = (
+    "import social_network_backend.urls\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+)
+
+# Qué se importa en cada punto de arranque
+TARGETS = {
+    # Solo settings (lo paga cada proceso y comando)
+    'settings': "import social_network_backend.settings\n",
+    # django.setup(): apps, modelos y señales
+    'setup': _SETUP,
+    # setup + URLConf (lo que carga un worker antes de la primera petición)
+    'urls': _SETUP + _URLS,
+    # Aplicación ASGI (daphne) + URLConf
+    'asgi': (
+        "import os\n"
+        "os.environ.setdefault('DJANGO_SETTINGS_MODULE', "
+        "'social_network_backend.settings')\n"
+        "import social_network_backend.settings\n"
+        "import social_network_backend.asgi\n" + _URLS
+    ),
+}
+
+ImportRecord = namedtuple('ImportRecord', 'module self_us cumulative_us depth')
+
+
+def parse_importtime(text):
+    """Registros de la salida de -X importtime (ignora el resto de líneas)"""
+    records = []
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append(ImportRecord(
+            name.strip(), int(parts[0]), int(parts[1]), depth))
+    return records
+
+
+def run_importtime(target='urls', env=None):
+    """Importar target en un proceso nuevo y devolver sus registros"""
+    if target not in TARGETS:
+        raise ValueError(f"Objetivo desconocido: {target!r}")
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', TARGETS[target]],
+        cwd=BASE_DIR, env={**os.environ, **(env or {})},
+        capture_output=True, text=True, timeout=300,
+    )
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f'código {result.returncode}')
+    return parse_importtime(result.stderr)
+
+
+def aggregate(records, by='package'):
+    """
+    Milisegundos de importación propios agregados por paquete raíz
+    ('package') o por módulo ('module').
+    """
+    totals = {}
+    for record in records:
+        name = record.module
+        if by == 'package':
+            name = name.split('.')[0]
+        totals[name] = totals.get(name, 0) + record.self_us / 1000
+    return totals
+
+
+def profile(target='urls', runs=3, by='package', env=None):
+    """
+    Mediana de varias ejecuciones:
+    {'target', 'runs', 'by', 'total_ms', 'imports'}
+    """
+    samples = [aggregate(run_importtime(target, env), by) for _ in range(runs)]
+    names = set().union(*samples)
+    imports = {
+        name: round(statistics.median(sample.get(name, 0) for sample in samples), 3)
+        for name in names
+    }
+    return {
+        'target': target,
+        'runs': runs,
+        'by': by,
+        'total_ms': round(statistics.median(sum(s.values()) for s in samples), 3),
+        'imports': imports,
+    }
+
+
+def diff(current, baseline):
+    """
+    Diferencias por nombre entre dos perfiles, de mayor a menor cambio.
+
+    Los módulos que solo están en uno de los dos cuentan como 0 en el otro.
+    """
+    names = set(current['imports']) | set(baseline['imports'])
+    rows = []
+    for name in names:
+        now = current['imports'].get(name, 0)
+        before = baseline['imports'].get(name, 0)
+        rows.append({'name': name, 'ms': now, 'baseline_ms': before,
+                     'delta_ms': round(now - before, 3)})
+    rows.sort(key=lambda row: abs(row['delta_ms']), reverse=True)
+    return rows
@@ -18,36 +18,21 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 from upload_views import ImageUploadView, BatchImageUploadView, delete_image, storage_info
-
-# Configuración de Swagger/OpenAPI
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Social Network API",
-        default_version='v1',
-        description="API completa para red social desarrollada con Django REST Framework",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contact@socialnetwork.local"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=[permissions.AllowAny],
-)
+from .api_docs import docs_view
+from .health import health_check
 
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
 
-    # API Documentation
-    path('swagger/', schema_view.with_ui('swagger',
-         cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc',
-         cache_timeout=0), name='schema-redoc'),
-    path('swagger.json', schema_view.without_ui(
-        cache_timeout=0), name='schema-json'),
+    # API Documentation (drf_yasg se carga en la primera petición)
+    path('swagger/', docs_view('swagger'), name='schema-swagger-ui'),
+    path('redoc/', docs_view('redoc'), name='schema-redoc'),
+    path('swagger.json', docs_view(), name='schema-json'),
+
+    # Salud del servicio
+    path('health/', health_check, name='health'),
 
     # API Endpoints
     path('api/v1/auth/', include('users.urls')),
@@ -62,6 +47,7 @@ urlpatterns = [
     path('api/v1/upload/batch/', BatchImageUploadView.as_view(), name='upload-batch'),
     path('api/v1/upload/delete/', delete_image, name='delete-image'),
     path('api/v1/upload/info/', storage_info, name='storage-info'),
+    path('api/v1/upload/', include('uploads.urls')),
 ]
 
 # Servir archivos media en desarrollo
@@ -0,0 +1,189 @@
+"""
+Base común de los consumers WebSocket
+
+Los eventos que se reparten a un grupo (chat, notificaciones, subidas)
+llevan el frame ya codificado: quien envía lo codifica una sola vez con
+encode_frame() y cada miembro lo reenvía a su socket sin volver a
+serializarlo.
+
+Protocolos (cabecera Sec-WebSocket-Protocol):
+
+- social.json (o ninguno): frames de texto JSON, el protocolo por defecto.
+- social.msgpack.v1: frames binarios MessagePack en los que las claves
+  conocidas (FIELD_NAMES) se sustituyen por su posición en la tabla. Las
+  claves que no están en la tabla se envían como texto. Solo se ofrece
+  con WEBSOCKET_MSGPACK=True: los eventos de grupo llevan entonces las dos
+  codificaciones.
+"""
+from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import json_codec
+from .metrics import metrics
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional: solo se ofrece JSON
+    msgpack = None
+
+JSON_SUBPROTOCOL = 'social.json'
+MSGPACK_SUBPROTOCOL = 'social.msgpack.v1'
+
+# Claves con identificador compacto en social.msgpack.v1 (el identificador
+# es la posición). Solo se pueden añadir claves al final; cambiar el orden
+# requiere una versión nueva del protocolo
+FIELD_NAMES = (
+    # Sobre del frame y acciones del cliente
+    'type', 'data', 'message', 'action', 'content', 'message_type',
+    'reply_to_id', 'message_id', 'message_ids', 'is_typing',
+    'notification_ids', 'mark_all', 'page', 'page_size', 'count',
+    # Mensajes de chat
+    'id', 'room', 'sender', 'image', 'placeholder', 'dominant_color', 'file',
+    'created_at', 'updated_at', 'edited_at', 'is_deleted', 'reply_to',
+    'read_by_count', 'is_read_by_me',
+    # Usuarios
+    'user_id', 'username', 'first_name', 'last_name', 'avatar_url',
+    'is_verified',
+    # Notificaciones
+    'notification_type', 'title', 'actor', 'is_read', 'read_at',
+    'extra_data', 'content_object_data', 'time_since', 'notifications',
+    'total_pages', 'total_count', 'has_next', 'has_previous',
+    'marked_count', 'success',
+    # Subidas de imágenes
+    'batch_id', 'original_name', 'status', 'file_path', 'file_url',
+    'file_size', 'error_message', 'completed_at', 'status_url',
+)
+FIELD_IDS = {name: index for index, name in enumerate(FIELD_NAMES)}
+
+_encoder = JSONEncoder()
+
+
+def compact(value):
+    """Sustituir las claves conocidas por su identificador"""
+    if isinstance(value, dict):
+        return {FIELD_IDS.get(key, key): compact(item)
+                for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [compact(item) for item in value]
+    return value
+
+
+def _field_name(key):
+    if isinstance(key, int) and 0 <= key < len(FIELD_NAMES):
+        return FIELD_NAMES[key]
+    return key
+
+
+def expand(value):
+    """Operación inversa de compact()"""
+    if isinstance(value, dict):
+        return {_field_name(key): expand(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [expand(item) for item in value]
+    return value
+
+
+def pack(payload):
+    """Codificar un frame social.msgpack.v1"""
+    # Fechas, UUID y Decimal se convierten igual que en JSON
+    return msgpack.packb(compact(payload), default=_encoder.default,
+                         use_bin_type=True)
+
+
+def unpack(data):
+    """Decodificar un frame social.msgpack.v1; ValueError si no es válido"""
+    try:
+        return expand(msgpack.unpackb(data, raw=False, strict_map_key=False))
+    except Exception as e:
+        raise ValueError(f'Frame MessagePack inválido: {e}') from e
+
+
+def msgpack_enabled():
+    """Si se ofrece social.msgpack.v1 (WEBSOCKET_MSGPACK y el paquete)"""
+    return msgpack is not None and settings.WEBSOCKET_MSGPACK
+
+
+def supported_subprotocols():
+    if not msgpack_enabled():
+        return (JSON_SUBPROTOCOL,)
+    return (MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL)
+
+
+def encode_frame(payload):
+    """
+    Codificar una vez el frame que recibirán todos los miembros.
+
+    Devuelve los campos a incluir en el evento del grupo: 'frame' (JSON) y,
+    con social.msgpack.v1 activo, 'frame_msgpack'.
+    """
+    fields = {'frame': json_codec.dumps_str(payload)}
+    if msgpack_enabled():
+        fields['frame_msgpack'] = pack(payload)
+    return fields
+
+
+class FrameConsumer(AsyncWebsocketConsumer):
+    """AsyncWebsocketConsumer con el codec y el protocolo negociados"""
+
+    subprotocol = None
+
+    @property
+    def binary(self):
+        return self.subprotocol == MSGPACK_SUBPROTOCOL
+
+    def select_subprotocol(self, offered):
+        """Primer protocolo ofrecido por el cliente que soportamos"""
+        supported = supported_subprotocols()
+        for name in offered:
+            if name in supported:
+                return name
+        return None
+
+    async def accept(self, subprotocol=None, headers=None):
+        if subprotocol is None:
+            subprotocol = self.select_subprotocol(
+                self.scope.get('subprotocols') or [])
+        self.subprotocol = subprotocol
+        metrics.increment('websockets.connections',
+                          protocol=subprotocol or JSON_SUBPROTOCOL)
+        await super().accept(subprotocol, headers)
+
+    def decode(self, text_data=None, bytes_data=None):
+        """Decodificar un frame del cliente; ValueError si no es válido"""
+        if text_data is not None:
+            return json_codec.loads(text_data)
+        if msgpack is None or not self.binary:
+            raise ValueError('Frame binario no soportado en este protocolo')
+        return unpack(bytes_data)
+
+    async def send_payload(self, payload):
+        """Codificar y enviar un frame solo a este socket"""
+        if self.binary:
+            await self.send(bytes_data=pack(payload))
+        else:
+            await self.send(text_data=json_codec.dumps_str(payload))
+
+    async def send_frame(self, event):
+        """Reenviar el frame ya codificado de un evento de grupo"""
+        if self.binary and 'frame_msgpack' in event:
+            await self.send(bytes_data=event['frame_msgpack'])
+        elif self.binary:
+            # Evento codificado sin msgpack (otro proceso sin el paquete o
+            # sin WEBSOCKET_MSGPACK)
+            await self.send(bytes_data=pack(json_codec.loads(event['frame'])))
+        else:
+            await self.send(text_data=event['frame'])
+
+    async def group_broadcast(self, group, event_type, payload, **fields):
+        """
+        Enviar un evento al grupo con el frame codificado una vez.
+
+        fields son datos extra que los miembros necesitan para decidir si
+        reenvían el frame (por ejemplo el autor de un indicador).
+        """
+        await self.channel_layer.group_send(group, {
+            'type': event_type,
+            **encode_frame(payload),
+            **fields,
+        })
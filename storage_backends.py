@@ -4,6 +4,8 @@ Compatible con AWS Academy (session tokens)
 """
 from storages.backends.s3boto3 import S3Boto3Storage
 from django.conf import settings
+from uploads.storage import ContentAddressedStorageMixin
+from uploads.storage_health import storage_health
 
 
 class S3Storage(S3Boto3Storage):
@@ -14,6 +16,10 @@ class S3Storage(S3Boto3Storage):
         if hasattr(settings, 'AWS_SESSION_TOKEN') and settings.AWS_SESSION_TOKEN:
             settings_dict['session_token'] = settings.AWS_SESSION_TOKEN
         super().__init__(**settings_dict)
+        # Primera vez en el proceso: verificar credenciales y bucket sin
+        # bloquear (el resultado queda guardado y un fallo va al log)
+        if settings.STORAGE_CHECK_ON_FIRST_USE:
+            storage_health.check_in_background()
 
 
 class StaticStorage(S3Storage):
@@ -25,9 +31,9 @@ class StaticStorage(S3Storage):
     file_overwrite = True
 
 
-class PublicMediaStorage(S3Storage):
+class PublicMediaStorage(ContentAddressedStorageMixin, S3Storage):
     """
-    Almacenamiento para archivos media públicos en S3
+    Almacenamiento para archivos media públicos en S3 (deduplicado por contenido)
     """
     location = 'media'
     default_acl = 'public-read'
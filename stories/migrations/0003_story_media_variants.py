@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stories', '0002_remove_story_duration_story_duration_hours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='media_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
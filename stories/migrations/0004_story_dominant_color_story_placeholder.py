@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stories', '0003_story_media_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='dominant_color',
+            field=models.CharField(blank=True, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='placeholder',
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:09
+
+from django.db import migrations, models
+
+
+def record_existing_sources(apps, schema_editor):
+    """Los placeholders existentes de videos se calcularon del thumbnail actual"""
+    Story = apps.get_model('stories', 'Story')
+    Story.objects.filter(story_type='video').exclude(placeholder='').update(
+        placeholder_source=models.F('thumbnail'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stories', '0004_story_dominant_color_story_placeholder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='placeholder_source',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.RunPython(record_existing_sources, migrations.RunPython.noop),
+    ]
@@ -52,6 +52,15 @@ class Story(models.Model):
         upload_to=story_media_path, blank=True, null=True)
     thumbnail = models.ImageField(
         upload_to=story_media_path, blank=True, null=True)  # Para videos
+    # Manifiesto de variantes responsivas (solo stories de imagen)
+    media_variants = models.JSONField(default=dict, blank=True)
+    # Placeholder inline (data URI) y color dominante de la imagen o, en
+    # videos, del thumbnail
+    placeholder = models.TextField(blank=True)
+    dominant_color = models.CharField(max_length=7, blank=True)
+    # Archivo del que se calculó el placeholder en los videos (sin
+    # manifiesto): si cambia el thumbnail se vuelve a calcular
+    placeholder_source = models.CharField(max_length=500, blank=True)
 
     # Configuración
     is_public = models.BooleanField(default=True)
@@ -145,6 +154,23 @@ class Story(models.Model):
             return FileUploadHandler.get_file_url(self.media_file)
         return None
 
+    def get_media_url(self, size=None):
+        """URL del media o de la variante del tamaño indicado (imágenes)"""
+        if size is None or self.story_type != 'image':
+            return self.media_url
+        from utils import FileUploadHandler
+        return FileUploadHandler.get_variant_url(
+            self.media_file, self.media_variants, size)
+
+    @property
+    def media_variant_urls(self):
+        """URLs de las variantes de una story de imagen"""
+        if self.story_type != 'image':
+            return {}
+        from utils import FileUploadHandler
+        return FileUploadHandler.get_variant_urls(
+            self.media_file, self.media_variants)
+
     @property
     def thumbnail_url(self):
         """URL del thumbnail"""
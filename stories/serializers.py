@@ -8,6 +8,8 @@ from .models import (
     StoryHighlight, StoryHighlightItem
 )
 from users.serializers import UserListSerializer
+from uploads.media_urls import MediaURLListSerializer
+from utils import AVATAR_THUMBNAIL_SIZE, FEED_IMAGE_SIZE
 
 User = get_user_model()
 
@@ -21,9 +23,7 @@ class StoryAuthorSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'first_name', 'last_name', 'avatar_url']
 
     def get_avatar_url(self, obj):
-        if obj.avatar:
-            return obj.avatar.url
-        return None
+        return obj.get_avatar_url(AVATAR_THUMBNAIL_SIZE)
 
 
 class StoryViewSerializer(serializers.ModelSerializer):
@@ -90,6 +90,7 @@ class StorySerializer(serializers.ModelSerializer):
     """Serializer completo para stories"""
     author = StoryAuthorSerializer(read_only=True)
     media_url = serializers.SerializerMethodField()
+    media_variants = serializers.ReadOnlyField(source='media_variant_urls')
     thumbnail_url = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     is_viewed = serializers.SerializerMethodField()
@@ -99,9 +100,12 @@ class StorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Story
+        list_serializer_class = MediaURLListSerializer
+        media_fields = ['media_file', 'media_variants', 'thumbnail',
+                        'author.avatar', 'author.avatar_variants']
         fields = [
             'id', 'author', 'story_type', 'content', 'media_url',
-            'thumbnail_url', 'is_public', 'allow_replies',
+            'media_variants', 'thumbnail_url', 'is_public', 'allow_replies',
             'background_color', 'text_color', 'duration_hours', 'music_track',
             'views_count', 'likes_count', 'replies_count',
             'created_at', 'expires_at', 'is_liked', 'is_viewed',
@@ -109,7 +113,7 @@ class StorySerializer(serializers.ModelSerializer):
         ]
 
     def get_media_url(self, obj):
-        return obj.media_url
+        return obj.get_media_url(FEED_IMAGE_SIZE)
 
     def get_thumbnail_url(self, obj):
         return obj.thumbnail_url
@@ -157,18 +161,23 @@ class StoryListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listar stories"""
     author = StoryAuthorSerializer(read_only=True)
     media_url = serializers.SerializerMethodField()
+    media_variants = serializers.ReadOnlyField(source='media_variant_urls')
     thumbnail_url = serializers.SerializerMethodField()
     is_viewed = serializers.SerializerMethodField()
 
     class Meta:
         model = Story
+        list_serializer_class = MediaURLListSerializer
+        media_fields = ['media_file', 'media_variants', 'thumbnail',
+                        'author.avatar', 'author.avatar_variants']
         fields = [
-            'id', 'author', 'story_type', 'media_url', 'thumbnail_url',
-            'views_count', 'created_at', 'expires_at', 'is_viewed'
+            'id', 'author', 'story_type', 'media_url', 'media_variants',
+            'placeholder', 'dominant_color',
+            'thumbnail_url', 'views_count', 'created_at', 'expires_at', 'is_viewed'
         ]
 
     def get_media_url(self, obj):
-        return obj.media_url
+        return obj.get_media_url(FEED_IMAGE_SIZE)
 
     def get_thumbnail_url(self, obj):
         return obj.thumbnail_url
@@ -3,10 +3,24 @@ Señales para el sistema de Stories
 """
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.contrib.auth import get_user_model
 from django.utils import timezone
 from notifications.models import UserNotification
+from social_network_backend.etags import version_stamps
+from uploads.variants import media_fields_updated
 from .models import Story, StoryLike, StoryReply, StoryView
 
+User = get_user_model()
+
+
+
+def story_author_scope(author_id):
+    """
+    Ámbito del sello de versión de las stories de un autor en el feed
+    (ETag): sus stories, sus vistas y su nombre y avatar
+    """
+    return f'stories:author:{author_id}'
+
 
 @receiver(post_save, sender=StoryLike)
 def create_story_like_notification(sender, instance, created, **kwargs):
@@ -133,3 +147,44 @@ def cleanup_story_files(sender, instance, **kwargs):
             instance.thumbnail.delete(save=False)
         except:
             pass
+
+
+@receiver(post_save, sender=Story)
+@receiver(post_delete, sender=Story)
+def bump_story_author_version(sender, instance, **kwargs):
+    """Renovar la versión del autor al crear, cambiar o borrar una story"""
+    version_stamps.bump(story_author_scope(instance.author_id))
+
+
+@receiver(post_save, sender=StoryView)
+@receiver(post_delete, sender=StoryView)
+def bump_story_author_version_on_view(sender, instance, **kwargs):
+    """Una vista cambia views_count e is_viewed de una story del autor"""
+    author_id = Story.objects.filter(
+        pk=instance.story_id).values_list('author_id', flat=True).first()
+    if author_id is not None:
+        version_stamps.bump(story_author_scope(author_id))
+
+
+@receiver(media_fields_updated, sender=Story)
+def bump_story_author_version_on_variants(sender, pk, **kwargs):
+    """Renovar la versión del autor al registrar las variantes de una story"""
+    author_id = Story.objects.filter(
+        pk=pk).values_list('author_id', flat=True).first()
+    if author_id is not None:
+        version_stamps.bump(story_author_scope(author_id))
+
+
+@receiver(media_fields_updated, sender=User)
+def bump_story_author_version_on_avatar(sender, pk, **kwargs):
+    """El feed incluye las variantes del avatar de los autores"""
+    version_stamps.bump(story_author_scope(pk))
+
+
+@receiver(post_save, sender=User)
+def bump_story_author_version_on_profile(sender, instance, update_fields=None,
+                                         **kwargs):
+    """El feed incluye nombre y avatar de los autores"""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    version_stamps.bump(story_author_scope(instance.pk))
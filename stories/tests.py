@@ -3,7 +3,7 @@ Tests para el sistema de Stories
 """
 import tempfile
 from datetime import timedelta
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -157,6 +157,57 @@ class StoryViewSetTest(APITestCase):
         self.assertEqual(story.content, 'Nueva story de texto')
         self.assertEqual(story.background_color, '#FF5733')
 
+    @override_settings(SHARED_CACHE=True)
+    def test_story_feed_conditional_get(self):
+        """Test el feed responde 304 hasta que cambia una story o sus vistas"""
+        self.authenticate()
+        url = reverse('story-feed')
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            # Solo el número de stories visibles
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        StoryView.objects.create(story=self.other_story, viewer=self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        Story.objects.filter(pk=self.other_story.pk).update(
+            expires_at=timezone.now() - timedelta(minutes=1))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_story_feed_not_modified_by_unrelated_activity(self):
+        """Test la actividad de autores fuera del feed mantiene el 304"""
+        self.authenticate()
+        url = reverse('story-feed')
+        etag = self.client.get(url)['ETag']
+
+        # Un usuario sin stories edita su perfil y publica una story privada
+        # que otro usuario ve
+        outsider = User.objects.create_user(
+            username='ajeno', email='ajeno@example.com', password='testpass123')
+        outsider.bio = 'Nueva bio'
+        outsider.save()
+        private = Story.objects.create(
+            author=outsider, story_type='text', content='Privada',
+            is_public=False)
+        StoryView.objects.create(story=private, viewer=self.other_user)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Un autor del feed cambia su nombre
+        self.other_user.first_name = 'Otro'
+        self.other_user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_story_feed(self):
         """Test feed de stories"""
         self.authenticate()
@@ -11,6 +11,9 @@ from django.utils import timezone
 from django.db import transaction
 from datetime import timedelta
 
+from social_network_backend.etags import (
+    conditional_response, make_etag, version_stamps
+)
 from .models import (
     Story, StoryView, StoryLike, StoryReply,
     StoryHighlight, StoryHighlightItem
@@ -22,6 +25,7 @@ from .serializers import (
     UserStoriesSerializer, StoryStatsSerializer,
     StoryViewCreateSerializer, StoryReplyCreateSerializer
 )
+from .signals import story_author_scope
 
 
 class StoryPagination(PageNumberPagination):
@@ -35,6 +39,8 @@ class StoryViewSet(viewsets.ModelViewSet):
     """ViewSet para Stories"""
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = StoryPagination
+    # Lecturas desde réplicas (ver social_network_backend/replicas.py)
+    replica_read_actions = {'feed'}
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -207,7 +213,23 @@ class StoryViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def feed(self, request):
-        """Obtener stories agrupadas por usuario para el feed"""
+        """Obtener stories agrupadas por usuario para el feed (con ETag)"""
+        user = request.user
+        if not version_stamps.enabled:
+            return self._feed_response(request)
+        # Sello de versión de cada autor visible más el número de stories
+        # visibles, que baja cuando alguna expira sin que cambie ninguna fila
+        author_ids = list(Story.objects.for_user(user).values_list(
+            'author_id', flat=True))
+        authors = sorted(set(author_ids), key=str)
+        stamps = version_stamps.get_many(
+            [story_author_scope(author_id) for author_id in authors])
+        etag = make_etag('stories:feed', user.pk, len(author_ids),
+                         list(zip(authors, stamps)))
+        return conditional_response(
+            request, etag, lambda: self._feed_response(request), view='story_feed')
+
+    def _feed_response(self, request):
         user = request.user
 
         # Obtener stories activas de usuarios que sigue + propias
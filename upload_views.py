@@ -9,12 +9,22 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.views import APIView
 from django.conf import settings
 from django.core.files.storage import default_storage
-from PIL import Image
-import uuid
-import io
-from django.core.files.base import ContentFile
-from utils import FileUploadHandler, compress_image
-import json
+from utils import FileUploadHandler
+from uploads.models import ImageUpload
+from uploads.serializers import ImageUploadSerializer
+from uploads.services import image_upload_service
+from uploads.workers import ProcessingQueueFull
+
+
+def queue_full_response(exc):
+    """
+    Respuesta 503 con Retry-After cuando el pool de imágenes está saturado
+    """
+    return Response(
+        {'error': 'El servidor está procesando demasiadas imágenes, inténtalo más tarde'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': str(exc.retry_after)}
+    )
 
 
 class ImageUploadView(APIView):
@@ -26,7 +36,7 @@ class ImageUploadView(APIView):
 
     def post(self, request, *args, **kwargs):
         """
-        Sube una imagen y la optimiza automáticamente
+        Recibe una imagen y la encola para optimizarla en segundo plano
         """
         try:
             image_file = request.FILES.get('image')
@@ -45,32 +55,18 @@ class ImageUploadView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Comprimir la imagen
-            compressed_image = compress_image(image_file)
-
-            # Generar nombre único
-            file_extension = image_file.name.split('.')[-1].lower()
-            if file_extension not in ['jpg', 'jpeg']:
-                file_extension = 'jpg'  # Forzar JPG después de la compresión
-
-            unique_filename = f"{uuid.uuid4()}.{file_extension}"
-
-            # Guardar en el almacenamiento
-            file_path = f"temp-uploads/{request.user.username}/{unique_filename}"
-            saved_path = default_storage.save(file_path, compressed_image)
-
-            # Obtener URL
-            file_url = FileUploadHandler.get_file_url(
-                default_storage.open(saved_path))
+            # Encolar la imagen para procesarla fuera del request
+            upload = image_upload_service.start_upload(
+                request.user, image_file)
 
             return Response({
                 'success': True,
-                'file_path': saved_path,
-                'file_url': file_url,
-                'file_size': compressed_image.size if hasattr(compressed_image, 'size') else FileUploadHandler.get_file_size(compressed_image),
-                'message': 'Imagen subida y optimizada correctamente'
-            }, status=status.HTTP_201_CREATED)
+                'upload': ImageUploadSerializer(upload).data,
+                'message': 'Imagen recibida, se está optimizando en segundo plano'
+            }, status=status.HTTP_202_ACCEPTED)
 
+        except ProcessingQueueFull as e:
+            return queue_full_response(e)
         except Exception as e:
             return Response(
                 {'error': f'Error al procesar la imagen: {str(e)}'},
@@ -104,6 +100,10 @@ def delete_image(request):
         # Eliminar el archivo
         if default_storage.exists(file_path):
             default_storage.delete(file_path)
+            # La reserva ya no tiene archivo que limpiar
+            ImageUpload.objects.filter(
+                user=request.user, file_path=file_path
+            ).update(status='expired', file_path='')
             return Response({
                 'success': True,
                 'message': 'Archivo eliminado correctamente'
@@ -133,7 +133,8 @@ def storage_info(request):
         'custom_domain': getattr(settings, 'AWS_S3_CUSTOM_DOMAIN', None) if settings.USE_S3 else None,
         'max_file_size': '5MB',
         'allowed_formats': ['jpg', 'jpeg', 'png', 'gif', 'webp'],
-        'compression_enabled': True
+        'compression_enabled': True,
+        'async_processing': True
     })
 
 
@@ -146,7 +147,7 @@ class BatchImageUploadView(APIView):
 
     def post(self, request, *args, **kwargs):
         """
-        Sube múltiples imágenes optimizadas
+        Recibe múltiples imágenes y las encola para optimizarlas
         """
         try:
             images = request.FILES.getlist('images')
@@ -162,55 +163,33 @@ class BatchImageUploadView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            uploaded_files = []
+            valid_images = []
             errors = []
 
             for i, image_file in enumerate(images):
-                try:
-                    # Validar el archivo
-                    is_valid, message = FileUploadHandler.validate_image_file(
-                        image_file)
-                    if not is_valid:
-                        errors.append(f"Imagen {i+1}: {message}")
-                        continue
-
-                    # Comprimir la imagen
-                    compressed_image = compress_image(image_file)
-
-                    # Generar nombre único
-                    file_extension = image_file.name.split('.')[-1].lower()
-                    if file_extension not in ['jpg', 'jpeg']:
-                        file_extension = 'jpg'
-
-                    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-                    file_path = f"temp-uploads/{request.user.username}/{unique_filename}"
-
-                    # Guardar
-                    saved_path = default_storage.save(
-                        file_path, compressed_image)
-                    file_url = FileUploadHandler.get_file_url(
-                        default_storage.open(saved_path))
-
-                    uploaded_files.append({
-                        'index': i,
-                        'original_name': image_file.name,
-                        'file_path': saved_path,
-                        'file_url': file_url,
-                        'file_size': compressed_image.size if hasattr(compressed_image, 'size') else 0
-                    })
-
-                except Exception as e:
-                    errors.append(
-                        f"Imagen {i+1}: Error al procesar - {str(e)}")
+                # Validar el archivo
+                is_valid, message = FileUploadHandler.validate_image_file(
+                    image_file)
+                if not is_valid:
+                    errors.append(f"Imagen {i+1}: {message}")
+                    continue
+                valid_images.append(image_file)
+
+            # Encolar todas las imágenes válidas (todo o nada)
+            uploads = image_upload_service.start_uploads(
+                request.user, valid_images) if valid_images else []
 
             return Response({
-                'success': len(uploaded_files) > 0,
-                'uploaded_files': uploaded_files,
+                'success': len(uploads) > 0,
+                'batch_id': uploads[0].batch_id if uploads else None,
+                'uploads': ImageUploadSerializer(uploads, many=True).data,
                 'errors': errors,
-                'total_uploaded': len(uploaded_files),
+                'total_accepted': len(uploads),
                 'total_errors': len(errors)
-            }, status=status.HTTP_201_CREATED if uploaded_files else status.HTTP_400_BAD_REQUEST)
+            }, status=status.HTTP_202_ACCEPTED if uploads else status.HTTP_400_BAD_REQUEST)
 
+        except ProcessingQueueFull as e:
+            return queue_full_response(e)
         except Exception as e:
             return Response(
                 {'error': f'Error al procesar las imágenes: {str(e)}'},
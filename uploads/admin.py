@@ -0,0 +1,24 @@
+"""
+Configuración del panel de administración para archivos subidos
+"""
+from django.contrib import admin
+from .models import ImageUpload, ContentBlob
+
+
+@admin.register(ImageUpload)
+class ImageUploadAdmin(admin.ModelAdmin):
+    """Admin para imágenes subidas"""
+    list_display = ['original_name', 'user', 'status',
+                    'file_size', 'created_at', 'completed_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['original_name', 'file_path', 'user__username']
+    readonly_fields = ['id', 'batch_id', 'created_at', 'completed_at']
+
+
+@admin.register(ContentBlob)
+class ContentBlobAdmin(admin.ModelAdmin):
+    """Admin para blobs deduplicados"""
+    list_display = ['name', 'size', 'ref_count',
+                    'created_at', 'last_referenced_at']
+    search_fields = ['name', 'digest']
+    readonly_fields = ['digest', 'name', 'size', 'created_at']
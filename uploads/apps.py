@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class UploadsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'uploads'
+    verbose_name = 'Procesamiento de Archivos'
+
+    def ready(self):
+        """Importar señales cuando la app esté lista"""
+        import uploads.signals
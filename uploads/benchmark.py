@@ -0,0 +1,81 @@
+"""
+Caso de benchmark del decodificado de imágenes
+
+Se ejecuta como proceso independiente (python -m uploads.benchmark) para
+que el pico de memoria de cada caso no se mezcle con el de
+los demás. Imprime una línea JSON con el pico de RSS adicional y la
+latencia del procesamiento.
+"""
+import io
+import json
+import resource
+import sys
+import time
+
+
+def full_decode(data, max_width, max_height, quality, max_pixels):
+    """Procesamiento anterior: decodifica la imagen completa y luego reduce"""
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data))
+    img.load()
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if img.width > max_width or img.height > max_height:
+        img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS,
+                      reducing_gap=None)
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getvalue()
+
+
+def get_mode_function(mode):
+    if mode == 'full':
+        return full_decode
+    from uploads.imaging import compress_image_data
+    return compress_image_data
+
+
+def peak_rss_kb():
+    """
+    Pico de memoria residente del proceso en KB.
+
+    En Linux se usa VmHWM porque ru_maxrss se hereda del proceso padre a
+    través de execve y podría ocultar el pico real del caso.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # En macOS ru_maxrss está en bytes, en el resto en KB
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_case(mode, path, max_width, max_height, quality, max_pixels):
+    func = get_mode_function(mode)
+    import PIL.Image  # noqa: F401  (cargar PIL antes de medir)
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    baseline = peak_rss_kb()
+    start = time.perf_counter()
+    func(data, max_width, max_height, quality, max_pixels)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'mode': mode,
+        'peak_rss_kb': peak_rss_kb() - baseline,
+        'seconds': elapsed,
+    }
+
+
+if __name__ == '__main__':
+    mode, path, max_width, max_height, quality, max_pixels = sys.argv[1:7]
+    print(json.dumps(run_case(
+        mode, path, int(max_width), int(max_height),
+        int(quality), int(max_pixels))))
@@ -0,0 +1,289 @@
+"""
+Subidas reanudables por bloques para videos de stories
+
+Protocolo:
+    1. POST con content_type y total_size crea la subida y devuelve el
+       tamaño de bloque.
+    2. PUT de cada bloque con las cabeceras Upload-Offset (posición del
+       bloque) y X-Chunk-Checksum (SHA-256 en hex). Si el offset no
+       coincide con el confirmado se responde 409 con el offset actual.
+    3. GET devuelve el offset confirmado para reanudar tras un corte.
+    4. POST a finalize valida el video y crea la Story.
+
+Los bloques se escriben en su posición (archivo local) o como partes de
+un multipart upload de S3, así que reintentar un bloque es idempotente y
+la memoria usada no depende del tamaño del video.
+"""
+import hashlib
+import logging
+import os
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from .direct import (
+    DirectUploadError, VIDEO_CONTENT_TYPES,
+    validate_stored_content, create_story_from_upload
+)
+from .models import ChunkedUpload
+from .storage import s3_object_key
+
+logger = logging.getLogger(__name__)
+
+# Tamaño de lectura del cuerpo de cada bloque
+READ_SIZE = 64 * 1024
+
+
+class ChunkChecksumMismatch(DirectUploadError):
+    """El checksum del bloque recibido no coincide con el declarado"""
+
+
+class LocalChunkBackend:
+    """Bloques escritos por offset en un archivo temporal local"""
+    name = 'local'
+
+    def path(self, upload):
+        return os.path.join(settings.CHUNKED_UPLOAD_TEMP_DIR, f'{upload.id}.part')
+
+    def start(self, upload):
+        os.makedirs(settings.CHUNKED_UPLOAD_TEMP_DIR, exist_ok=True)
+        open(self.path(upload), 'wb').close()
+
+    def write_chunk(self, upload, offset, stream, length, checksum):
+        """
+        Escribir el bloque en su posición calculando el checksum al vuelo.
+
+        Si el checksum no coincide los bytes escritos quedan más allá del
+        offset confirmado y se sobrescriben con el reintento.
+        """
+        digest = hashlib.sha256()
+        with open(self.path(upload), 'r+b') as f:
+            f.seek(offset)
+            remaining = length
+            while remaining > 0:
+                data = stream.read(min(READ_SIZE, remaining))
+                if not data:
+                    break
+                digest.update(data)
+                f.write(data)
+                remaining -= len(data)
+
+        if remaining:
+            raise DirectUploadError("El bloque llegó incompleto")
+        if digest.hexdigest() != checksum:
+            raise ChunkChecksumMismatch("El checksum del bloque no coincide")
+
+    def complete(self, upload):
+        """Mover el archivo completo al almacenamiento"""
+        path = self.path(upload)
+        with open(path, 'r+b') as f:
+            # Descartar bytes de reintentos fallidos tras el final
+            f.truncate(upload.total_size)
+            f.seek(0)
+            name = default_storage.save(upload.storage_key, File(f))
+        os.remove(path)
+        return name
+
+    def abort(self, upload):
+        try:
+            os.remove(self.path(upload))
+        except FileNotFoundError:
+            pass
+
+
+class S3ChunkBackend:
+    """Bloques enviados como partes de un multipart upload de S3"""
+    name = 's3'
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    @property
+    def client(self):
+        return self.storage.bucket.meta.client
+
+    def key(self, upload):
+        return s3_object_key(self.storage, upload.storage_key)
+
+    def start(self, upload):
+        params = {
+            'Bucket': self.storage.bucket_name,
+            'Key': self.key(upload),
+            'ContentType': upload.content_type,
+        }
+        if self.storage.default_acl:
+            params['ACL'] = self.storage.default_acl
+        response = self.client.create_multipart_upload(**params)
+        upload.backend_upload_id = response['UploadId']
+
+    def write_chunk(self, upload, offset, stream, length, checksum):
+        """
+        Subir el bloque como parte del multipart upload.
+
+        El bloque se limita a chunk_size bytes, así que la memoria usada
+        por petición está acotada independientemente del tamaño del video.
+        """
+        data = stream.read(length)
+        if len(data) != length:
+            raise DirectUploadError("El bloque llegó incompleto")
+        if hashlib.sha256(data).hexdigest() != checksum:
+            raise ChunkChecksumMismatch("El checksum del bloque no coincide")
+
+        part_number = offset // upload.chunk_size + 1
+        response = self.client.upload_part(
+            Bucket=self.storage.bucket_name,
+            Key=self.key(upload),
+            UploadId=upload.backend_upload_id,
+            PartNumber=part_number,
+            Body=data
+        )
+        return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+    def complete(self, upload):
+        parts = sorted(upload.parts, key=lambda part: part['PartNumber'])
+        self.client.complete_multipart_upload(
+            Bucket=self.storage.bucket_name,
+            Key=self.key(upload),
+            UploadId=upload.backend_upload_id,
+            MultipartUpload={'Parts': parts}
+        )
+        # El objeto se escribió fuera de _save: registrarlo para deduplicar
+        if hasattr(self.storage, 'adopt'):
+            return self.storage.adopt(upload.storage_key)
+        return upload.storage_key
+
+    def abort(self, upload):
+        if not upload.backend_upload_id:
+            return
+        try:
+            self.client.abort_multipart_upload(
+                Bucket=self.storage.bucket_name,
+                Key=self.key(upload),
+                UploadId=upload.backend_upload_id
+            )
+        except Exception as e:
+            logger.error(
+                f"Error cancelando multipart upload {upload.id}: {str(e)}")
+
+
+def get_chunk_backend(name=None, storage=None):
+    """Elegir el backend de bloques según el almacenamiento configurado"""
+    storage = storage or default_storage
+    try:
+        from storages.backends.s3boto3 import S3Boto3Storage
+    except ImportError:
+        S3Boto3Storage = None
+
+    is_s3 = S3Boto3Storage is not None and isinstance(storage, S3Boto3Storage)
+    if name == 's3' or (name is None and is_s3):
+        return S3ChunkBackend(storage)
+    return LocalChunkBackend()
+
+
+class ChunkedUploadService:
+    """Servicio para subidas reanudables de videos de stories"""
+
+    def start(self, user, content_type, total_size):
+        """Crear una subida por bloques"""
+        extension = VIDEO_CONTENT_TYPES.get(content_type)
+        if extension is None:
+            raise DirectUploadError(
+                f"Tipo de contenido no permitido. Use: {', '.join(VIDEO_CONTENT_TYPES)}")
+        if total_size <= 0:
+            raise DirectUploadError("El tamaño del archivo no es válido")
+        if total_size > settings.DIRECT_UPLOAD_MAX_VIDEO_SIZE:
+            raise DirectUploadError(
+                "El archivo supera el tamaño máximo permitido")
+
+        backend = get_chunk_backend()
+        upload = ChunkedUpload(
+            user=user,
+            storage_key=f'stories/{user.username}/{uuid.uuid4()}.{extension}',
+            content_type=content_type,
+            total_size=total_size,
+            chunk_size=settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+            backend=backend.name,
+            expires_at=timezone.now() + timedelta(
+                hours=settings.CHUNKED_UPLOAD_EXPIRY_HOURS)
+        )
+        backend.start(upload)
+        upload.save()
+        return upload
+
+    def write_chunk(self, upload, offset, stream, length, checksum):
+        """
+        Escribir un bloque en la posición confirmada.
+
+        Todos los bloques salvo el último deben medir chunk_size. Devuelve
+        la subida con el nuevo offset.
+        """
+        if upload.status != 'uploading' or upload.is_expired:
+            raise DirectUploadError("La subida ya no acepta bloques")
+
+        end = offset + length
+        if length <= 0 or end > upload.total_size:
+            raise DirectUploadError("El bloque excede el tamaño declarado")
+        if end < upload.total_size and length != upload.chunk_size:
+            raise DirectUploadError(
+                f"Los bloques deben medir {upload.chunk_size} bytes")
+
+        backend = get_chunk_backend(upload.backend)
+        part = backend.write_chunk(
+            upload, offset, stream, length, checksum.lower())
+
+        if part is not None:
+            upload.parts = [
+                p for p in upload.parts
+                if p['PartNumber'] != part['PartNumber']
+            ] + [part]
+
+        # Avanzar el offset solo si nadie lo movió mientras tanto
+        updated = ChunkedUpload.objects.filter(
+            id=upload.id, offset=offset
+        ).update(offset=end, parts=upload.parts, updated_at=timezone.now())
+        if updated:
+            upload.offset = end
+        else:
+            upload.refresh_from_db()
+        return upload
+
+    def finalize(self, upload, data):
+        """Ensamblar el video, validarlo y crear la Story"""
+        if upload.status != 'uploading':
+            raise DirectUploadError("Esta subida ya fue finalizada")
+        if not upload.is_complete:
+            raise DirectUploadError(
+                f"Faltan bytes: recibidos {upload.offset} de {upload.total_size}")
+
+        backend = get_chunk_backend(upload.backend)
+        try:
+            upload.storage_key = backend.complete(upload)
+            validate_stored_content(upload.storage_key, upload.content_type)
+            story = create_story_from_upload(
+                upload.user, upload.storage_key, upload.content_type, data)
+        except DirectUploadError as e:
+            if default_storage.exists(upload.storage_key):
+                default_storage.delete(upload.storage_key)
+            upload.status = 'failed'
+            upload.error_message = str(e)
+            upload.save(update_fields=[
+                'storage_key', 'status', 'error_message'])
+            raise
+
+        upload.status = 'completed'
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=['storage_key', 'status', 'completed_at'])
+        return story
+
+    def abort(self, upload):
+        """Cancelar una subida y liberar sus bloques"""
+        get_chunk_backend(upload.backend).abort(upload)
+        upload.status = 'aborted'
+        upload.save(update_fields=['status'])
+
+
+# Instancia global del servicio
+chunked_upload_service = ChunkedUploadService()
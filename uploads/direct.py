@@ -0,0 +1,322 @@
+"""
+Subidas directas al almacenamiento con URL firmada
+
+El cliente pide un slot y sube el archivo directamente a S3 con un POST
+multipart prefirmado (los campos de "fields" y después el archivo como
+"file") o, con almacenamiento local, con un PUT a un endpoint firmado que
+escribe en el FileSystemStorage. Después llama a finalize, que valida el
+archivo y lo asocia al avatar, al post o a una nueva story, disparando el
+procesamiento de variantes.
+
+En los dos casos el tamaño máximo del slot se aplica al recibir el
+archivo: la política del POST lleva content-length-range y S3 rechaza los
+cuerpos mayores, y el endpoint local corta la copia.
+"""
+import logging
+import tempfile
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core import signing
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import UploadSlot
+from .storage import s3_object_key
+
+logger = logging.getLogger(__name__)
+
+IMAGE_CONTENT_TYPES = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+}
+
+VIDEO_CONTENT_TYPES = {
+    'video/mp4': 'mp4',
+    'video/quicktime': 'mov',
+    'video/webm': 'webm',
+}
+
+# Tipos de contenido aceptados por cada tipo de slot
+KIND_CONTENT_TYPES = {
+    'avatar': IMAGE_CONTENT_TYPES,
+    'post_image': IMAGE_CONTENT_TYPES,
+    'story': {**IMAGE_CONTENT_TYPES, **VIDEO_CONTENT_TYPES},
+}
+
+# Máximo de imágenes adicionales por post (igual que PostCreateSerializer)
+MAX_POST_IMAGES = 5
+
+
+class DirectUploadError(Exception):
+    """Error de validación de una subida directa"""
+
+
+class UploadAlreadyReceived(DirectUploadError):
+    """El slot ya tiene un archivo: cada URL firmada admite un solo PUT"""
+
+
+class LocalDirectUploadBackend:
+    """Subida a un endpoint firmado de Django que escribe en disco"""
+    name = 'local'
+    signing_salt = 'uploads.direct'
+
+    def __init__(self, storage=None):
+        self.storage = storage or default_storage
+
+    def presign(self, slot, request=None):
+        token = signing.dumps(str(slot.id), salt=self.signing_salt)
+        url = reverse('uploads:direct_upload_put', kwargs={'token': token})
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        return {
+            'method': 'PUT',
+            'url': url,
+            'headers': {'Content-Type': slot.content_type},
+        }
+
+    def load_slot_id(self, token):
+        """Obtener el id del slot de un token (lanza BadSignature)"""
+        return signing.loads(token, salt=self.signing_salt,
+                             max_age=settings.DIRECT_UPLOAD_EXPIRY)
+
+
+class S3DirectUploadBackend:
+    """Subida directa a S3 con un POST prefirmado limitado al tamaño del slot"""
+    name = 's3'
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def presign(self, slot, request=None):
+        fields = {'Content-Type': slot.content_type}
+        conditions = [
+            ['content-length-range', 1, slot.max_size],
+            {'Content-Type': slot.content_type},
+        ]
+        if self.storage.default_acl:
+            fields['acl'] = self.storage.default_acl
+            conditions.append({'acl': self.storage.default_acl})
+
+        post = self.storage.bucket.meta.client.generate_presigned_post(
+            Bucket=self.storage.bucket_name,
+            Key=s3_object_key(self.storage, slot.storage_key),
+            Fields=fields,
+            Conditions=conditions,
+            ExpiresIn=settings.DIRECT_UPLOAD_EXPIRY,
+        )
+        return {'method': 'POST', 'url': post['url'], 'fields': post['fields']}
+
+
+def get_direct_upload_backend(storage=None):
+    """Elegir el backend según el almacenamiento configurado"""
+    storage = storage or default_storage
+    try:
+        from storages.backends.s3boto3 import S3Boto3Storage
+    except ImportError:
+        S3Boto3Storage = None
+
+    if S3Boto3Storage is not None and isinstance(storage, S3Boto3Storage):
+        return S3DirectUploadBackend(storage)
+    return LocalDirectUploadBackend(storage)
+
+
+def validate_stored_content(name, content_type):
+    """Comprobar que el archivo almacenado corresponde al tipo declarado"""
+    with default_storage.open(name, 'rb') as f:
+        if content_type.startswith('image/'):
+            from .imaging import open_image, ImageTooLarge
+            try:
+                open_image(f, settings.IMAGE_MAX_PIXELS).verify()
+            except ImageTooLarge:
+                raise DirectUploadError("La imagen tiene demasiados píxeles")
+            except Exception:
+                raise DirectUploadError("El archivo no es una imagen válida")
+        else:
+            header = f.read(12)
+            is_iso_media = header[4:8] == b'ftyp'  # mp4 / mov
+            is_webm = header[:4] == b'\x1a\x45\xdf\xa3'
+            if not (is_iso_media or is_webm):
+                raise DirectUploadError("El archivo no es un video válido")
+
+
+def create_story_from_upload(user, name, content_type, data):
+    """Crear una story con un archivo ya almacenado"""
+    from .serializers import DirectStoryFinalizeSerializer
+
+    serializer = DirectStoryFinalizeSerializer(data=data)
+    if not serializer.is_valid():
+        raise DirectUploadError(str(serializer.errors))
+    return serializer.save(
+        author=user,
+        story_type='image' if content_type.startswith('image/') else 'video',
+        media_file=name
+    )
+
+
+class DirectUploadService:
+    """Servicio para crear, recibir y finalizar subidas directas"""
+
+    def create_slot(self, user, kind, content_type):
+        """Reservar una ruta en el almacenamiento para una subida directa"""
+        content_types = KIND_CONTENT_TYPES.get(kind)
+        if content_types is None:
+            raise DirectUploadError(f"Tipo de subida no válido: {kind}")
+
+        extension = content_types.get(content_type)
+        if extension is None:
+            raise DirectUploadError(
+                f"Tipo de contenido no permitido. Use: {', '.join(content_types)}")
+
+        if content_type in VIDEO_CONTENT_TYPES:
+            max_size = settings.DIRECT_UPLOAD_MAX_VIDEO_SIZE
+        else:
+            max_size = settings.DIRECT_UPLOAD_MAX_IMAGE_SIZE
+
+        return UploadSlot.objects.create(
+            user=user,
+            kind=kind,
+            storage_key=self._storage_key(user, kind, extension),
+            content_type=content_type,
+            max_size=max_size,
+            expires_at=timezone.now() + timedelta(
+                seconds=settings.DIRECT_UPLOAD_EXPIRY)
+        )
+
+    def _storage_key(self, user, kind, extension):
+        # Mismas rutas que user_avatar_path, post_multiple_images_path
+        # y story_media_path
+        filename = f'{uuid.uuid4()}.{extension}'
+        if kind == 'avatar':
+            return f'avatars/{user.username}/{filename}'
+        if kind == 'post_image':
+            return f'posts/{user.username}/images/{filename}'
+        return f'stories/{user.username}/{filename}'
+
+    def receive_local(self, slot, stream, chunk_size=64 * 1024):
+        """
+        Escribir el cuerpo de un PUT local en el almacenamiento.
+
+        Se copia por bloques a un archivo temporal para no cargarlo en
+        memoria y cortar en cuanto supera el tamaño máximo del slot. Solo
+        se acepta el primer PUT: uno repetido dejaría huérfano el archivo
+        anterior y su referencia en ContentBlob.
+        """
+        if slot.file_size:
+            raise UploadAlreadyReceived("El archivo de esta subida ya se recibió")
+
+        with tempfile.TemporaryFile() as tmp:
+            size = 0
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > slot.max_size:
+                    raise DirectUploadError(
+                        "El archivo supera el tamaño máximo permitido")
+                tmp.write(chunk)
+
+            tmp.seek(0)
+            name = default_storage.save(slot.storage_key, File(tmp))
+
+        # Solo gana uno de dos PUT simultáneos; el otro descarta su archivo
+        updated = UploadSlot.objects.filter(pk=slot.pk, file_size=0).update(
+            storage_key=name, file_size=size)
+        if not updated:
+            default_storage.delete(name)
+            raise UploadAlreadyReceived("El archivo de esta subida ya se recibió")
+
+        slot.storage_key = name
+        slot.file_size = size
+        return slot
+
+    def finalize(self, slot, data):
+        """
+        Validar el archivo subido y asociarlo a su destino.
+
+        Devuelve el objeto actualizado o creado (usuario, PostImage o Story).
+        """
+        if slot.status != 'pending':
+            raise DirectUploadError("Esta subida ya fue finalizada")
+        if slot.is_expired:
+            self._fail(slot, "La subida expiró")
+            raise DirectUploadError("La subida expiró")
+
+        if not default_storage.exists(slot.storage_key):
+            raise DirectUploadError("El archivo aún no se ha subido")
+
+        try:
+            size = default_storage.size(slot.storage_key)
+            if size > slot.max_size:
+                raise DirectUploadError(
+                    "El archivo supera el tamaño máximo permitido")
+            validate_stored_content(slot.storage_key, slot.content_type)
+
+            # Registrar el archivo en la deduplicación por contenido
+            if hasattr(default_storage, 'adopt'):
+                slot.storage_key = default_storage.adopt(slot.storage_key)
+
+            target = self._attach(slot, data)
+        except DirectUploadError as e:
+            self._fail(slot, str(e))
+            raise
+
+        slot.file_size = size
+        slot.status = 'completed'
+        slot.completed_at = timezone.now()
+        slot.save(update_fields=[
+            'storage_key', 'file_size', 'status', 'completed_at'])
+        return target
+
+    def _attach(self, slot, data):
+        """Asociar el archivo al avatar, a un post o a una nueva story"""
+        user = slot.user
+
+        if slot.kind == 'avatar':
+            user.avatar.name = slot.storage_key
+            user.save()
+            return user
+
+        if slot.kind == 'post_image':
+            from posts.models import Post, PostImage
+
+            post = Post.objects.filter(
+                id=data.get('post_id'), author=user).first()
+            if post is None:
+                raise DirectUploadError("Post no encontrado")
+
+            order = post.images.count()
+            if order >= MAX_POST_IMAGES:
+                raise DirectUploadError(
+                    f"Máximo {MAX_POST_IMAGES} imágenes por post")
+
+            image = PostImage(post=post, order=order + 1,
+                              alt_text=data.get('alt_text') or None)
+            image.image.name = slot.storage_key
+            image.save()
+            return image
+
+        return create_story_from_upload(
+            user, slot.storage_key, slot.content_type, data)
+
+    def _fail(self, slot, message):
+        """Marcar el slot como fallido y eliminar el archivo subido"""
+        try:
+            if default_storage.exists(slot.storage_key):
+                default_storage.delete(slot.storage_key)
+        except Exception as e:
+            logger.error(
+                f"Error eliminando subida directa {slot.id}: {str(e)}")
+
+        slot.status = 'failed'
+        slot.error_message = message
+        slot.save(update_fields=['status', 'error_message'])
+
+
+# Instancia global del servicio
+direct_upload_service = DirectUploadService()
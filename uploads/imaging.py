@@ -0,0 +1,157 @@
+"""
+Funciones puras de procesamiento de imágenes
+
+Este módulo se ejecuta dentro de los procesos del pool de imágenes, por lo
+que no debe tocar la base de datos, el almacenamiento ni los settings de
+Django: recibe bytes y parámetros explícitos y devuelve bytes.
+
+Las imágenes se abren leyendo solo la cabecera para validar sus
+dimensiones antes de reservar memoria para los píxeles. Al reducir JPEGs
+se usa el modo draft, que decodifica directamente a 1/2, 1/4 o 1/8 del
+tamaño con escalado DCT en lugar de decodificar la imagen completa.
+"""
+import base64
+import io
+
+
+class ImageTooLarge(ValueError):
+    """La imagen supera el límite de píxeles permitido"""
+
+
+def open_image(data, max_pixels):
+    """
+    Abre una imagen leyendo solo su cabecera y valida sus dimensiones.
+
+    Lanza ImageTooLarge si el número de píxeles supera max_pixels.
+    """
+    from PIL import Image
+
+    img = Image.open(io.BytesIO(data) if isinstance(data, bytes) else data)
+    width, height = img.size
+    if width * height > max_pixels:
+        raise ImageTooLarge(
+            f"La imagen de {width}x{height} supera el límite de {max_pixels} píxeles")
+    return img
+
+
+def prepare_for_resize(img, max_width, max_height):
+    """
+    Configura la decodificación reducida (solo JPEG) y convierte a RGB.
+
+    draft() elige la mayor escala DCT que sigue cubriendo el tamaño final,
+    así que la imagen nunca se decodifica a resolución completa si no hace
+    falta.
+    """
+    if img.format == 'JPEG' and (img.width > max_width or img.height > max_height):
+        img.draft('RGB', (max_width, max_height))
+
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img
+
+
+def compress_image_data(data, max_width, max_height, quality, max_pixels):
+    """
+    Decodifica, redimensiona y recodifica una imagen como JPEG
+    """
+    from PIL import Image
+
+    img = open_image(data, max_pixels)
+    img = prepare_for_resize(img, max_width, max_height)
+
+    # Redimensionar si es muy grande
+    if img.width > max_width or img.height > max_height:
+        img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+
+    # Guardar con compresión
+    output = io.BytesIO()
+    img.save(output, format='JPEG', quality=quality, optimize=True)
+    return output.getvalue()
+
+
+# Extensión y formato PIL para cada formato de variante
+VARIANT_FORMATS = {
+    'jpeg': ('jpg', 'JPEG'),
+    'webp': ('webp', 'WEBP'),
+}
+
+
+# Calidad JPEG de los placeholders: a este tamaño solo importan los colores
+PLACEHOLDER_QUALITY = 50
+
+# Colores de la paleta usada para calcular el color dominante
+DOMINANT_COLOR_PALETTE = 8
+
+
+def compute_placeholder(img, size):
+    """
+    Calcula el placeholder y el color dominante de una imagen RGB.
+
+    El placeholder es un JPEG de size píxeles de lado mayor codificado como
+    data URI, pensado para mostrarse escalado y difuminado mientras carga
+    la imagen real. El color dominante es el más frecuente tras reducir la
+    miniatura a una paleta pequeña, en formato #rrggbb.
+    """
+    from PIL import Image
+
+    small = img.copy()
+    small.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+    output = io.BytesIO()
+    small.save(output, format='JPEG', quality=PLACEHOLDER_QUALITY)
+    encoded = base64.b64encode(output.getvalue()).decode('ascii')
+
+    quantized = small.quantize(colors=DOMINANT_COLOR_PALETTE)
+    _, index = max(quantized.getcolors())
+    r, g, b = quantized.getpalette()[index * 3:index * 3 + 3]
+
+    return f'data:image/jpeg;base64,{encoded}', f'#{r:02x}{g:02x}{b:02x}'
+
+
+def generate_variants(data, sizes, formats, quality, max_pixels,
+                      placeholder_size=16):
+    """
+    Genera variantes de varios tamaños y formatos con una sola decodificación.
+
+    Los tamaños se procesan de mayor a menor reduciendo desde la variante
+    anterior, de modo que cada redimensionado trabaja sobre menos píxeles.
+    El placeholder y el color dominante se calculan al final a partir de la
+    variante más pequeña. Devuelve las dimensiones originales, el
+    placeholder y una lista de variantes con sus bytes codificados.
+    """
+    from PIL import Image
+
+    img = open_image(data, max_pixels)
+    original_size = img.size
+    largest = max(sizes, default=placeholder_size)
+    img = prepare_for_resize(img, largest, largest)
+
+    variants = []
+    current = img
+    for size in sorted(set(sizes), reverse=True):
+        if current.width > size or current.height > size:
+            current.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+        for fmt in formats:
+            extension, pil_format = VARIANT_FORMATS[fmt]
+            output = io.BytesIO()
+            current.save(output, format=pil_format,
+                         quality=quality, optimize=True)
+            variants.append({
+                'size': size,
+                'format': fmt,
+                'extension': extension,
+                'width': current.width,
+                'height': current.height,
+                'data': output.getvalue(),
+            })
+
+    placeholder, dominant_color = compute_placeholder(current, placeholder_size)
+
+    return {
+        'width': original_size[0],
+        'height': original_size[1],
+        'placeholder': placeholder,
+        'dominant_color': dominant_color,
+        'variants': variants,
+    }
@@ -0,0 +1,120 @@
+"""
+Comando de gestión para comparar memoria y latencia del decodificado de imágenes
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils import IMAGE_MAX_WIDTH, IMAGE_MAX_HEIGHT, IMAGE_QUALITY
+
+# Corpus sintético por defecto: (nombre, formato, ancho, alto)
+DEFAULT_CORPUS = [
+    ('photo_24mp.jpg', 'JPEG', 6000, 4000),
+    ('photo_48mp.jpg', 'JPEG', 8000, 6000),
+    ('screenshot_25mp.png', 'PNG', 5000, 5000),
+]
+
+MODES = ['full', 'draft']
+
+
+class Command(BaseCommand):
+    """Comando para medir pico de RSS y latencia por imagen y modo"""
+    help = ('Compara el decodificado completo con el decodificado por cabecera '
+            'y modo draft sobre un corpus de imágenes grandes')
+
+    def add_arguments(self, parser):
+        """Argumentos del comando"""
+        parser.add_argument(
+            '--corpus',
+            help='Directorio con imágenes a medir (por defecto se genera uno sintético)',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Repeticiones por imagen y modo (se reporta la mediana)',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Imprime los resultados en JSON',
+        )
+
+    def handle(self, *args, **options):
+        """Ejecuta el benchmark"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if options['corpus']:
+                paths = self._load_corpus(options['corpus'])
+            else:
+                self.stdout.write('Generando corpus sintético...')
+                paths = self._generate_corpus(tmp_dir)
+
+            results = [
+                self._measure(path, mode, options['repeat'])
+                for path in paths
+                for mode in MODES
+            ]
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'imagen':<24}{'modo':<8}{'pico RSS (MB)':>15}{'latencia (ms)':>15}")
+        for result in results:
+            self.stdout.write(
+                f"{result['image']:<24}{result['mode']:<8}"
+                f"{result['peak_rss_kb'] / 1024:>15.1f}"
+                f"{result['seconds'] * 1000:>15.1f}"
+            )
+
+    def _load_corpus(self, directory):
+        if not os.path.isdir(directory):
+            raise CommandError(f'No existe el directorio {directory}')
+        paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(('.jpg', '.jpeg', '.png', '.webp'))
+        )
+        if not paths:
+            raise CommandError('El corpus no contiene imágenes')
+        return paths
+
+    def _generate_corpus(self, directory):
+        from PIL import Image
+
+        paths = []
+        for name, fmt, width, height in DEFAULT_CORPUS:
+            # Ruido para que el archivo tenga un tamaño realista
+            noise = Image.effect_noise((width, height), 64)
+            img = Image.merge('RGB', (noise, noise.rotate(90, expand=False), noise))
+            path = os.path.join(directory, name)
+            img.save(path, format=fmt)
+            paths.append(path)
+        return paths
+
+    def _measure(self, path, mode, repeat):
+        """Ejecutar el caso en procesos nuevos y devolver la mediana"""
+        runs = []
+        for _ in range(repeat):
+            completed = subprocess.run(
+                [sys.executable, '-m', 'uploads.benchmark', mode, path,
+                 str(IMAGE_MAX_WIDTH), str(IMAGE_MAX_HEIGHT),
+                 str(IMAGE_QUALITY), str(settings.IMAGE_MAX_PIXELS)],
+                capture_output=True, text=True, cwd=settings.BASE_DIR
+            )
+            if completed.returncode != 0:
+                raise CommandError(
+                    f'Falló el caso {mode} de {path}:\n{completed.stderr}')
+            runs.append(json.loads(completed.stdout))
+
+        return {
+            'image': os.path.basename(path),
+            'mode': mode,
+            'peak_rss_kb': statistics.median(r['peak_rss_kb'] for r in runs),
+            'seconds': statistics.median(r['seconds'] for r in runs),
+        }
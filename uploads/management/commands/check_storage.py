@@ -0,0 +1,37 @@
+"""
+Comando de gestión para comprobar el almacenamiento de archivos
+"""
+import json
+from django.core.management.base import BaseCommand, CommandError
+
+from uploads.storage_health import storage_health
+
+
+class Command(BaseCommand):
+    """Comando para verificar credenciales y acceso al almacenamiento"""
+    help = ('Comprueba que el almacenamiento configurado (bucket S3 o '
+            'MEDIA_ROOT local) responde; termina con error si no')
+
+    def add_arguments(self, parser):
+        """Argumentos del comando"""
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Imprime el resultado en JSON',
+        )
+
+    def handle(self, *args, **options):
+        """Ejecuta la comprobación"""
+        result = storage_health.check(refresh=True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+        elif result['ok']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Almacenamiento {result['backend']} disponible "
+                f"({result['latency_ms']} ms)"))
+
+        if not result['ok']:
+            raise CommandError(
+                f"Almacenamiento {result['backend']} no disponible: "
+                f"{result['error']}")
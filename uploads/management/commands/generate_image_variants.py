@@ -0,0 +1,59 @@
+"""
+Comando de gestión para generar variantes y placeholders pendientes
+"""
+import time
+from django.core.management.base import BaseCommand
+
+from uploads.variants import image_variant_service
+from uploads.workers import image_processing_pool
+
+
+class Command(BaseCommand):
+    """Comando para encolar la generación de variantes de imágenes"""
+    help = ('Genera las variantes y placeholders de las imágenes; con '
+            '--missing solo las que no los tienen (p. ej. porque el pool '
+            'estaba saturado al subirlas)')
+
+    def add_arguments(self, parser):
+        """Argumentos del comando"""
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Solo imágenes sin manifiesto o placeholder del archivo actual',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra qué se generaría sin hacer cambios reales',
+        )
+
+    def handle(self, *args, **options):
+        """Encola cada imagen respetando el límite del pool y espera"""
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.WARNING(
+                    'MODO DRY-RUN: No se realizarán cambios reales.'))
+
+        scheduled = 0
+        try:
+            for instance, field_name, manifest_field in \
+                    image_variant_service.targets(options['missing']):
+                if options['dry_run']:
+                    self.stdout.write(
+                        f'  {instance._meta.label} {instance.pk}: '
+                        f'{getattr(instance, field_name).name}')
+                    scheduled += 1
+                    continue
+                # El pool de este proceso solo lo usa el comando
+                while image_processing_pool.pending >= image_processing_pool.max_pending:
+                    time.sleep(0.1)
+                if image_variant_service.schedule(
+                        instance, field_name, manifest_field):
+                    scheduled += 1
+            while image_processing_pool.pending:
+                time.sleep(0.1)
+        finally:
+            image_processing_pool.shutdown()
+
+        label = 'a procesar' if options['dry_run'] else 'procesadas'
+        self.stdout.write(self.style.SUCCESS(f'Imágenes {label}: {scheduled}'))
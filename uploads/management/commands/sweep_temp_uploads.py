@@ -0,0 +1,68 @@
+"""
+Comando de gestión para limpiar subidas temporales caducadas
+"""
+import time
+from django.core.management.base import BaseCommand
+
+from social_network_backend.metrics import metrics
+from uploads.sweeper import temp_upload_sweeper
+
+
+class Command(BaseCommand):
+    """Comando para eliminar en lote temp-uploads y subidas expiradas"""
+    help = ('Elimina las imágenes de temp-uploads más antiguas que el TTL '
+            'y las subidas directas o por bloques expiradas')
+
+    def add_arguments(self, parser):
+        """Argumentos del comando"""
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Muestra qué se eliminaría sin hacer cambios reales',
+        )
+        parser.add_argument(
+            '--include-untracked',
+            action='store_true',
+            help='Recorre temp-uploads y elimina archivos antiguos sin registro',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Repetir la limpieza cada N segundos (0 = una sola pasada)',
+        )
+
+    def handle(self, *args, **options):
+        """Ejecuta la limpieza una vez o en bucle"""
+        while True:
+            result = temp_upload_sweeper.sweep(
+                dry_run=options['dry_run'],
+                include_untracked=options['include_untracked'])
+            self._report(result, options['dry_run'])
+
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def _report(self, result, dry_run):
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING(
+                    'MODO DRY-RUN: No se realizarán cambios reales.'))
+
+        mb = result['bytes_reclaimed'] / (1024 * 1024)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Limpieza completada:\n'
+                f'  - Imágenes temporales expiradas: {result["uploads_expired"]}\n'
+                f'  - Subidas directas expiradas: {result["slots_expired"]}\n'
+                f'  - Subidas por bloques canceladas: {result["chunked_aborted"]}\n'
+                f'  - Archivos sin registro eliminados: {result["untracked_deleted"]}\n'
+                f'  - Archivos eliminados: {result["files_deleted"]}\n'
+                f'  - Espacio recuperado: {mb:.2f} MB\n'
+                f'  - Total recuperado por este proceso: '
+                f'{metrics.get("temp_uploads.bytes_reclaimed") / (1024 * 1024):.2f} MB'
+            )
+        )
+        for error in result['errors'][:10]:
+            self.stdout.write(self.style.ERROR(f'  Error: {error}'))
@@ -0,0 +1,187 @@
+"""
+Resolución de URLs de archivos media con caché
+
+Cada fila de un listado pide la URL de su avatar, imagen o media. Con S3
+eso pasa por la maquinaria del backend de almacenamiento (y por la firma
+si los archivos son privados) en cada llamada. Este módulo:
+
+- Memoriza las URLs públicas por ruta de almacenamiento.
+- Guarda las URLs firmadas hasta poco antes de que expiren.
+- Ofrece resolve_many() para resolver de una vez todas las rutas de una
+  página; MediaURLListSerializer lo usa antes de serializar las filas.
+
+En almacenamiento local la URL es MEDIA_URL + ruta y no se cachea.
+"""
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.db.models.fields.files import FieldFile
+from django.dispatch import receiver
+from rest_framework import serializers
+
+from social_network_backend.metrics import metrics
+
+
+def _signed_url_expiry(storage):
+    """Segundos de validez de las URLs del backend, o None si no se firman"""
+    if getattr(storage, 'cloudfront_signer', None):
+        return storage.querystring_expire
+    if getattr(storage, 'custom_domain', None):
+        return None
+    if getattr(storage, 'querystring_auth', False):
+        return storage.querystring_expire
+    return None
+
+
+class MediaURLResolver:
+    """Caché LRU de URLs de archivos del almacenamiento por defecto"""
+
+    def __init__(self, max_entries=None):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        # ruta -> (url, instante de caducidad en time.monotonic() o None)
+        self._cache = OrderedDict()
+
+    @property
+    def max_entries(self):
+        return self._max_entries or settings.MEDIA_URL_CACHE_SIZE
+
+    def resolve(self, name):
+        """URL de un archivo a partir de su ruta en el almacenamiento"""
+        if not name:
+            return None
+        return self.resolve_many([name])[name]
+
+    def resolve_many(self, names):
+        """
+        Resolver varias rutas con una sola pasada por la caché.
+
+        Devuelve un diccionario ruta -> URL. Las rutas vacías se ignoran.
+        """
+        names = [name for name in dict.fromkeys(names) if name]
+        if not settings.USE_S3:
+            return {name: f"{settings.MEDIA_URL}{name}" for name in names}
+
+        now = time.monotonic()
+        urls, missing = {}, []
+        with self._lock:
+            for name in names:
+                entry = self._cache.get(name)
+                if entry is not None and (entry[1] is None or entry[1] > now):
+                    self._cache.move_to_end(name)
+                    urls[name] = entry[0]
+                else:
+                    missing.append(name)
+
+        metrics.increment('media_urls.cache_hits', len(urls))
+        if not missing:
+            return urls
+        metrics.increment('media_urls.cache_misses', len(missing))
+
+        storage = default_storage
+        expiry = _signed_url_expiry(storage)
+        expires_at = None
+        if expiry is not None:
+            # Renovar antes de que el cliente reciba una URL casi caducada
+            margin = max(expiry * settings.MEDIA_URL_SIGNED_MARGIN, 1)
+            expires_at = now + expiry - margin
+
+        resolved = {name: storage.url(name) for name in missing}
+        urls.update(resolved)
+
+        with self._lock:
+            for name, url in resolved.items():
+                self._cache[name] = (url, expires_at)
+                self._cache.move_to_end(name)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return urls
+
+    def url_epoch(self):
+        """
+        Periodo actual de las URLs firmadas, o 0 si no se firman.
+
+        Cambia cada tanto como dura una URL en la caché; los ETags lo
+        incluyen para que un 304 no deje al cliente con URLs caducadas.
+        """
+        if not settings.USE_S3:
+            return 0
+        expiry = _signed_url_expiry(default_storage)
+        if expiry is None:
+            return 0
+        margin = max(expiry * settings.MEDIA_URL_SIGNED_MARGIN, 1)
+        return int(time.time() // max(expiry - margin, 1))
+
+    def invalidate(self, name):
+        """Descartar la URL cacheada de una ruta"""
+        with self._lock:
+            self._cache.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+# Instancia global del resolvedor
+media_url_resolver = MediaURLResolver()
+
+
+@receiver(setting_changed)
+def clear_media_url_cache(setting, **kwargs):
+    """Las URLs dependen de la configuración del almacenamiento"""
+    if setting in ('USE_S3', 'MEDIA_URL', 'DEFAULT_FILE_STORAGE') \
+            or setting.startswith('AWS_'):
+        media_url_resolver.clear()
+
+
+def collect_media_names(value):
+    """
+    Rutas de almacenamiento referenciadas por un valor: un archivo, un
+    manifiesto de variantes o una lista de ellos
+    """
+    if isinstance(value, FieldFile):
+        return [value.name] if value else []
+    if isinstance(value, dict):
+        names = [value.get('source')]
+        for entry in value.get('variants', {}).values():
+            names.extend(entry.get(fmt)
+                         for fmt in settings.IMAGE_VARIANT_FORMATS)
+        return [name for name in names if name]
+    if isinstance(value, (list, tuple)):
+        return [name for item in value for name in collect_media_names(item)]
+    return []
+
+
+def _get_path(obj, path):
+    for attr in path.split('.'):
+        if obj is None:
+            return None
+        obj = getattr(obj, attr, None)
+    return obj
+
+
+class MediaURLListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer que resuelve de una vez las URLs de toda la página.
+
+    El serializer hijo declara en Meta.media_fields las rutas de atributos
+    (por ejemplo 'author.avatar') con archivos o manifiestos; después cada
+    fila encuentra sus URLs ya en caché.
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if hasattr(data, 'all') else data
+        items = list(iterable)
+
+        paths = getattr(self.child.Meta, 'media_fields', ())
+        names = []
+        for item in items:
+            for path in paths:
+                names.extend(collect_media_names(_get_path(item, path)))
+        if names:
+            media_url_resolver.resolve_many(names)
+
+        return super().to_representation(items)
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('uploads', '0002_content_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSlot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('avatar', 'Avatar'), ('post_image', 'Imagen de Post'), ('story', 'Story')], max_length=20)),
+                ('storage_key', models.CharField(max_length=500)),
+                ('content_type', models.CharField(max_length=100)),
+                ('max_size', models.PositiveBigIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('completed', 'Completado'), ('failed', 'Falló')], default='pending', max_length=20)),
+                ('file_size', models.PositiveBigIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_slots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Subida Directa',
+                'verbose_name_plural': 'Subidas Directas',
+                'db_table': 'upload_slots',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='upload_slot_user_id_08a502_idx'), models.Index(fields=['status', 'expires_at'], name='upload_slot_status_5c883b_idx')],
+            },
+        ),
+    ]
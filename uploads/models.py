@@ -0,0 +1,207 @@
+"""
+Modelos para el procesamiento de archivos subidos
+"""
+import uuid
+from django.db import models
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class ImageUpload(models.Model):
+    """
+    Handle de una imagen subida que se procesa fuera del request
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('processing', 'Procesando'),
+        ('completed', 'Completado'),
+        ('failed', 'Falló'),
+        ('expired', 'Expirado'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='image_uploads')
+    batch_id = models.UUIDField(null=True, blank=True)
+    original_name = models.CharField(max_length=255)
+
+    # Resultado del procesamiento
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='pending')
+    file_path = models.CharField(max_length=500, blank=True)
+    file_size = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+
+    # Timestamps
+    created_at = models.DateTimeField(default=timezone.now)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'image_uploads'
+        verbose_name = 'Imagen Subida'
+        verbose_name_plural = 'Imágenes Subidas'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.original_name} de {self.user.username} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed', 'expired')
+
+    @property
+    def file_url(self):
+        """URL del archivo procesado (None mientras no termine)"""
+        if not self.file_path:
+            return None
+        from utils import FileUploadHandler
+        return FileUploadHandler.get_url_for_name(self.file_path)
+
+
+class ContentBlob(models.Model):
+    """
+    Archivo almacenado una sola vez e identificado por el hash de su contenido.
+
+    Cada guardado de contenido idéntico reutiliza el mismo objeto e
+    incrementa ref_count; el archivo físico se elimina cuando la última
+    referencia se libera.
+    """
+    digest = models.CharField(max_length=64, unique=True)  # SHA-256 en hex
+    name = models.CharField(max_length=500, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_referenced_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'content_blobs'
+        verbose_name = 'Blob de Contenido'
+        verbose_name_plural = 'Blobs de Contenido'
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} refs)"
+
+
+class UploadSlot(models.Model):
+    """
+    Reserva para una subida directa al almacenamiento (sin pasar por Django).
+
+    El cliente obtiene una URL firmada, sube el archivo directamente y
+    llama a finalize para validarlo y asociarlo a su destino.
+    """
+    KIND_CHOICES = [
+        ('avatar', 'Avatar'),
+        ('post_image', 'Imagen de Post'),
+        ('story', 'Story'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('completed', 'Completado'),
+        ('failed', 'Falló'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='upload_slots')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    storage_key = models.CharField(max_length=500)
+    content_type = models.CharField(max_length=100)
+    max_size = models.PositiveBigIntegerField()
+
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='pending')
+    file_size = models.PositiveBigIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'upload_slots'
+        verbose_name = 'Subida Directa'
+        verbose_name_plural = 'Subidas Directas'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} de {self.user.username} ({self.status})"
+
+    @property
+    def is_expired(self):
+        return timezone.now() > self.expires_at
+
+    @property
+    def is_image(self):
+        return self.content_type.startswith('image/')
+
+
+class ChunkedUpload(models.Model):
+    """
+    Subida reanudable por bloques de un video de story.
+
+    Cada bloque se escribe en su posición (archivo local con offset o
+    parte de un multipart upload de S3), de modo que el archivo completo
+    nunca se carga en memoria y una conexión cortada puede continuar desde
+    el último offset confirmado.
+    """
+    STATUS_CHOICES = [
+        ('uploading', 'Subiendo'),
+        ('completed', 'Completado'),
+        ('failed', 'Falló'),
+        ('aborted', 'Cancelado'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    storage_key = models.CharField(max_length=500)
+    content_type = models.CharField(max_length=100)
+    total_size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+
+    # Estado del backend (id del multipart upload de S3 y sus partes)
+    backend = models.CharField(max_length=10)
+    backend_upload_id = models.CharField(max_length=255, blank=True)
+    parts = models.JSONField(default=list, blank=True)
+
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default='uploading')
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'chunked_uploads'
+        verbose_name = 'Subida por Bloques'
+        verbose_name_plural = 'Subidas por Bloques'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.storage_key} ({self.offset}/{self.total_size})"
+
+    @property
+    def is_expired(self):
+        return timezone.now() > self.expires_at
+
+    @property
+    def is_complete(self):
+        return self.offset == self.total_size
@@ -0,0 +1,86 @@
+"""
+Serializers para el procesamiento de archivos subidos
+"""
+from django.urls import reverse
+from rest_framework import serializers
+from stories.models import Story
+from .models import ImageUpload, UploadSlot, ChunkedUpload
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    """Serializer para el estado de una imagen subida"""
+    file_url = serializers.ReadOnlyField()
+    status_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImageUpload
+        fields = [
+            'id', 'batch_id', 'original_name', 'status', 'file_path',
+            'file_url', 'file_size', 'error_message', 'created_at',
+            'completed_at', 'status_url'
+        ]
+        read_only_fields = fields
+
+    def get_status_url(self, obj):
+        return reverse('uploads:upload_status', kwargs={'pk': obj.id})
+
+
+class UploadSlotSerializer(serializers.ModelSerializer):
+    """Serializer para una subida directa al almacenamiento"""
+    finalize_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSlot
+        fields = [
+            'id', 'kind', 'content_type', 'max_size', 'status',
+            'storage_key', 'file_size', 'error_message', 'created_at',
+            'expires_at', 'completed_at', 'finalize_url'
+        ]
+        read_only_fields = fields
+
+    def get_finalize_url(self, obj):
+        return reverse('uploads:direct_upload_finalize', kwargs={'pk': obj.id})
+
+
+class UploadSlotCreateSerializer(serializers.Serializer):
+    """Datos para reservar una subida directa"""
+    kind = serializers.ChoiceField(choices=UploadSlot.KIND_CHOICES)
+    content_type = serializers.CharField(max_length=100)
+
+
+class DirectStoryFinalizeSerializer(serializers.ModelSerializer):
+    """Campos opcionales de la story creada al finalizar una subida"""
+
+    class Meta:
+        model = Story
+        fields = [
+            'content', 'is_public', 'allow_replies',
+            'duration_hours', 'music_track'
+        ]
+
+
+class ChunkedUploadSerializer(serializers.ModelSerializer):
+    """Serializer para el estado de una subida por bloques"""
+    upload_url = serializers.SerializerMethodField()
+    finalize_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ChunkedUpload
+        fields = [
+            'id', 'content_type', 'total_size', 'chunk_size', 'offset',
+            'status', 'error_message', 'created_at', 'expires_at',
+            'completed_at', 'upload_url', 'finalize_url'
+        ]
+        read_only_fields = fields
+
+    def get_upload_url(self, obj):
+        return reverse('uploads:chunked_upload_detail', kwargs={'pk': obj.id})
+
+    def get_finalize_url(self, obj):
+        return reverse('uploads:chunked_upload_finalize', kwargs={'pk': obj.id})
+
+
+class ChunkedUploadCreateSerializer(serializers.Serializer):
+    """Datos para iniciar una subida por bloques"""
+    content_type = serializers.CharField(max_length=100)
+    total_size = serializers.IntegerField(min_value=1)
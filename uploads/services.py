@@ -0,0 +1,131 @@
+"""
+Servicio para el procesamiento de imágenes subidas
+"""
+import logging
+import uuid
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from social_network_backend.websockets import encode_frame
+from .imaging import compress_image_data
+from .models import ImageUpload
+from .workers import image_processing_pool
+
+logger = logging.getLogger(__name__)
+
+
+class ImageUploadService:
+    """Servicio que entrega las imágenes subidas al pool de procesos"""
+
+    def start_uploads(self, user, files):
+        """
+        Registrar y encolar una lista de imágenes ya validadas.
+
+        Lanza ProcessingQueueFull si el pool no tiene espacio para todas.
+        """
+        image_processing_pool.acquire(len(files))
+
+        batch_id = uuid.uuid4() if len(files) > 1 else None
+        uploads = []
+        submitted = 0
+        try:
+            for image_file in files:
+                upload = ImageUpload.objects.create(
+                    user=user,
+                    batch_id=batch_id,
+                    original_name=image_file.name[:255]
+                )
+                uploads.append(upload)
+
+                image_file.seek(0)
+                self._submit(upload, image_file.read())
+                submitted += 1
+        finally:
+            # Liberar espacio reservado para trabajos que no se encolaron
+            if submitted < len(files):
+                image_processing_pool.release(len(files) - submitted)
+
+        if image_processing_pool.eager:
+            # En modo eager el procesamiento ya terminó
+            for upload in uploads:
+                upload.refresh_from_db()
+
+        return uploads
+
+    def start_upload(self, user, image_file):
+        """Registrar y encolar una sola imagen"""
+        return self.start_uploads(user, [image_file])[0]
+
+    def _submit(self, upload, data):
+        from utils import IMAGE_MAX_WIDTH, IMAGE_MAX_HEIGHT, IMAGE_QUALITY
+
+        ImageUpload.objects.filter(id=upload.id).update(status='processing')
+        upload.status = 'processing'
+
+        image_processing_pool.submit(
+            compress_image_data,
+            (data, IMAGE_MAX_WIDTH, IMAGE_MAX_HEIGHT, IMAGE_QUALITY,
+             settings.IMAGE_MAX_PIXELS),
+            lambda result, error: self.complete_upload(
+                upload.id, result, error)
+        )
+
+    def complete_upload(self, upload_id, result, error):
+        """Guardar el resultado del pool y notificar al usuario"""
+        upload = ImageUpload.objects.select_related('user').get(id=upload_id)
+
+        if error is not None:
+            logger.error(
+                f"Error procesando imagen {upload_id}: {str(error)}")
+            upload.status = 'failed'
+            upload.error_message = f'Error al procesar la imagen: {str(error)}'
+        else:
+            try:
+                file_path = f"temp-uploads/{upload.user.username}/{uuid.uuid4()}.jpg"
+                upload.file_path = default_storage.save(
+                    file_path, ContentFile(result))
+                upload.file_size = len(result)
+                upload.status = 'completed'
+            except Exception as e:
+                logger.error(
+                    f"Error guardando imagen {upload_id}: {str(e)}")
+                upload.status = 'failed'
+                upload.error_message = f'Error al guardar la imagen: {str(e)}'
+
+        upload.completed_at = timezone.now()
+        upload.save(update_fields=[
+            'status', 'file_path', 'file_size', 'error_message', 'completed_at'
+        ])
+
+        self.send_upload_event(upload)
+        return upload
+
+    def send_upload_event(self, upload):
+        """Enviar evento de finalización via WebSocket de notificaciones"""
+        try:
+            channel_layer = get_channel_layer()
+            if not channel_layer:
+                return
+
+            from .serializers import ImageUploadSerializer
+            async_to_sync(channel_layer.group_send)(
+                f"user_{upload.user_id}_notifications",
+                {
+                    'type': 'upload_status',
+                    **encode_frame({
+                        'type': 'upload_processed',
+                        'data': ImageUploadSerializer(upload).data
+                    })
+                }
+            )
+        except Exception as e:
+            logger.error(
+                f"Error enviando evento de upload {upload.id}: {str(e)}")
+
+
+# Instancia global del servicio
+image_upload_service = ImageUploadService()
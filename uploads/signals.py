@@ -0,0 +1,86 @@
+"""
+Señales para generar variantes y placeholders de las imágenes de avatares,
+posts, stories y mensajes de chat
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from social_network_backend.object_cache import object_cache
+from .variants import image_variant_service, media_fields_updated
+
+
+def _schedule_variants(instance, field_name, manifest_field):
+    """Encolar variantes tras el commit o limpiar si se quitó la imagen"""
+    manifest = (getattr(instance, manifest_field) or {}) if manifest_field else {}
+
+    if not getattr(instance, field_name):
+        cleared = {}
+        if manifest:
+            image_variant_service.delete_variants(manifest)
+            cleared[manifest_field] = {}
+        if getattr(instance, 'placeholder', ''):
+            cleared.update(placeholder='', dominant_color='')
+        if getattr(instance, 'placeholder_source', ''):
+            cleared['placeholder_source'] = ''
+        if cleared:
+            type(instance).objects.filter(pk=instance.pk).update(**cleared)
+            # update() no emite post_save
+            object_cache.invalidate(type(instance), instance.pk)
+            media_fields_updated.send(sender=type(instance), pk=instance.pk)
+        return
+
+    if image_variant_service.needs_variants(instance, field_name, manifest_field):
+        transaction.on_commit(
+            lambda: image_variant_service.schedule(
+                instance, field_name, manifest_field)
+        )
+
+
+@receiver(post_save, sender='users.User')
+def generate_avatar_variants(sender, instance, **kwargs):
+    """Generar variantes del avatar cuando cambia"""
+    _schedule_variants(instance, 'avatar', 'avatar_variants')
+
+
+@receiver(post_save, sender='posts.Post')
+def generate_post_image_variants(sender, instance, **kwargs):
+    """Generar variantes de la imagen principal del post"""
+    _schedule_variants(instance, 'image', 'image_variants')
+
+
+@receiver(post_save, sender='posts.PostImage')
+def generate_post_multiple_image_variants(sender, instance, **kwargs):
+    """Generar variantes de las imágenes adicionales del post"""
+    _schedule_variants(instance, 'image', 'image_variants')
+
+
+@receiver(post_save, sender='stories.Story')
+def generate_story_variants(sender, instance, **kwargs):
+    """
+    Generar variantes de stories de imagen; en las de video solo el
+    placeholder de su thumbnail
+    """
+    if instance.story_type == 'image':
+        _schedule_variants(instance, 'media_file', 'media_variants')
+    elif instance.story_type == 'video':
+        _schedule_variants(instance, 'thumbnail', None)
+
+
+@receiver(post_save, sender='chat.Message')
+def generate_message_placeholder(sender, instance, **kwargs):
+    """Calcular el placeholder de las imágenes de chat"""
+    if instance.message_type == 'image':
+        _schedule_variants(instance, 'image', None)
+
+
+@receiver(post_delete, sender='users.User')
+@receiver(post_delete, sender='posts.Post')
+@receiver(post_delete, sender='posts.PostImage')
+@receiver(post_delete, sender='stories.Story')
+def cleanup_image_variants(sender, instance, **kwargs):
+    """Eliminar los archivos de variantes al borrar el objeto"""
+    for manifest_field in ('avatar_variants', 'image_variants', 'media_variants'):
+        manifest = getattr(instance, manifest_field, None)
+        if manifest:
+            image_variant_service.delete_variants(manifest)
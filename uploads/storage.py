@@ -0,0 +1,196 @@
+"""
+Almacenamiento deduplicado por contenido
+
+Antes de escribir un archivo se calcula el SHA-256 de su contenido. Si ya
+existe un blob con el mismo hash se reutiliza su ruta y se incrementa su
+contador de referencias en lugar de escribir (o hacer un PUT a S3) otra
+copia. Eliminar un archivo libera una referencia y solo borra el objeto
+físico cuando no quedan más.
+"""
+import hashlib
+import logging
+from collections import Counter
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def s3_object_key(storage, name):
+    """
+    Clave en el bucket de un archivo de un almacenamiento S3: su location
+    más el nombre
+    """
+    from storages.utils import clean_name
+
+    location = storage.location.strip('/')
+    name = clean_name(name).lstrip('/')
+    return f'{location}/{name}' if location else name
+
+
+def hash_content(content, chunk_size=64 * 1024):
+    """Calcular el digest SHA-256 y el tamaño de un archivo"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in content.chunks(chunk_size):
+        digest.update(chunk)
+        size += len(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest(), size
+
+
+class ContentAddressedStorageMixin:
+    """
+    Mixin para backends de almacenamiento que comparten archivos idénticos
+    """
+
+    @property
+    def dedup_enabled(self):
+        return getattr(settings, 'UPLOAD_DEDUP_ENABLED', True)
+
+    def _save(self, name, content):
+        if not self.dedup_enabled:
+            return super()._save(name, content)
+
+        from .models import ContentBlob
+
+        digest, size = hash_content(content)
+
+        existing = self._add_reference(digest)
+        if existing is not None:
+            return existing
+
+        name = super()._save(name, content)
+        return self._register(name, digest, size)
+
+    def adopt(self, name):
+        """
+        Registrar un archivo escrito directamente en el almacenamiento (por
+        ejemplo con una URL firmada). Si su contenido ya existía se borra la
+        copia nueva y se devuelve la ruta compartida.
+        """
+        if not self.dedup_enabled:
+            return name
+
+        from .models import ContentBlob
+
+        if ContentBlob.objects.filter(name=name).exists():
+            return name
+
+        with self.open(name, 'rb') as f:
+            digest, size = hash_content(f)
+
+        existing = self._add_reference(digest)
+        if existing is not None:
+            super().delete(name)
+            return existing
+        return self._register(name, digest, size)
+
+    def _register(self, name, digest, size):
+        """Crear el blob de un archivo recién escrito"""
+        from .models import ContentBlob
+
+        try:
+            with transaction.atomic():
+                ContentBlob.objects.create(digest=digest, name=name, size=size)
+        except IntegrityError:
+            # Otro proceso guardó el mismo contenido en paralelo
+            super().delete(name)
+            existing = self._add_reference(digest)
+            if existing is None:
+                raise
+            return existing
+        return name
+
+    def _add_reference(self, digest):
+        """Sumar una referencia al blob existente y devolver su ruta"""
+        from .models import ContentBlob
+
+        with transaction.atomic():
+            blob = ContentBlob.objects.select_for_update().filter(
+                digest=digest).first()
+            if blob is None:
+                return None
+
+            if not super().exists(blob.name):
+                # El objeto físico desapareció: se vuelve a escribir
+                logger.warning(f"Blob {blob.name} sin archivo, se descarta")
+                blob.delete()
+                return None
+
+            ContentBlob.objects.filter(pk=blob.pk).update(
+                ref_count=F('ref_count') + 1,
+                last_referenced_at=timezone.now()
+            )
+            return blob.name
+
+    def release(self, name):
+        """
+        Liberar una referencia al archivo.
+
+        Devuelve True si ya no quedan referencias y el archivo físico
+        puede eliminarse.
+        """
+        from .models import ContentBlob
+
+        with transaction.atomic():
+            blob = ContentBlob.objects.select_for_update().filter(
+                name=name).first()
+            if blob is None:
+                # Archivo anterior a la deduplicación
+                return True
+            if blob.ref_count > 1:
+                ContentBlob.objects.filter(pk=blob.pk).update(
+                    ref_count=F('ref_count') - 1)
+                return False
+            blob.delete()
+            return True
+
+    def release_many(self, names):
+        """
+        Liberar una referencia por cada ruta con consultas agrupadas.
+
+        Una ruta repetida libera una referencia por aparición. Devuelve las
+        rutas que ya no tienen referencias y pueden borrarse físicamente.
+        """
+        from .models import ContentBlob
+
+        counts = Counter(names)
+        if not self.dedup_enabled:
+            return set(counts)
+
+        kept = set()
+        with transaction.atomic():
+            blobs = list(ContentBlob.objects.select_for_update().filter(
+                name__in=counts))
+
+            # Agrupar los decrementos por cantidad para usar pocos UPDATE
+            decrements = {}
+            releasable = []
+            for blob in blobs:
+                released = counts[blob.name]
+                if blob.ref_count > released:
+                    decrements.setdefault(released, []).append(blob.pk)
+                    kept.add(blob.name)
+                else:
+                    releasable.append(blob.pk)
+
+            for released, pks in decrements.items():
+                ContentBlob.objects.filter(pk__in=pks).update(
+                    ref_count=F('ref_count') - released)
+            ContentBlob.objects.filter(pk__in=releasable).delete()
+
+        return set(counts) - kept
+
+    def delete(self, name):
+        if self.dedup_enabled and not self.release(name):
+            return
+        super().delete(name)
+
+
+class DedupFileSystemStorage(ContentAddressedStorageMixin, FileSystemStorage):
+    """Almacenamiento local deduplicado por contenido"""
@@ -0,0 +1,157 @@
+"""
+Comprobación del almacenamiento de archivos (S3 o disco local)
+
+No se hace al cargar settings: cada proceso la ejecuta en un hilo aparte
+la primera vez que crea el almacenamiento S3 o cuando se pide el estado
+(endpoint /health/), y guarda el resultado STORAGE_CHECK_INTERVAL
+segundos. Pasado ese tiempo se renueva en segundo plano, así que una
+caída o una recuperación posterior al arranque también se reflejan, y
+/health/ nunca espera a la red. manage.py check_storage comprueba en el
+momento.
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+class StorageHealth:
+    """Estado del almacenamiento, renovado cada STORAGE_CHECK_INTERVAL s"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._result = None
+        self._checked_at = None
+        self._pending = False
+
+    def check(self, refresh=False):
+        """
+        Comprobar el almacenamiento (o devolver el resultado vigente).
+
+        Bloquea mientras se comprueba. Devuelve {'ok', 'backend',
+        'latency_ms'[, 'error']}.
+        """
+        if not refresh:
+            with self._lock:
+                if self._is_fresh():
+                    return dict(self._result)
+        return self._store(self._run())
+
+    def status(self):
+        """
+        Último resultado sin esperar a la comprobación (para /health/).
+
+        Si no hay resultado o caducó se renueva en segundo plano; mientras
+        no existe ninguno se devuelve {'ok': None, 'backend', 'pending'}.
+        """
+        with self._lock:
+            result = dict(self._result) if self._result else None
+            fresh = self._is_fresh()
+            checked_at = self._checked_at
+        if not fresh:
+            self.check_in_background()
+        if result is None:
+            return {'ok': None, 'backend': self._backend(), 'pending': True}
+        result['age_seconds'] = round(time.monotonic() - checked_at, 1)
+        return result
+
+    def check_in_background(self):
+        """Lanzar la comprobación en un hilo si no hay un resultado vigente"""
+        with self._lock:
+            if self._is_fresh() or self._pending:
+                return
+            self._pending = True
+        threading.Thread(target=self._background_check, daemon=True,
+                         name='storage-health').start()
+
+    def _background_check(self):
+        try:
+            self._store(self._run())
+        finally:
+            with self._lock:
+                self._pending = False
+
+    def _store(self, result):
+        with self._lock:
+            previous = self._result
+            self._result = result
+            self._checked_at = time.monotonic()
+        # Solo se registran los cambios de estado, no cada renovación
+        if not result['ok'] and (previous is None or previous['ok']):
+            logger.error("Almacenamiento %s no disponible: %s",
+                         result['backend'], result['error'])
+        elif result['ok'] and previous is not None and not previous['ok']:
+            logger.info("Almacenamiento %s disponible de nuevo",
+                        result['backend'])
+        return dict(result)
+
+    def _is_fresh(self):
+        return self._result is not None and (
+            time.monotonic() - self._checked_at < settings.STORAGE_CHECK_INTERVAL)
+
+    def reset(self):
+        with self._lock:
+            self._result = None
+            self._checked_at = None
+
+    def _backend(self):
+        return 's3' if settings.USE_S3 else 'local'
+
+    def _run(self):
+        backend = self._backend()
+        started = time.monotonic()
+        try:
+            if settings.USE_S3:
+                self._check_s3()
+            else:
+                self._check_local()
+        except Exception as e:
+            result = {'ok': False, 'backend': backend, 'error': str(e)}
+        else:
+            result = {'ok': True, 'backend': backend}
+        result['latency_ms'] = round((time.monotonic() - started) * 1000, 2)
+        return result
+
+    def _check_s3(self):
+        """HEAD del bucket con las credenciales configuradas"""
+        import boto3
+        from botocore.config import Config
+
+        timeout = settings.STORAGE_CHECK_TIMEOUT
+        client = boto3.client(
+            's3',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            aws_session_token=getattr(settings, 'AWS_SESSION_TOKEN', '') or None,
+            region_name=settings.AWS_S3_REGION_NAME,
+            endpoint_url=getattr(settings, 'AWS_S3_ENDPOINT_URL', None),
+            config=Config(connect_timeout=timeout, read_timeout=timeout,
+                          retries={'total_max_attempts': 1}),
+        )
+        client.head_bucket(Bucket=settings.AWS_STORAGE_BUCKET_NAME)
+
+    def _check_local(self):
+        """MEDIA_ROOT (o su directorio padre, si aún no existe) escribible"""
+        root = Path(settings.MEDIA_ROOT)
+        # FileSystemStorage crea MEDIA_ROOT al guardar el primer archivo
+        target = root if root.exists() else root.parent
+        if not os.access(target, os.W_OK):
+            raise PermissionError(f'Sin permiso de escritura en {target}')
+
+
+# Instancia global del servicio
+storage_health = StorageHealth()
+
+
+@receiver(setting_changed)
+def reset_storage_health(setting, **kwargs):
+    """El resultado depende de la configuración del almacenamiento"""
+    if setting in ('USE_S3', 'MEDIA_ROOT', 'DEFAULT_FILE_STORAGE') \
+            or setting.startswith('AWS_'):
+        storage_health.reset()
@@ -0,0 +1,331 @@
+"""
+Limpieza de subidas temporales huérfanas
+
+Las imágenes de ImageUploadView se guardan en temp-uploads/<username>/ y
+quedan registradas en ImageUpload. Las que superan el TTL se eliminan en
+lote, junto con las subidas directas y por bloques que
+expiraron sin finalizar:
+
+- S3: DeleteObjects con hasta 1000 claves por petición.
+- Local: unlinks en paralelo con un pool de hilos.
+
+Los archivos deduplicados solo se borran físicamente cuando se libera su
+última referencia. Los archivos de temp-uploads sin registro solo se
+borran si ninguna tabla los menciona (blobs, subidas ni campos de
+archivo): con la deduplicación, la copia guardada de un post o un avatar
+puede estar en temp-uploads.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from social_network_backend.metrics import metrics
+from .models import ContentBlob, ImageUpload, UploadSlot, ChunkedUpload
+from .storage import s3_object_key
+
+logger = logging.getLogger(__name__)
+
+# Máximo de claves por petición DeleteObjects de S3
+S3_DELETE_BATCH_SIZE = 1000
+
+TEMP_UPLOADS_PREFIX = 'temp-uploads'
+
+
+def _is_s3(storage):
+    try:
+        from storages.backends.s3boto3 import S3Boto3Storage
+    except ImportError:
+        return False
+    return isinstance(storage, S3Boto3Storage)
+
+
+def referenced_names(names):
+    """
+    Rutas de names que alguna tabla registra: blobs deduplicados, subidas
+    o cualquier campo de archivo de un modelo
+    """
+    names = list(names)
+    if not names:
+        return set()
+    found = set(ContentBlob.objects.filter(
+        name__in=names).values_list('name', flat=True))
+    found.update(ImageUpload.objects.filter(
+        file_path__in=names).values_list('file_path', flat=True))
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                found.update(model._default_manager.filter(
+                    **{f'{field.name}__in': names}
+                ).values_list(field.name, flat=True))
+    return found
+
+
+def delete_files(names, storage=None, workers=None):
+    """
+    Borrar físicamente una lista de archivos en lote.
+
+    Devuelve (rutas borradas, errores por ruta). Un archivo que ya no
+    existía no se cuenta como borrado ni como error.
+    """
+    storage = storage or default_storage
+    names = list(dict.fromkeys(names))
+    if not names:
+        return set(), {}
+    if _is_s3(storage):
+        return _delete_s3(storage, names)
+    return _delete_local(storage, names,
+                         workers or settings.TEMP_UPLOAD_SWEEP_WORKERS)
+
+
+def _delete_s3(storage, names):
+    client = storage.bucket.meta.client
+    deleted, errors = set(), {}
+
+    for start in range(0, len(names), S3_DELETE_BATCH_SIZE):
+        batch = {s3_object_key(storage, name): name
+                 for name in names[start:start + S3_DELETE_BATCH_SIZE]}
+        response = client.delete_objects(
+            Bucket=storage.bucket_name,
+            Delete={
+                'Objects': [{'Key': key} for key in batch],
+                'Quiet': True,
+            }
+        )
+        for error in response.get('Errors', []):
+            name = batch.get(error['Key'], error['Key'])
+            errors[name] = error.get('Message', error.get('Code'))
+        deleted.update(name for name in batch.values() if name not in errors)
+
+    return deleted, errors
+
+
+def _delete_local(storage, names, workers):
+    def unlink(name):
+        try:
+            os.unlink(storage.path(name))
+        except FileNotFoundError:
+            return name, False, None
+        except OSError as e:
+            return name, False, str(e)
+        return name, True, None
+
+    deleted, errors = set(), {}
+    with ThreadPoolExecutor(max_workers=workers,
+                            thread_name_prefix='temp-upload-sweep') as executor:
+        for name, removed, error in executor.map(unlink, names):
+            if error:
+                errors[name] = error
+            elif removed:
+                deleted.add(name)
+    return deleted, errors
+
+
+class TempUploadSweeper:
+    """Elimina en lote las subidas temporales caducadas"""
+
+    def __init__(self, storage=None, batch_size=None):
+        self.storage = storage or default_storage
+        self._batch_size = batch_size
+
+    @property
+    def batch_size(self):
+        return self._batch_size or settings.TEMP_UPLOAD_SWEEP_BATCH_SIZE
+
+    def sweep(self, now=None, dry_run=False, include_untracked=False):
+        """
+        Ejecutar una pasada de limpieza y devolver un resumen.
+
+        En dry_run solo se calcula qué se eliminaría.
+        """
+        started = time.monotonic()
+        now = now or timezone.now()
+        cutoff = now - timedelta(hours=settings.TEMP_UPLOAD_TTL_HOURS)
+        result = {
+            'files_deleted': 0,
+            'bytes_reclaimed': 0,
+            'uploads_expired': 0,
+            'slots_expired': 0,
+            'chunked_aborted': 0,
+            'untracked_deleted': 0,
+            'errors': [],
+        }
+
+        if dry_run:
+            return self._dry_run(now, cutoff, result)
+
+        self._sweep_image_uploads(cutoff, result)
+        self._sweep_upload_slots(now, result)
+        self._sweep_chunked_uploads(now, result)
+        if include_untracked:
+            self._sweep_untracked(cutoff, result)
+
+        elapsed = time.monotonic() - started
+        metrics.increment('temp_uploads.files_deleted', result['files_deleted'])
+        metrics.increment('temp_uploads.bytes_reclaimed',
+                          result['bytes_reclaimed'])
+        metrics.increment('temp_uploads.sweep_errors', len(result['errors']))
+        metrics.observe('temp_uploads.sweep_seconds', elapsed)
+        logger.info(
+            f"Limpieza de temp-uploads: {result['files_deleted']} archivos, "
+            f"{result['bytes_reclaimed']} bytes recuperados en {elapsed:.2f}s")
+        return result
+
+    def expired_uploads(self, cutoff):
+        """ImageUploads terminadas y más antiguas que el TTL"""
+        return ImageUpload.objects.filter(
+            status__in=['completed', 'failed'],
+            created_at__lt=cutoff
+        )
+
+    def _dry_run(self, now, cutoff, result):
+        uploads = self.expired_uploads(cutoff).aggregate(
+            count=Count('id'), size=Sum('file_size'))
+        slots = UploadSlot.objects.filter(
+            status='pending', expires_at__lt=now
+        ).aggregate(count=Count('id'), size=Sum('file_size'))
+        chunked = ChunkedUpload.objects.filter(
+            status='uploading', expires_at__lt=now
+        ).aggregate(count=Count('id'), size=Sum('offset'))
+
+        result['uploads_expired'] = uploads['count']
+        result['slots_expired'] = slots['count']
+        result['chunked_aborted'] = chunked['count']
+        result['bytes_reclaimed'] = sum(
+            agg['size'] or 0 for agg in (uploads, slots, chunked))
+        return result
+
+    def _release_and_delete(self, names, sizes, result):
+        """
+        Liberar una referencia por ruta y borrar los archivos sin referencias.
+
+        sizes mapea cada ruta a su tamaño conocido. Devuelve las rutas que
+        no pudieron borrarse.
+        """
+        if not names:
+            return set()
+
+        if hasattr(self.storage, 'release_many'):
+            to_delete = self.storage.release_many(names)
+        else:
+            to_delete = set(names)
+
+        deleted, errors = delete_files(to_delete, self.storage)
+        result['errors'].extend(
+            f"{name}: {error}" for name, error in errors.items())
+        result['files_deleted'] += len(deleted)
+        result['bytes_reclaimed'] += sum(sizes.get(name, 0) for name in deleted)
+        return set(errors)
+
+    def _sweep_image_uploads(self, cutoff, result):
+        failed_ids = []
+        while True:
+            batch = list(
+                self.expired_uploads(cutoff).exclude(id__in=failed_ids)
+                .order_by('created_at')
+                .values('id', 'file_path', 'file_size')[:self.batch_size]
+            )
+            if not batch:
+                break
+
+            names = [row['file_path'] for row in batch if row['file_path']]
+            sizes = {row['file_path']: row['file_size'] for row in batch}
+            failed = self._release_and_delete(names, sizes, result)
+
+            done = [row['id'] for row in batch if row['file_path'] not in failed]
+            failed_ids.extend(
+                row['id'] for row in batch if row['file_path'] in failed)
+            result['uploads_expired'] += ImageUpload.objects.filter(
+                id__in=done).update(status='expired', file_path='')
+
+    def _sweep_upload_slots(self, now, result):
+        while True:
+            batch = list(
+                UploadSlot.objects.filter(status='pending', expires_at__lt=now)
+                .values('id', 'storage_key', 'file_size')[:self.batch_size]
+            )
+            if not batch:
+                break
+
+            # Los objetos que nunca se subieron simplemente no existen
+            self._release_and_delete(
+                [row['storage_key'] for row in batch],
+                {row['storage_key']: row['file_size'] for row in batch},
+                result)
+            result['slots_expired'] += UploadSlot.objects.filter(
+                id__in=[row['id'] for row in batch]
+            ).update(status='failed', error_message='Expiró sin finalizar')
+
+    def _sweep_chunked_uploads(self, now, result):
+        from .chunked import chunked_upload_service
+
+        expired = ChunkedUpload.objects.filter(
+            status='uploading', expires_at__lt=now)
+        for upload in expired.iterator():
+            try:
+                chunked_upload_service.abort(upload)
+            except Exception as e:
+                result['errors'].append(f"{upload.id}: {str(e)}")
+                continue
+            result['chunked_aborted'] += 1
+            result['bytes_reclaimed'] += upload.offset
+
+    def _sweep_untracked(self, cutoff, result):
+        """Borrar archivos de temp-uploads sin registro (subidas antiguas)"""
+        batch = {}
+        for name, size, modified in self._iter_temp_files():
+            if modified < cutoff:
+                batch[name] = size
+            if len(batch) >= self.batch_size:
+                self._delete_untracked(batch, result)
+                batch = {}
+        self._delete_untracked(batch, result)
+
+    def _delete_untracked(self, sizes, result):
+        if not sizes:
+            return
+        tracked = referenced_names(sizes)
+        untracked = [name for name in sizes if name not in tracked]
+
+        # Sin blob no hay referencias que liberar: se borran directamente
+        deleted, errors = delete_files(untracked, self.storage)
+        result['errors'].extend(
+            f"{name}: {error}" for name, error in errors.items())
+        result['files_deleted'] += len(deleted)
+        result['untracked_deleted'] += len(deleted)
+        result['bytes_reclaimed'] += sum(sizes[name] for name in deleted)
+
+    def _iter_temp_files(self):
+        """Recorrer temp-uploads devolviendo (ruta, tamaño, modificación)"""
+        if _is_s3(self.storage):
+            client = self.storage.bucket.meta.client
+            prefix = s3_object_key(self.storage, TEMP_UPLOADS_PREFIX) + '/'
+            location = self.storage.location.strip('/')
+            paginator = client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.storage.bucket_name,
+                                           Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    key = obj['Key']
+                    name = key[len(location) + 1:] if location else key
+                    yield name, obj['Size'], obj['LastModified']
+            return
+
+        root = self.storage.path(TEMP_UPLOADS_PREFIX)
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                stat = os.stat(path)
+                name = os.path.relpath(path, self.storage.location)
+                yield (name.replace(os.sep, '/'), stat.st_size,
+                       datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc))
+
+
+# Instancia global del limpiador
+temp_upload_sweeper = TempUploadSweeper()
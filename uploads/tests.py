@@ -0,0 +1,1110 @@
+"""
+Tests para el procesamiento de imágenes subidas
+"""
+import base64
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock, skipUnless
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from social_network_backend.metrics import metrics
+from .imaging import (
+    compress_image_data, compute_placeholder, generate_variants, open_image,
+    ImageTooLarge
+)
+from .media_urls import media_url_resolver
+from .storage_health import storage_health
+from .models import ImageUpload, ContentBlob
+from .workers import image_processing_pool
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image_file(name='test.png', size=(2400, 1600), color='red', fmt='PNG'):
+    """Crear una imagen en memoria para los tests"""
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=fmt)
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type=f'image/{fmt.lower()}')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_EAGER=True)
+class ImageUploadAPITest(APITestCase):
+    """Tests para la subida asíncrona de imágenes"""
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='uploader',
+            email='uploader@example.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_upload_returns_handle(self):
+        """Test la subida devuelve un handle y procesa la imagen"""
+        response = self.client.post(
+            reverse('upload-image'), {'image': make_image_file()},
+            format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        upload = ImageUpload.objects.get(id=response.data['upload']['id'])
+        self.assertEqual(upload.status, 'completed')
+        self.assertTrue(default_storage.exists(upload.file_path))
+
+        # La imagen procesada respeta las dimensiones máximas
+        with default_storage.open(upload.file_path) as f:
+            img = Image.open(f)
+            self.assertLessEqual(img.width, 1920)
+            self.assertLessEqual(img.height, 1080)
+            self.assertEqual(img.format, 'JPEG')
+
+    def test_status_endpoint(self):
+        """Test consultar el estado de una subida"""
+        response = self.client.post(
+            reverse('upload-image'), {'image': make_image_file()},
+            format='multipart')
+        status_url = response.data['upload']['status_url']
+
+        response = self.client.get(status_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertIsNotNone(response.data['file_url'])
+
+        # Otro usuario no puede ver el estado
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(status_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_image_rejected(self):
+        """Test un archivo que no es imagen se rechaza antes de encolar"""
+        bad_file = SimpleUploadedFile(
+            'bad.jpg', b'no es una imagen', content_type='image/jpeg')
+        response = self.client.post(
+            reverse('upload-image'), {'image': bad_file}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ImageUpload.objects.exists())
+
+    def test_truncated_image_marks_failed(self):
+        """Test una imagen con cabecera válida pero truncada termina en failed"""
+        data = make_image_file(fmt='JPEG').read()
+        truncated = SimpleUploadedFile(
+            'cut.jpg', data[:len(data) // 2], content_type='image/jpeg')
+        response = self.client.post(
+            reverse('upload-image'), {'image': truncated}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['upload']['status'], 'failed')
+
+    @override_settings(IMAGE_MAX_PIXELS=1000 * 1000)
+    def test_pixel_limit_rejected(self):
+        """Test una imagen con demasiados píxeles se rechaza por cabecera"""
+        response = self.client.post(
+            reverse('upload-image'), {'image': make_image_file()},
+            format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('píxeles', response.data['error'])
+
+    def test_batch_upload(self):
+        """Test subida por lotes comparte batch_id"""
+        response = self.client.post(
+            reverse('upload-batch'),
+            {'images': [make_image_file('a.png'), make_image_file('b.png')]},
+            format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['total_accepted'], 2)
+        self.assertIsNotNone(response.data['batch_id'])
+        self.assertEqual(
+            ImageUpload.objects.filter(
+                batch_id=response.data['batch_id']).count(), 2)
+
+    @override_settings(IMAGE_PROCESSING_MAX_PENDING=1,
+                       IMAGE_PROCESSING_RETRY_AFTER=7)
+    def test_backpressure_when_saturated(self):
+        """Test responde 503 con Retry-After cuando el pool está lleno"""
+        image_processing_pool.acquire(1)
+        try:
+            response = self.client.post(
+                reverse('upload-image'), {'image': make_image_file()},
+                format='multipart')
+        finally:
+            image_processing_pool.release(1)
+
+        self.assertEqual(response.status_code,
+                         status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '7')
+        self.assertFalse(ImageUpload.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_EAGER=True,
+                   IMAGE_VARIANT_SIZES=[64, 320, 1080],
+                   IMAGE_VARIANT_FORMATS=['webp', 'jpeg'])
+class ImageVariantTest(APITestCase):
+    """Tests para la generación de variantes responsivas"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='variants',
+            email='variants@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_post_image_generates_manifest(self):
+        """Test crear un post con imagen genera todas las variantes"""
+        from posts.models import Post
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(
+                author=self.user, content='Con imagen',
+                image=make_image_file('post.png'))
+
+        post.refresh_from_db()
+        manifest = post.image_variants
+        self.assertEqual(manifest['source'], post.image.name)
+        self.assertEqual((manifest['width'], manifest['height']), (2400, 1600))
+        self.assertEqual(set(manifest['variants']), {'64', '320', '1080'})
+
+        small = manifest['variants']['64']
+        self.assertEqual((small['width'], small['height']), (64, 43))
+        for fmt in ('webp', 'jpeg'):
+            self.assertTrue(default_storage.exists(small[fmt]))
+
+        # El serializer de listados usa la variante del feed
+        response = self.client.get(reverse('posts:post_detail', kwargs={'pk': post.id}))
+        self.assertTrue(response.data['image_url'].endswith('_1080.jpg'))
+        self.assertIn('webp', response.data['image_variants']['320'])
+
+    def test_avatar_variants_replaced_on_change(self):
+        """Test cambiar el avatar reemplaza las variantes anteriores"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.avatar = make_image_file('a.png', size=(400, 400))
+            self.user.save()
+        self.user.refresh_from_db()
+        old_small = self.user.avatar_variants['variants']['64']['jpeg']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.avatar = make_image_file(
+                'b.png', size=(400, 400), color='blue')
+            self.user.save()
+        self.user.refresh_from_db()
+
+        self.assertFalse(default_storage.exists(old_small))
+        self.assertEqual(self.user.avatar_variants['source'],
+                         self.user.avatar.name)
+        self.assertTrue(
+            self.user.get_avatar_url(64).endswith('_64.jpg'))
+
+    def test_url_falls_back_without_manifest(self):
+        """Test sin manifiesto se usa la imagen original"""
+        from posts.models import Post
+
+        post = Post.objects.create(
+            author=self.user, content='Pendiente',
+            image=make_image_file('pending.png'))
+
+        self.assertEqual(post.image_variants, {})
+        self.assertEqual(post.get_image_url(1080), post.image_url)
+        self.assertEqual(post.image_variant_urls, {})
+
+    def test_placeholder_stored_with_variants(self):
+        """Test la pasada de variantes guarda placeholder y color dominante"""
+        from posts.models import Post
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(
+                author=self.user, content='Verde',
+                image=make_image_file('green.png', color=(0, 128, 0)))
+
+        post.refresh_from_db()
+        self.assertTrue(post.placeholder.startswith('data:image/jpeg;base64,'))
+        self.assertEqual(post.dominant_color, '#008000')
+
+        response = self.client.get(reverse('posts:post_list'))
+        item = response.data['results'][0]
+        self.assertEqual(item['placeholder'], post.placeholder)
+        self.assertEqual(item['dominant_color'], '#008000')
+
+    def test_chat_image_gets_placeholder_only(self):
+        """Test las imágenes de chat solo calculan el placeholder"""
+        from chat.models import ChatRoom, Message
+
+        room = ChatRoom.objects.create(created_by=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            message = Message.objects.create(
+                room=room, sender=self.user, message_type='image',
+                content='', image=make_image_file('chat.png', color='blue'))
+
+        message.refresh_from_db()
+        self.assertTrue(message.placeholder.startswith('data:image/jpeg'))
+        self.assertEqual(message.dominant_color, '#0000ff')
+        self.assertFalse(default_storage.exists(
+            message.image.name.rsplit('.', 1)[0] + '_64.jpg'))
+
+    def test_video_thumbnail_change_recomputes_placeholder(self):
+        """Test cambiar el thumbnail de un video recalcula el placeholder"""
+        from stories.models import Story
+
+        with self.captureOnCommitCallbacks(execute=True):
+            story = Story.objects.create(
+                author=self.user, story_type='video',
+                media_file=SimpleUploadedFile(
+                    'video.mp4', b'\x00\x00\x00\x18ftypmp42',
+                    content_type='video/mp4'),
+                thumbnail=make_image_file('thumb.png', color='blue'))
+        story.refresh_from_db()
+        self.assertEqual(story.dominant_color, '#0000ff')
+        self.assertEqual(story.placeholder_source, story.thumbnail.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            story.thumbnail = make_image_file('thumb2.png', color='red')
+            story.save()
+        story.refresh_from_db()
+        self.assertEqual(story.dominant_color, '#ff0000')
+        self.assertEqual(story.placeholder_source, story.thumbnail.name)
+
+    @override_settings(IMAGE_PROCESSING_MAX_PENDING=1)
+    def test_missing_variants_generated_by_command(self):
+        """Test las variantes omitidas con el pool lleno se generan después"""
+        from posts.models import Post
+
+        image_processing_pool.acquire(1)
+        try:
+            with self.captureOnCommitCallbacks(execute=True):
+                post = Post.objects.create(
+                    author=self.user, content='Ráfaga',
+                    image=make_image_file('burst.png', size=(400, 300)))
+        finally:
+            image_processing_pool.release(1)
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants, {})
+
+        out = io.StringIO()
+        call_command('generate_image_variants', '--missing', stdout=out)
+        self.assertIn('Imágenes procesadas: 1', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.image_variants['source'], post.image.name)
+        self.assertTrue(post.placeholder)
+
+        out = io.StringIO()
+        call_command('generate_image_variants', '--missing', stdout=out)
+        self.assertIn('Imágenes procesadas: 0', out.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_EAGER=True,
+                   UPLOAD_DEDUP_ENABLED=True)
+class ContentDeduplicationTest(APITestCase):
+    """Tests para la deduplicación de archivos por contenido"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='dedup',
+            email='dedup@example.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='dedup2',
+            email='dedup2@example.com',
+            password='testpass123'
+        )
+
+    def test_identical_content_stored_once(self):
+        """Test dos avatares idénticos comparten el mismo archivo"""
+        self.user.avatar = make_image_file('meme.png', size=(50, 50))
+        self.user.save()
+        self.other_user.avatar = make_image_file('copia.png', size=(50, 50))
+        self.other_user.save()
+
+        self.assertEqual(self.user.avatar.name, self.other_user.avatar.name)
+        blob = ContentBlob.objects.get(name=self.user.avatar.name)
+        self.assertEqual(blob.ref_count, 2)
+
+    def test_delete_releases_reference(self):
+        """Test el archivo físico se borra al liberar la última referencia"""
+        from utils import FileUploadHandler
+
+        self.user.avatar = make_image_file('meme.png', size=(50, 50))
+        self.user.save()
+        self.other_user.avatar = make_image_file('copia.png', size=(50, 50))
+        self.other_user.save()
+        name = self.user.avatar.name
+
+        FileUploadHandler.delete_file(self.user.avatar)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(ContentBlob.objects.get(name=name).ref_count, 1)
+
+        FileUploadHandler.delete_file(self.other_user.avatar)
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(ContentBlob.objects.filter(name=name).exists())
+
+    def test_different_content_not_shared(self):
+        """Test contenidos distintos generan blobs distintos"""
+        self.user.avatar = make_image_file('a.png', size=(50, 50))
+        self.user.save()
+        self.other_user.avatar = make_image_file(
+            'b.png', size=(50, 50), color='green')
+        self.other_user.save()
+
+        self.assertNotEqual(self.user.avatar.name, self.other_user.avatar.name)
+        self.assertEqual(ContentBlob.objects.count(), 2)
+
+
+def make_image_bytes(size=(100, 100), color='red', fmt='PNG'):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_EAGER=True)
+class LocalDirectUploadTest(APITestCase):
+    """Tests para subidas directas con almacenamiento local"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='direct',
+            email='direct@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def request_slot(self, kind, content_type='image/png'):
+        response = self.client.post(
+            reverse('uploads:direct_upload_slot'),
+            {'kind': kind, 'content_type': content_type}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def put_file(self, upload, data):
+        # El PUT firmado no usa la autenticación JWT
+        self.client.force_authenticate(user=None)
+        response = self.client.generic(
+            'PUT', upload['url'], data,
+            content_type=upload['headers']['Content-Type'])
+        self.client.force_authenticate(user=self.user)
+        return response
+
+    def test_avatar_direct_upload(self):
+        """Test slot, PUT firmado y finalize del avatar"""
+        data = self.request_slot('avatar')
+        self.assertEqual(data['upload']['method'], 'PUT')
+
+        response = self.put_file(data['upload'], make_image_bytes())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(data['slot']['finalize_url'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['slot']['status'], 'completed')
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.avatar.name.startswith('avatars/direct/'))
+        self.assertTrue(default_storage.exists(self.user.avatar.name))
+
+    def test_story_video_direct_upload(self):
+        """Test finalize de un video crea la story"""
+        from stories.models import Story
+
+        data = self.request_slot('story', 'video/mp4')
+        video = b'\x00\x00\x00\x18ftypmp42' + b'\x00' * 64
+        self.put_file(data['upload'], video)
+
+        response = self.client.post(
+            data['slot']['finalize_url'], {'content': 'Mi video'},
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        story = Story.objects.get(id=response.data['result']['id'])
+        self.assertEqual(story.story_type, 'video')
+        self.assertEqual(story.author, self.user)
+
+    def test_repeated_put_rejected(self):
+        """Test un segundo PUT al mismo slot no deja archivos huérfanos"""
+        from .models import UploadSlot
+
+        data = self.request_slot('avatar')
+        response = self.put_file(data['upload'], make_image_bytes(color='red'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        slot = UploadSlot.objects.get(id=data['slot']['id'])
+
+        response = self.put_file(data['upload'], make_image_bytes(color='blue'))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        self.assertEqual(
+            UploadSlot.objects.get(id=slot.id).storage_key, slot.storage_key)
+        self.assertEqual(ContentBlob.objects.count(), 1)
+        self.assertEqual(
+            ContentBlob.objects.get(name=slot.storage_key).ref_count, 1)
+
+    def test_invalid_content_fails_finalize(self):
+        """Test un archivo que no es imagen se rechaza y se elimina"""
+        data = self.request_slot('avatar')
+        self.put_file(data['upload'], b'no es una imagen')
+
+        response = self.client.post(data['slot']['finalize_url'])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        from .models import UploadSlot
+        slot = UploadSlot.objects.get(id=data['slot']['id'])
+        self.assertEqual(slot.status, 'failed')
+        self.assertFalse(default_storage.exists(slot.storage_key))
+
+    def test_tampered_token_rejected(self):
+        """Test un token alterado no permite subir"""
+        data = self.request_slot('avatar')
+        upload = dict(data['upload'])
+        upload['url'] = upload['url'].rstrip('/') + 'x/'
+
+        response = self.put_file(upload, make_image_bytes())
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_disallowed_content_type(self):
+        """Test un tipo de contenido no permitido no obtiene slot"""
+        response = self.client.post(
+            reverse('uploads:direct_upload_slot'),
+            {'kind': 'avatar', 'content_type': 'video/mp4'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+def _moto_server_available():
+    try:
+        from moto.server import ThreadedMotoServer  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+S3_TEST_SETTINGS = {
+    'USE_S3': True,
+    'AWS_ACCESS_KEY_ID': 'testing',
+    'AWS_SECRET_ACCESS_KEY': 'testing',
+    'AWS_STORAGE_BUCKET_NAME': 'direct-upload-tests',
+    'AWS_S3_REGION_NAME': 'us-east-1',
+    'AWS_DEFAULT_ACL': 'public-read',
+}
+
+
+class MotoS3ServerMixin:
+    """Levanta moto como servidor S3 local y usa PublicMediaStorage"""
+
+    @classmethod
+    def setUpClass(cls):
+        import boto3
+        import logging
+        import socket
+        from moto.server import ThreadedMotoServer
+
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+
+        cls.server = ThreadedMotoServer(
+            ip_address='127.0.0.1', port=port, verbose=False)
+        cls.server.start()
+        cls.endpoint_url = f'http://127.0.0.1:{port}'
+
+        boto3.client(
+            's3', endpoint_url=cls.endpoint_url, region_name='us-east-1',
+            aws_access_key_id='testing', aws_secret_access_key='testing'
+        ).create_bucket(Bucket=S3_TEST_SETTINGS['AWS_STORAGE_BUCKET_NAME'])
+
+        cls.settings_override = override_settings(
+            DEFAULT_FILE_STORAGE='storage_backends.PublicMediaStorage',
+            AWS_S3_ENDPOINT_URL=cls.endpoint_url,
+            **S3_TEST_SETTINGS
+        )
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        cls.server.stop()
+
+
+@skipUnless(_moto_server_available(), 'moto[server] no está instalado')
+class S3DirectUploadTest(MotoS3ServerMixin, APITestCase):
+    """Tests para subidas directas a S3 usando moto como servidor local"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='s3direct',
+            email='s3direct@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def post_to_s3(self, upload, data):
+        """Enviar el POST multipart prefirmado y devolver el código HTTP"""
+        import urllib.error
+        import urllib.request
+        from urllib3 import encode_multipart_formdata
+
+        body, content_type = encode_multipart_formdata({
+            **upload['fields'],
+            'file': ('upload', data, upload['fields']['Content-Type']),
+        })
+        request = urllib.request.Request(
+            upload['url'], data=body, method='POST',
+            headers={'Content-Type': content_type})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def test_presigned_post_and_finalize(self):
+        """Test el cliente sube con el POST prefirmado y finaliza"""
+        response = self.client.post(
+            reverse('uploads:direct_upload_slot'),
+            {'kind': 'avatar', 'content_type': 'image/png'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        upload = response.data['upload']
+        self.assertEqual(upload['method'], 'POST')
+        self.assertTrue(upload['url'].startswith(self.endpoint_url))
+
+        self.assertLess(self.post_to_s3(upload, make_image_bytes()), 300)
+
+        response = self.client.post(response.data['slot']['finalize_url'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.refresh_from_db()
+        self.assertTrue(default_storage.exists(self.user.avatar.name))
+        self.assertTrue(
+            ContentBlob.objects.filter(name=self.user.avatar.name).exists())
+
+    @override_settings(DIRECT_UPLOAD_MAX_IMAGE_SIZE=200)
+    def test_presigned_post_limits_size(self):
+        """Test la política del POST limita el tamaño al del slot"""
+        import base64
+
+        response = self.client.post(
+            reverse('uploads:direct_upload_slot'),
+            {'kind': 'avatar', 'content_type': 'image/png'}, format='json')
+        upload = response.data['upload']
+
+        # S3 aplica la política (moto no la comprueba)
+        policy = json.loads(base64.b64decode(upload['fields']['policy']))
+        self.assertIn(['content-length-range', 1, 200], policy['conditions'])
+        self.assertIn({'Content-Type': 'image/png'}, policy['conditions'])
+
+    def test_finalize_without_upload(self):
+        """Test finalize falla si el objeto no existe en S3"""
+        response = self.client.post(
+            reverse('uploads:direct_upload_slot'),
+            {'kind': 'avatar', 'content_type': 'image/png'}, format='json')
+
+        response = self.client.post(response.data['slot']['finalize_url'])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+def make_video_bytes(size):
+    """Bytes con cabecera MP4 válida del tamaño indicado"""
+    header = b'\x00\x00\x00\x18ftypmp42'
+    return header + bytes(i % 251 for i in range(size - len(header)))
+
+
+class ChunkedUploadTestMixin:
+    """Helpers para el protocolo de subida por bloques"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='chunks',
+            email='chunks@example.com',
+            password='testpass123'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def start_upload(self, total_size, content_type='video/mp4'):
+        response = self.client.post(
+            reverse('uploads:chunked_upload_create'),
+            {'content_type': content_type, 'total_size': total_size},
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data
+
+    def put_chunk(self, upload, offset, data, checksum=None):
+        import hashlib
+        return self.client.generic(
+            'PUT', upload['upload_url'], data,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+            HTTP_X_CHUNK_CHECKSUM=checksum or hashlib.sha256(data).hexdigest())
+
+    def upload_all(self, upload, video):
+        chunk_size = upload['chunk_size']
+        for offset in range(0, len(video), chunk_size):
+            response = self.put_chunk(
+                upload, offset, video[offset:offset + chunk_size])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, CHUNKED_UPLOAD_CHUNK_SIZE=1024,
+                   CHUNKED_UPLOAD_TEMP_DIR=os.path.join(MEDIA_ROOT, 'chunks'))
+class LocalChunkedUploadTest(ChunkedUploadTestMixin, APITestCase):
+    """Tests para subidas por bloques con almacenamiento local"""
+
+    def test_upload_and_finalize_creates_story(self):
+        """Test subir en bloques y finalizar crea la story de video"""
+        from stories.models import Story
+
+        video = make_video_bytes(2500)
+        upload = self.start_upload(len(video))
+        response = self.upload_all(upload, video)
+        self.assertEqual(response['Upload-Offset'], '2500')
+
+        response = self.client.post(
+            upload['finalize_url'], {'content': 'Video largo'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        story = Story.objects.get(id=response.data['id'])
+        self.assertEqual(story.story_type, 'video')
+        with default_storage.open(story.media_file.name) as f:
+            self.assertEqual(f.read(), video)
+
+    def test_resume_after_checksum_mismatch(self):
+        """Test un bloque corrupto no avanza el offset y se puede reintentar"""
+        video = make_video_bytes(2048)
+        upload = self.start_upload(len(video))
+        self.put_chunk(upload, 0, video[:1024])
+
+        response = self.put_chunk(upload, 1024, video[1024:], checksum='0' * 64)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response['Upload-Offset'], '1024')
+
+        # Consultar el offset para reanudar
+        response = self.client.get(upload['upload_url'])
+        self.assertEqual(response.data['offset'], 1024)
+
+        response = self.put_chunk(upload, 1024, video[1024:])
+        self.assertEqual(response.data['offset'], 2048)
+
+    def test_wrong_offset_conflict(self):
+        """Test un bloque con offset distinto al confirmado responde 409"""
+        video = make_video_bytes(2048)
+        upload = self.start_upload(len(video))
+
+        response = self.put_chunk(upload, 1024, video[1024:])
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Upload-Offset'], '0')
+
+    def test_finalize_incomplete_upload(self):
+        """Test no se puede finalizar antes de recibir todos los bytes"""
+        video = make_video_bytes(2048)
+        upload = self.start_upload(len(video))
+        self.put_chunk(upload, 0, video[:1024])
+
+        response = self.client.post(upload['finalize_url'])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rejects_non_video(self):
+        """Test solo se aceptan videos"""
+        response = self.client.post(
+            reverse('uploads:chunked_upload_create'),
+            {'content_type': 'image/png', 'total_size': 100}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@skipUnless(_moto_server_available(), 'moto[server] no está instalado')
+class S3ChunkedUploadTest(MotoS3ServerMixin, ChunkedUploadTestMixin,
+                          APITestCase):
+    """Tests para subidas por bloques con multipart upload de S3"""
+
+    def test_multipart_upload_and_finalize(self):
+        """Test los bloques se ensamblan con multipart upload"""
+        from stories.models import Story
+
+        # S3 exige partes de al menos 5MB salvo la última
+        video = make_video_bytes(5 * 1024 * 1024 + 100)
+        upload = self.start_upload(len(video))
+        self.upload_all(upload, video)
+
+        response = self.client.post(upload['finalize_url'])
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        story = Story.objects.get(id=response.data['id'])
+        self.assertEqual(default_storage.size(story.media_file.name),
+                         len(video))
+
+
+class ImagingTest(SimpleTestCase):
+    """Tests para el decodificado por cabecera y modo draft"""
+
+    def make_bytes(self, size, fmt='JPEG'):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'blue').save(buffer, format=fmt)
+        return buffer.getvalue()
+
+    def test_pixel_limit_checked_before_decoding(self):
+        """Test open_image rechaza por dimensiones sin decodificar"""
+        data = self.make_bytes((2000, 1000))
+        with self.assertRaises(ImageTooLarge):
+            open_image(data, max_pixels=1_000_000)
+
+        img = open_image(data, max_pixels=2_000_000)
+        self.assertEqual(img.size, (2000, 1000))
+
+    def test_jpeg_draft_output_size(self):
+        """Test el modo draft mantiene las dimensiones finales esperadas"""
+        data = self.make_bytes((4000, 3000))
+        output = compress_image_data(data, 1920, 1080, 85, 50_000_000)
+
+        img = Image.open(io.BytesIO(output))
+        self.assertEqual(img.size, (1440, 1080))
+
+    def test_variants_keep_original_dimensions(self):
+        """Test el manifiesto registra el tamaño original, no el de draft"""
+        data = self.make_bytes((4000, 3000))
+        result = generate_variants(data, [320], ['jpeg'], 80, 50_000_000)
+
+        self.assertEqual((result['width'], result['height']), (4000, 3000))
+        self.assertEqual(result['variants'][0]['width'], 320)
+
+    def test_placeholder_is_tiny(self):
+        """Test el placeholder mide como mucho el tamaño configurado"""
+        img = Image.new('RGB', (1200, 300), 'white')
+        img.paste((200, 10, 10), (0, 0, 1000, 300))
+        placeholder, color = compute_placeholder(img, 16)
+
+        data = base64.b64decode(placeholder.split(',', 1)[1])
+        self.assertEqual(Image.open(io.BytesIO(data)).size, (16, 4))
+        self.assertLess(len(placeholder), 1024)
+        self.assertEqual(color, '#c80a0a')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, IMAGE_PROCESSING_EAGER=True,
+                   TEMP_UPLOAD_TTL_HOURS=24,
+                   CHUNKED_UPLOAD_TEMP_DIR=os.path.join(MEDIA_ROOT, 'chunks'))
+class TempUploadSweeperTest(APITestCase):
+    """Tests para la limpieza de temp-uploads caducadas"""
+
+    def setUp(self):
+        from social_network_backend.metrics import metrics
+        metrics.reset()
+        self.user = User.objects.create_user(
+            username='sweeper',
+            email='sweeper@example.com',
+            password='testpass123'
+        )
+
+    def make_uploads(self, *colors):
+        from .services import image_upload_service
+        return [
+            image_upload_service.start_upload(
+                self.user, make_image_file(f'{color}.png', size=(50, 50),
+                                           color=color))
+            for color in colors
+        ]
+
+    def make_old(self, path, days=3):
+        old = os.path.getmtime(path) - days * 24 * 3600
+        os.utime(path, (old, old))
+
+    def age(self, uploads, hours=48):
+        from datetime import timedelta
+        from django.utils import timezone
+        ImageUpload.objects.filter(id__in=[u.id for u in uploads]).update(
+            created_at=timezone.now() - timedelta(hours=hours))
+
+    def test_sweeps_expired_uploads(self):
+        """Test se eliminan las que superan el TTL y se conservan las recientes"""
+        from social_network_backend.metrics import metrics
+        from .sweeper import temp_upload_sweeper
+
+        old, recent = self.make_uploads('red', 'blue')
+        self.age([old])
+
+        result = temp_upload_sweeper.sweep()
+
+        self.assertEqual(result['uploads_expired'], 1)
+        self.assertEqual(result['files_deleted'], 1)
+        self.assertEqual(result['bytes_reclaimed'], old.file_size)
+        self.assertEqual(metrics.get('temp_uploads.bytes_reclaimed'),
+                         old.file_size)
+
+        self.assertFalse(default_storage.exists(old.file_path))
+        self.assertTrue(default_storage.exists(recent.file_path))
+        old.refresh_from_db()
+        self.assertEqual((old.status, old.file_path), ('expired', ''))
+
+    def test_dry_run_keeps_files(self):
+        """Test el modo dry-run no elimina nada"""
+        from .sweeper import temp_upload_sweeper
+
+        upload, = self.make_uploads('red')
+        self.age([upload])
+
+        result = temp_upload_sweeper.sweep(dry_run=True)
+        self.assertEqual(result['uploads_expired'], 1)
+        self.assertTrue(default_storage.exists(upload.file_path))
+
+    def test_shared_content_not_deleted(self):
+        """Test un archivo deduplicado se conserva si otra subida lo usa"""
+        from .sweeper import temp_upload_sweeper
+
+        old, recent = self.make_uploads('red', 'red')
+        self.assertEqual(old.file_path, recent.file_path)
+        self.age([old])
+
+        result = temp_upload_sweeper.sweep()
+
+        self.assertEqual(result['uploads_expired'], 1)
+        self.assertEqual(result['files_deleted'], 0)
+        self.assertTrue(default_storage.exists(recent.file_path))
+        self.assertEqual(
+            ContentBlob.objects.get(name=recent.file_path).ref_count, 1)
+
+    def test_untracked_files_swept(self):
+        """Test archivos antiguos sin registro en temp-uploads se eliminan"""
+        from .sweeper import temp_upload_sweeper
+
+        # Escrito sin pasar por el almacenamiento: ninguna tabla lo registra
+        path = default_storage.path('temp-uploads/sweeper/legacy.jpg')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(make_image_file(fmt='JPEG').read())
+        self.make_old(path)
+
+        result = temp_upload_sweeper.sweep(include_untracked=True)
+
+        self.assertEqual(result['untracked_deleted'], 1)
+        self.assertFalse(os.path.exists(path))
+
+    def test_untracked_sweep_keeps_shared_media(self):
+        """Test un archivo de temp-uploads que usa un post no se borra"""
+        from posts.models import Post
+        from .sweeper import temp_upload_sweeper
+
+        upload, = self.make_uploads('red')
+        post = Post.objects.create(author=self.user, content='Compartida')
+        with default_storage.open(upload.file_path, 'rb') as f:
+            post.image.save('red.png', f)
+        # Deduplicado: el post apunta a la copia de temp-uploads
+        self.assertEqual(post.image.name, upload.file_path)
+
+        self.age([upload])
+        temp_upload_sweeper.sweep()
+        self.make_old(default_storage.path(post.image.name))
+        result = temp_upload_sweeper.sweep(include_untracked=True)
+
+        self.assertEqual(result['untracked_deleted'], 0)
+        self.assertTrue(default_storage.exists(post.image.name))
+        self.assertEqual(
+            ContentBlob.objects.get(name=post.image.name).ref_count, 1)
+
+    def test_expired_direct_and_chunked_uploads(self):
+        """Test se limpian las subidas directas y por bloques expiradas"""
+        from datetime import timedelta
+        from django.utils import timezone
+        from .chunked import chunked_upload_service
+        from .direct import direct_upload_service
+        from .models import UploadSlot, ChunkedUpload
+        from .sweeper import temp_upload_sweeper
+
+        slot = direct_upload_service.create_slot(
+            self.user, 'avatar', 'image/png')
+        chunked = chunked_upload_service.start(self.user, 'video/mp4', 100)
+        past = timezone.now() - timedelta(minutes=1)
+        UploadSlot.objects.filter(id=slot.id).update(expires_at=past)
+        ChunkedUpload.objects.filter(id=chunked.id).update(expires_at=past)
+
+        result = temp_upload_sweeper.sweep()
+
+        self.assertEqual(result['slots_expired'], 1)
+        self.assertEqual(result['chunked_aborted'], 1)
+        chunked.refresh_from_db()
+        self.assertEqual(chunked.status, 'aborted')
+
+
+@skipUnless(_moto_server_available(), 'moto[server] no está instalado')
+class S3BatchDeleteTest(MotoS3ServerMixin, APITestCase):
+    """Tests para el borrado en lote con DeleteObjects"""
+
+    def test_delete_objects_in_batches(self):
+        """Test se borran más de 1000 objetos en varias peticiones"""
+        from .storage import s3_object_key
+        from .sweeper import delete_files, S3_DELETE_BATCH_SIZE
+
+        client = default_storage.bucket.meta.client
+        names = [f'temp-uploads/s3/{i}.jpg'
+                 for i in range(S3_DELETE_BATCH_SIZE + 5)]
+        for name in names:
+            client.put_object(
+                Bucket=default_storage.bucket_name,
+                Key=s3_object_key(default_storage, name), Body=b'x')
+
+        deleted, errors = delete_files(names, default_storage)
+
+        self.assertEqual(len(deleted), len(names))
+        self.assertEqual(errors, {})
+        self.assertFalse(default_storage.exists(names[-1]))
+
+
+@skipUnless(_moto_server_available(), 'moto[server] no está instalado')
+class StorageHealthTest(MotoS3ServerMixin, SimpleTestCase):
+    """Tests para la comprobación del almacenamiento"""
+
+    def setUp(self):
+        storage_health.reset()
+
+    def test_check_is_cached(self):
+        """Test el bucket se comprueba una vez y el resultado se reutiliza"""
+        result = storage_health.check()
+        self.assertTrue(result['ok'])
+        self.assertEqual(result['backend'], 's3')
+
+        with mock.patch.object(storage_health, '_check_s3') as check_s3:
+            self.assertTrue(storage_health.check()['ok'])
+        check_s3.assert_not_called()
+
+    def test_first_storage_use_checks_in_background(self):
+        """Test crear el almacenamiento S3 lanza la comprobación sin esperar"""
+        from storage_backends import PublicMediaStorage
+
+        with mock.patch.object(storage_health, '_run',
+                               return_value={'ok': True, 'backend': 's3'}) as run:
+            PublicMediaStorage()
+            self._join_background_check()
+            PublicMediaStorage()
+        run.assert_called_once_with()
+
+    def _join_background_check(self):
+        for thread in threading.enumerate():
+            if thread.name == 'storage-health':
+                thread.join(5)
+
+    def test_status_does_not_wait_for_check(self):
+        """Test /health/ no espera a la comprobación: responde pendiente"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_run():
+            started.set()
+            release.wait(5)
+            return {'ok': True, 'backend': 's3', 'latency_ms': 1}
+
+        with mock.patch.object(storage_health, '_run', side_effect=slow_run):
+            status = storage_health.status()
+            self.assertTrue(started.wait(5))
+            self.assertEqual(status, {'ok': None, 'backend': 's3',
+                                      'pending': True})
+            release.set()
+            self._join_background_check()
+
+        self.assertTrue(storage_health.status()['ok'])
+
+    def test_stale_result_refreshed_in_background(self):
+        """Test pasado STORAGE_CHECK_INTERVAL se renueva sin bloquear"""
+        storage_health.check()
+        failed = {'ok': False, 'backend': 's3', 'error': 'caído',
+                  'latency_ms': 1}
+
+        with override_settings(STORAGE_CHECK_INTERVAL=0), \
+                mock.patch.object(storage_health, '_run',
+                                  return_value=failed) as run:
+            with self.assertLogs('uploads.storage_health', 'ERROR'):
+                # Se devuelve el resultado anterior mientras se renueva
+                self.assertTrue(storage_health.status()['ok'])
+                self._join_background_check()
+        run.assert_called_once_with()
+        self.assertFalse(storage_health.status()['ok'])
+
+    def test_command_reports_missing_bucket(self):
+        """Test check_storage termina con error si el bucket no existe"""
+        out = io.StringIO()
+        call_command('check_storage', stdout=out)
+        self.assertIn('Almacenamiento s3 disponible', out.getvalue())
+
+        with override_settings(AWS_STORAGE_BUCKET_NAME='no-existe'):
+            with self.assertLogs('uploads.storage_health', 'ERROR'):
+                with self.assertRaises(CommandError):
+                    call_command('check_storage', stdout=io.StringIO())
+
+
+@override_settings(DEFAULT_FILE_STORAGE='storage_backends.PublicMediaStorage',
+                   AWS_QUERYSTRING_AUTH=True, AWS_QUERYSTRING_EXPIRE=600,
+                   MEDIA_URL_SIGNED_MARGIN=0.1, STORAGE_CHECK_ON_FIRST_USE=False,
+                   **S3_TEST_SETTINGS)
+class MediaURLResolverTest(APITestCase):
+    """Tests para la caché de URLs de archivos media"""
+
+    def setUp(self):
+        media_url_resolver.clear()
+        metrics.reset()
+
+    def test_signed_url_cached_until_margin(self):
+        """Test la URL firmada se reutiliza hasta poco antes de caducar"""
+        with mock.patch('uploads.media_urls.time.monotonic', return_value=1000):
+            url = media_url_resolver.resolve('posts/a.jpg')
+            self.assertIn('Signature=', url)
+            self.assertEqual(media_url_resolver.resolve('posts/a.jpg'), url)
+
+        self.assertEqual(metrics.get('media_urls.cache_misses'), 1)
+        self.assertEqual(metrics.get('media_urls.cache_hits'), 1)
+
+        # Dentro del margen del 10% la URL se vuelve a firmar
+        with mock.patch('uploads.media_urls.time.monotonic', return_value=1541):
+            media_url_resolver.resolve('posts/a.jpg')
+        self.assertEqual(metrics.get('media_urls.cache_misses'), 2)
+
+    @override_settings(DEFAULT_FILE_STORAGE='storage_backends.PublicMediaStorage',
+                       AWS_S3_CUSTOM_DOMAIN='cdn.example.com')
+    def test_public_url_memoized(self):
+        """Test las URLs públicas no caducan en la caché"""
+        url = media_url_resolver.resolve('posts/b.jpg')
+        self.assertEqual(url, 'https://cdn.example.com/media/posts/b.jpg')
+
+        with mock.patch('uploads.media_urls.time.monotonic', return_value=10**9):
+            self.assertEqual(media_url_resolver.resolve('posts/b.jpg'), url)
+        self.assertEqual(metrics.get('media_urls.cache_misses'), 1)
+
+    def test_list_serializer_resolves_page_at_once(self):
+        """Test un listado resuelve todas sus rutas en una sola pasada"""
+        from posts.models import Post
+        from posts.serializers import PostListSerializer
+
+        user = User.objects.create_user(
+            username='urls', email='urls@example.com', password='testpass123')
+        User.objects.filter(pk=user.pk).update(avatar='avatars/urls/a.jpg')
+        for i in range(3):
+            Post.objects.create(author=user, content=f'Post {i}')
+        Post.objects.filter(author=user).update(image='posts/urls/p.jpg')
+
+        with mock.patch.object(media_url_resolver, 'resolve_many',
+                               wraps=media_url_resolver.resolve_many) as bulk:
+            data = PostListSerializer(
+                Post.objects.select_related('author'), many=True).data
+
+        # La primera llamada resuelve la página completa; el resto son aciertos
+        self.assertEqual(set(bulk.call_args_list[0].args[0]),
+                         {'posts/urls/p.jpg', 'avatars/urls/a.jpg'})
+        self.assertEqual(metrics.get('media_urls.cache_misses'), 2)
+        self.assertEqual(len({item['image_url'] for item in data}), 1)
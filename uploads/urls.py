@@ -0,0 +1,21 @@
+from django.urls import path
+from . import views
+
+app_name = 'uploads'
+
+urlpatterns = [
+    path('status/<uuid:pk>/', views.ImageUploadStatusView.as_view(),
+         name='upload_status'),
+    path('direct/', views.DirectUploadSlotView.as_view(),
+         name='direct_upload_slot'),
+    path('direct/<uuid:pk>/finalize/', views.DirectUploadFinalizeView.as_view(),
+         name='direct_upload_finalize'),
+    path('direct/put/<str:token>/', views.DirectUploadPutView.as_view(),
+         name='direct_upload_put'),
+    path('chunked/', views.ChunkedUploadCreateView.as_view(),
+         name='chunked_upload_create'),
+    path('chunked/<uuid:pk>/', views.ChunkedUploadDetailView.as_view(),
+         name='chunked_upload_detail'),
+    path('chunked/<uuid:pk>/finalize/', views.ChunkedUploadFinalizeView.as_view(),
+         name='chunked_upload_finalize'),
+]
@@ -0,0 +1,206 @@
+"""
+Generación de variantes responsivas (tamaños y formatos) para imágenes
+
+Cada imagen de avatar, post o story se decodifica una sola vez en el pool
+de procesos y se guardan todas sus variantes junto al archivo original.
+El resultado se registra como un manifiesto JSON en el propio modelo:
+
+    {
+        "source": "posts/alice/abc.jpg",
+        "width": 2400, "height": 1600,
+        "variants": {
+            "64": {"jpeg": "posts/alice/abc_64.jpg",
+                   "webp": "posts/alice/abc_64.webp",
+                   "width": 64, "height": 43},
+            ...
+        }
+    }
+
+En la misma pasada se calcula un placeholder diminuto (data URI JPEG) y el
+color dominante, que se guardan en los campos placeholder y
+dominant_color del modelo para que los clientes pinten algo mientras
+carga la imagen. Los modelos sin variantes (imágenes de chat, thumbnails
+de stories de video) usan una pasada solo de placeholder y guardan en
+placeholder_source el archivo del que se calculó, como el "source" del
+manifiesto.
+
+Si el pool está saturado al guardar el objeto la generación se omite;
+manage.py generate_image_variants --missing encola los archivos que aún
+no tienen manifiesto o placeholder.
+"""
+import logging
+import os
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.dispatch import Signal
+
+from social_network_backend.object_cache import object_cache
+from .imaging import generate_variants
+from .workers import image_processing_pool, ProcessingQueueFull
+
+logger = logging.getLogger(__name__)
+
+# Emitida con sender=modelo y pk= tras actualizar con update() los
+# manifiestos o placeholders de un objeto (update() no emite post_save)
+media_fields_updated = Signal()
+
+# Campos de imagen con variantes: (modelo, campo, manifiesto, filtro). Sin
+# manifiesto solo se calcula el placeholder
+IMAGE_FIELDS = (
+    ('users.User', 'avatar', 'avatar_variants', {}),
+    ('posts.Post', 'image', 'image_variants', {}),
+    ('posts.PostImage', 'image', 'image_variants', {}),
+    ('stories.Story', 'media_file', 'media_variants', {'story_type': 'image'}),
+    ('stories.Story', 'thumbnail', None, {'story_type': 'video'}),
+    ('chat.Message', 'image', None, {'message_type': 'image'}),
+)
+
+
+class ImageVariantService:
+    """Servicio que genera y registra variantes de imágenes"""
+
+    def needs_variants(self, instance, field_name, manifest_field):
+        """
+        Verificar si el archivo actual aún no tiene manifiesto.
+
+        Sin manifest_field se comprueba si el placeholder se calculó de
+        otro archivo (o falta).
+        """
+        file_field = getattr(instance, field_name)
+        if not file_field:
+            return False
+        if manifest_field is None:
+            return instance.placeholder_source != file_field.name
+        manifest = getattr(instance, manifest_field) or {}
+        return manifest.get('source') != file_field.name
+
+    def schedule(self, instance, field_name, manifest_field):
+        """
+        Encolar la generación de variantes de un campo de imagen.
+
+        Con manifest_field None solo se calcula el placeholder. El archivo
+        se lee en el pool, no en el hilo de la petición. Si el pool está
+        saturado se omite y devuelve False: los serializers usan el archivo
+        original mientras no exista manifiesto, y generate_image_variants
+        --missing lo genera después.
+        """
+        file_field = getattr(instance, field_name)
+        try:
+            image_processing_pool.acquire()
+        except ProcessingQueueFull:
+            logger.warning(
+                f"Pool saturado, variantes omitidas para {file_field.name}")
+            return False
+
+        model = type(instance)
+        pk = instance.pk
+        storage = file_field.storage
+        source_name = file_field.name
+        previous = (getattr(instance, manifest_field) or {}) if manifest_field else {}
+        sizes = settings.IMAGE_VARIANT_SIZES if manifest_field else []
+
+        image_processing_pool.submit(
+            generate_variants,
+            (sizes,
+             settings.IMAGE_VARIANT_FORMATS, settings.IMAGE_VARIANT_QUALITY,
+             settings.IMAGE_MAX_PIXELS, settings.IMAGE_PLACEHOLDER_SIZE),
+            lambda result, error: self.store(
+                model, pk, field_name, manifest_field, source_name,
+                previous, result, error),
+            load=lambda: self._read(storage, source_name),
+        )
+        return True
+
+    def targets(self, only_missing=True):
+        """
+        Objetos con imagen como (instancia, campo, manifiesto); con
+        only_missing solo los que aún no tienen manifiesto o placeholder
+        del archivo actual
+        """
+        for label, field_name, manifest_field, filters in IMAGE_FIELDS:
+            model = apps.get_model(label)
+            queryset = model.objects.filter(**filters).exclude(
+                **{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            queryset = queryset.only(
+                'pk', field_name, manifest_field or 'placeholder_source')
+            for instance in queryset.iterator():
+                if not only_missing or self.needs_variants(
+                        instance, field_name, manifest_field):
+                    yield instance, field_name, manifest_field
+
+    def _read(self, storage, name):
+        with storage.open(name, 'rb') as f:
+            return f.read()
+
+    def store(self, model, pk, field_name, manifest_field, source_name,
+              previous, result, error):
+        """
+        Guardar las variantes y registrar el manifiesto y el placeholder en
+        el modelo
+        """
+        if error is not None:
+            logger.error(
+                f"Error generando variantes de {source_name}: {str(error)}")
+            return None
+
+        base = os.path.splitext(source_name)[0]
+        manifest = {
+            'source': source_name,
+            'width': result['width'],
+            'height': result['height'],
+            'variants': {},
+        }
+        for variant in result['variants']:
+            name = default_storage.save(
+                f"{base}_{variant['size']}.{variant['extension']}",
+                ContentFile(variant['data'])
+            )
+            entry = manifest['variants'].setdefault(str(variant['size']), {
+                'width': variant['width'],
+                'height': variant['height'],
+            })
+            entry[variant['format']] = name
+
+        fields = {}
+        if manifest_field:
+            fields[manifest_field] = manifest
+        if self._has_placeholder(model):
+            fields['placeholder'] = result['placeholder']
+            fields['dominant_color'] = result['dominant_color']
+        if not manifest_field:
+            fields['placeholder_source'] = source_name
+
+        # Solo registrar si el archivo no cambió mientras se procesaba
+        updated = model.objects.filter(
+            pk=pk, **{field_name: source_name}
+        ).update(**fields)
+
+        if updated:
+            # update() no emite post_save
+            object_cache.invalidate(model, pk)
+            media_fields_updated.send(sender=model, pk=pk)
+            self.delete_variants(previous)
+        else:
+            self.delete_variants(manifest)
+        return manifest
+
+    def _has_placeholder(self, model):
+        field_names = {field.name for field in model._meta.get_fields()}
+        return {'placeholder', 'dominant_color'} <= field_names
+
+    def delete_variants(self, manifest):
+        """Eliminar del almacenamiento los archivos de un manifiesto"""
+        for entry in (manifest or {}).get('variants', {}).values():
+            for fmt in settings.IMAGE_VARIANT_FORMATS:
+                if entry.get(fmt):
+                    try:
+                        default_storage.delete(entry[fmt])
+                    except Exception as e:
+                        logger.error(
+                            f"Error eliminando variante {entry[fmt]}: {str(e)}")
+
+
+# Instancia global del servicio
+image_variant_service = ImageVariantService()
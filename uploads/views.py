@@ -0,0 +1,238 @@
+"""
+Vistas para el estado de las imágenes subidas, las subidas directas y
+las subidas por bloques
+"""
+from django.core import signing
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .chunked import chunked_upload_service
+from .direct import (
+    direct_upload_service, get_direct_upload_backend,
+    LocalDirectUploadBackend, DirectUploadError, UploadAlreadyReceived
+)
+from .models import ImageUpload, UploadSlot, ChunkedUpload
+from .serializers import (
+    ImageUploadSerializer, UploadSlotSerializer, UploadSlotCreateSerializer,
+    ChunkedUploadSerializer, ChunkedUploadCreateSerializer
+)
+
+
+class ImageUploadStatusView(generics.RetrieveAPIView):
+    """
+    Estado del procesamiento de una imagen subida
+    """
+    serializer_class = ImageUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        # Solo las subidas propias
+        return ImageUpload.objects.filter(user=self.request.user)
+
+
+class DirectUploadSlotView(APIView):
+    """
+    Reservar una subida directa al almacenamiento
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = UploadSlotCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            slot = direct_upload_service.create_slot(
+                request.user, **serializer.validated_data)
+        except DirectUploadError as e:
+            return Response({'error': str(e)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        backend = get_direct_upload_backend()
+        return Response({
+            'slot': UploadSlotSerializer(slot).data,
+            'upload': backend.presign(slot, request),
+        }, status=status.HTTP_201_CREATED)
+
+
+class DirectUploadPutView(APIView):
+    """
+    Endpoint firmado que recibe el PUT cuando el almacenamiento es local.
+
+    Se autentica con el token firmado de la URL, igual que una URL
+    prefirmada de S3.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def put(self, request, token):
+        try:
+            slot_id = LocalDirectUploadBackend().load_slot_id(token)
+        except signing.BadSignature:
+            return Response({'error': 'Firma inválida o expirada'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        slot = UploadSlot.objects.filter(id=slot_id, status='pending').first()
+        if slot is None:
+            return Response({'error': 'Subida no encontrada'},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        if request.content_type != slot.content_type:
+            return Response({'error': 'Content-Type no coincide con el slot'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        if not content_length:
+            return Response({'error': 'El cuerpo de la petición está vacío'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if content_length > slot.max_size:
+            return Response(
+                {'error': 'El archivo supera el tamaño máximo permitido'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        try:
+            direct_upload_service.receive_local(slot, request.stream)
+        except UploadAlreadyReceived as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        except DirectUploadError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        return Response(status=status.HTTP_200_OK)
+
+
+class DirectUploadFinalizeView(APIView):
+    """
+    Validar una subida directa y asociarla a su destino
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        slot = get_object_or_404(UploadSlot, id=pk, user=request.user)
+
+        try:
+            target = direct_upload_service.finalize(slot, request.data)
+        except DirectUploadError as e:
+            return Response({'error': str(e)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if slot.kind == 'avatar':
+            from users.serializers import UserProfileSerializer
+            result = UserProfileSerializer(target).data
+        elif slot.kind == 'post_image':
+            from posts.serializers import PostImageSerializer
+            result = PostImageSerializer(target).data
+        else:
+            from stories.serializers import StorySerializer
+            result = StorySerializer(
+                target, context={'request': request}).data
+
+        return Response({
+            'slot': UploadSlotSerializer(slot).data,
+            'result': result,
+        }, status=status.HTTP_200_OK)
+
+
+class ChunkedUploadCreateView(APIView):
+    """
+    Iniciar una subida reanudable por bloques de un video de story
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = ChunkedUploadCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            upload = chunked_upload_service.start(
+                request.user, **serializer.validated_data)
+        except DirectUploadError as e:
+            return Response({'error': str(e)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(ChunkedUploadSerializer(upload).data,
+                        status=status.HTTP_201_CREATED,
+                        headers={'Upload-Offset': str(upload.offset)})
+
+
+class ChunkedUploadDetailView(APIView):
+    """
+    Consultar el offset (GET), enviar un bloque (PUT) o cancelar (DELETE)
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_upload(self, pk):
+        return get_object_or_404(ChunkedUpload, id=pk, user=self.request.user)
+
+    def offset_response(self, upload, status_code=status.HTTP_200_OK,
+                        error=None):
+        data = ChunkedUploadSerializer(upload).data
+        if error:
+            data = {'error': error, **data}
+        return Response(data, status=status_code,
+                        headers={'Upload-Offset': str(upload.offset)})
+
+    def get(self, request, pk):
+        return self.offset_response(self.get_upload(pk))
+
+    def put(self, request, pk):
+        upload = self.get_upload(pk)
+
+        try:
+            offset = int(request.META['HTTP_UPLOAD_OFFSET'])
+        except (KeyError, ValueError):
+            return self.offset_response(
+                upload, status.HTTP_400_BAD_REQUEST,
+                'La cabecera Upload-Offset es obligatoria')
+
+        checksum = request.META.get('HTTP_X_CHUNK_CHECKSUM')
+        if not checksum:
+            return self.offset_response(
+                upload, status.HTTP_400_BAD_REQUEST,
+                'La cabecera X-Chunk-Checksum es obligatoria')
+
+        if offset != upload.offset:
+            # El cliente debe reanudar desde el offset confirmado
+            return self.offset_response(
+                upload, status.HTTP_409_CONFLICT,
+                'El offset no coincide con el confirmado')
+
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+        try:
+            upload = chunked_upload_service.write_chunk(
+                upload, offset, request.stream, length, checksum)
+        except DirectUploadError as e:
+            upload.refresh_from_db()
+            return self.offset_response(
+                upload, status.HTTP_400_BAD_REQUEST, str(e))
+
+        return self.offset_response(upload)
+
+    def delete(self, request, pk):
+        upload = self.get_upload(pk)
+        if upload.status == 'uploading':
+            chunked_upload_service.abort(upload)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ChunkedUploadFinalizeView(APIView):
+    """
+    Finalizar una subida por bloques y crear la story
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        upload = get_object_or_404(ChunkedUpload, id=pk, user=request.user)
+
+        try:
+            story = chunked_upload_service.finalize(upload, request.data)
+        except DirectUploadError as e:
+            return Response({'error': str(e)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        from stories.serializers import StorySerializer
+        return Response(
+            StorySerializer(story, context={'request': request}).data,
+            status=status.HTTP_201_CREATED)
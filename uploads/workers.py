@@ -0,0 +1,175 @@
+"""
+Pool de procesos para el procesamiento de imágenes fuera del request
+
+El trabajo de CPU (decodificar, redimensionar, codificar) se ejecuta en un
+ProcessPoolExecutor. Los callbacks de finalización (guardar en el
+almacenamiento, actualizar la base de datos, emitir eventos) se ejecutan en
+un pequeño pool de hilos del proceso principal para no bloquear el hilo
+que gestiona los resultados del pool de procesos. En ese mismo pool de
+hilos se leen los datos de entrada que aún están en el almacenamiento
+(submit con load), fuera del hilo de la petición.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessingQueueFull(Exception):
+    """El pool de procesamiento no admite más trabajos pendientes"""
+
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(
+            f"Cola de procesamiento llena, reintentar en {retry_after}s")
+
+
+class ImageProcessingPool:
+    """
+    Pool acotado de procesos con control de backpressure
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._callback_executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def max_pending(self):
+        return getattr(settings, 'IMAGE_PROCESSING_MAX_PENDING', 20)
+
+    @property
+    def retry_after(self):
+        return getattr(settings, 'IMAGE_PROCESSING_RETRY_AFTER', 5)
+
+    @property
+    def eager(self):
+        return getattr(settings, 'IMAGE_PROCESSING_EAGER', False)
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def acquire(self, count=1):
+        """
+        Reservar espacio para `count` trabajos o lanzar ProcessingQueueFull
+        """
+        with self._lock:
+            if self._pending + count > self.max_pending:
+                raise ProcessingQueueFull(self.retry_after)
+            self._pending += count
+
+    def release(self, count=1):
+        """Liberar espacio reservado que no llegó a usarse"""
+        with self._lock:
+            self._pending = max(0, self._pending - count)
+
+    def submit(self, func, args, on_complete, load=None):
+        """
+        Ejecutar `func(*args)` en el pool y llamar a
+        `on_complete(result, error)` al terminar.
+
+        Con `load` se ejecuta `func(load(), *args)`: load se llama en el
+        pool de hilos y sus errores llegan a on_complete. Requiere haber
+        reservado espacio con acquire().
+        """
+        if self.eager:
+            self._run_eager(func, args, on_complete, load)
+        elif load is not None:
+            self._get_callback_executor().submit(
+                self._load_and_submit, load, func, args, on_complete)
+        else:
+            self._submit(func, args, on_complete)
+
+    def _load_and_submit(self, load, func, args, on_complete):
+        try:
+            self._submit(func, (load(), *args), on_complete)
+        except Exception as e:
+            # El trabajo no llegó al pool: terminarlo aquí con el error
+            future = Future()
+            future.set_exception(e)
+            self._finish(future, on_complete)
+
+    def _submit(self, func, args, on_complete):
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BrokenProcessPool:
+            # Un worker murió: recrear el pool y reintentar una vez
+            logger.warning("Pool de imágenes roto, recreándolo")
+            self._reset_executor()
+            future = self._get_executor().submit(func, *args)
+
+        future.add_done_callback(
+            lambda f: self._get_callback_executor().submit(
+                self._finish, f, on_complete)
+        )
+
+    def shutdown(self, wait=True):
+        """Detener los pools (usado en tests y al apagar el proceso)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            callbacks, self._callback_executor = self._callback_executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+        if callbacks:
+            callbacks.shutdown(wait=wait)
+
+    def _run_eager(self, func, args, on_complete, load=None):
+        """Ejecutar en línea (tests y desarrollo sin pool)"""
+        result, error = None, None
+        try:
+            if load is not None:
+                args = (load(), *args)
+            result = func(*args)
+        except Exception as e:
+            error = e
+        try:
+            on_complete(result, error)
+        finally:
+            self.release()
+
+    def _finish(self, future, on_complete):
+        try:
+            error = future.exception()
+            result = None if error else future.result()
+            on_complete(result, error)
+        except Exception as e:
+            logger.error(f"Error finalizando procesamiento de imagen: {str(e)}")
+        finally:
+            self.release()
+            close_old_connections()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                start_method = getattr(
+                    settings, 'IMAGE_PROCESSING_START_METHOD', 'spawn')
+                self._executor = ProcessPoolExecutor(
+                    max_workers=getattr(
+                        settings, 'IMAGE_PROCESSING_WORKERS', 2),
+                    mp_context=multiprocessing.get_context(start_method),
+                )
+            return self._executor
+
+    def _get_callback_executor(self):
+        with self._lock:
+            if self._callback_executor is None:
+                self._callback_executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix='image-finalize')
+            return self._callback_executor
+
+    def _reset_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False)
+
+
+# Instancia global del pool
+image_processing_pool = ImageProcessingPool()
@@ -0,0 +1,118 @@
+"""
+Autenticación JWT con caché del usuario
+
+JWTAuthentication carga la fila completa de users en cada petición. Esta
+clase guarda en caché una instantánea con las columnas que necesitan los
+permisos y los serializers de autor, y reconstruye con ella una instancia
+de User cuyos demás campos quedan diferidos: si una vista accede a uno de
+ellos se carga el resto de la fila en una sola consulta.
+
+La instantánea se invalida al guardar o borrar el usuario y al cambiar
+la contraseña; además caduca tras JWT_USER_CACHE_TTL segundos. Esa
+invalidación solo llega a los demás procesos con una caché compartida
+(CACHE_URL redis:// o file://, ver SHARED_CACHE en settings y la sección
+Performance del README): con SHARED_CACHE=False la instantánea no se
+cachea.
+
+Como la caché de objetos, la instantánea se lee de la base de datos
+principal: una réplica atrasada dejaría en caché datos ya invalidados.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+# Columnas incluidas en la instantánea cacheada
+SNAPSHOT_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name',
+    'avatar', 'avatar_variants', 'is_active', 'is_staff', 'is_superuser',
+    'is_verified', 'is_private',
+)
+
+# Clave con el hash de la contraseña cuando se revocan tokens al cambiarla
+REVOKE_KEY = '_revoke_hash'
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    """Descartar la instantánea cacheada de un usuario"""
+    cache.delete(user_cache_key(user_id))
+
+
+def load_user_snapshot(user_id):
+    """
+    Obtener la instantánea de un usuario, de la caché o de la base de datos.
+
+    Devuelve None si el usuario no existe.
+    """
+    key = user_cache_key(user_id)
+    snapshot = cache.get(key) if settings.SHARED_CACHE else None
+    if snapshot is not None:
+        return snapshot
+
+    fields = list(SNAPSHOT_FIELDS)
+    if api_settings.CHECK_REVOKE_TOKEN:
+        fields.append('password')
+
+    manager = get_user_model()._default_manager.db_manager(DEFAULT_DB_ALIAS)
+    snapshot = manager.filter(pk=user_id).values(*fields).first()
+    if snapshot is None:
+        return None
+
+    if api_settings.CHECK_REVOKE_TOKEN:
+        # No se guarda el hash de la contraseña, solo su md5
+        snapshot[REVOKE_KEY] = get_md5_hash_password(snapshot.pop('password'))
+
+    if settings.SHARED_CACHE:
+        cache.set(key, snapshot, settings.JWT_USER_CACHE_TTL)
+    return snapshot
+
+
+def user_from_snapshot(snapshot):
+    """
+    Construir una instancia de User con solo las columnas de la instantánea.
+
+    El resto de campos quedan diferidos; User.refresh_from_db carga todos
+    los pendientes la primera vez que se accede a uno.
+    """
+    User = get_user_model()
+    values = [snapshot[field.attname] for field in User._meta.concrete_fields
+              if field.attname in snapshot]
+    user = User.from_db(DEFAULT_DB_ALIAS, list(SNAPSHOT_FIELDS), values)
+    user._from_auth_snapshot = True
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que resuelve el usuario desde una caché corta"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        snapshot = load_user_snapshot(user_id)
+        if snapshot is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not snapshot['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != snapshot.get(REVOKE_KEY):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user_from_snapshot(snapshot)
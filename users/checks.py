@@ -0,0 +1,24 @@
+"""
+Comprobaciones de configuración (manage.py check y arranque del servidor)
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Avisar si fuera de DEBUG la caché no es compartida: con SHARED_CACHE
+    False se desactivan la caché del usuario del JWT, la caché de objetos,
+    los sellos de ETag y la lectura desde réplicas.
+    """
+    if settings.DEBUG or settings.SHARED_CACHE:
+        return []
+    return [Warning(
+        'CACHE_URL no es una caché compartida entre procesos: la caché del '
+        'usuario del JWT, la caché de objetos, los ETags y las réplicas '
+        'están desactivados.',
+        hint='Configure CACHE_URL=redis://... (o file://) o, con un solo '
+             'proceso, SHARED_CACHE=True.',
+        id='users.W001',
+    )]
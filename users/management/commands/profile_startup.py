@@ -0,0 +1,113 @@
+"""
+Comando de gestión para medir el coste de importación al arrancar
+"""
+import json
+from django.core.management.base import BaseCommand, CommandError
+
+from social_network_backend import startup_profile
+
+
+class Command(BaseCommand):
+    """Comando para perfilar las importaciones de un proceso nuevo"""
+    help = ('Mide el tiempo de importación de cada paquete (o módulo) al '
+            'arrancar, como python -X importtime, y lo compara con una '
+            'línea base')
+
+    def add_arguments(self, parser):
+        """Argumentos del comando"""
+        parser.add_argument(
+            '--target',
+            choices=sorted(startup_profile.TARGETS),
+            default='urls',
+            help='Punto de arranque a medir (por defecto setup + URLConf)',
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Procesos a lanzar (se reporta la mediana)',
+        )
+        parser.add_argument(
+            '--modules',
+            action='store_true',
+            help='Agrega por módulo en lugar de por paquete raíz',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Filas a mostrar',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Perfil JSON guardado con --save con el que comparar',
+        )
+        parser.add_argument(
+            '--save',
+            help='Guarda el perfil en este archivo JSON',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Imprime los resultados en JSON',
+        )
+
+    def handle(self, *args, **options):
+        """Ejecuta el perfil"""
+        if options['runs'] < 1 or options['top'] < 1:
+            raise CommandError('--runs y --top deben ser positivos')
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Línea base no válida: {e}')
+
+        try:
+            result = startup_profile.profile(
+                options['target'], options['runs'],
+                by='module' if options['modules'] else 'package')
+        except RuntimeError as e:
+            raise CommandError(f'El arranque falló: {e}')
+
+        if options['save']:
+            with open(options['save'], 'w') as f:
+                json.dump(result, f, indent=2, sort_keys=True)
+
+        if baseline is not None:
+            rows = startup_profile.diff(result, baseline)
+        else:
+            rows = [{'name': name, 'ms': ms} for name, ms in sorted(
+                result['imports'].items(), key=lambda item: item[1],
+                reverse=True)]
+        rows = rows[:options['top']]
+
+        if options['json']:
+            output = {'total_ms': result['total_ms'], 'rows': rows}
+            if baseline is not None:
+                output['baseline_total_ms'] = baseline['total_ms']
+            self.stdout.write(json.dumps(output, indent=2))
+            return
+
+        self._report(result, rows, baseline)
+
+    def _report(self, result, rows, baseline):
+        self.stdout.write(
+            f"Arranque '{result['target']}': {result['total_ms']:.1f} ms "
+            f"(mediana de {result['runs']})")
+        if baseline is not None:
+            delta = result['total_ms'] - baseline['total_ms']
+            self.stdout.write(
+                f"Línea base: {baseline['total_ms']:.1f} ms ({delta:+.1f} ms)")
+            self.stdout.write(
+                f"{'importación':<40}{'ms':>10}{'base':>10}{'dif':>10}")
+            for row in rows:
+                self.stdout.write(
+                    f"{row['name']:<40}{row['ms']:>10.2f}"
+                    f"{row['baseline_ms']:>10.2f}{row['delta_ms']:>+10.2f}")
+        else:
+            self.stdout.write(f"{'importación':<40}{'ms':>10}")
+            for row in rows:
+                self.stdout.write(f"{row['name']:<40}{row['ms']:>10.2f}")
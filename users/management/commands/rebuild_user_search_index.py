@@ -0,0 +1,27 @@
+"""
+Comando de gestión para reconstruir el índice de búsqueda de usuarios
+"""
+from django.core.management.base import BaseCommand
+
+from users.search import user_search_service
+
+
+class Command(BaseCommand):
+    """Comando para regenerar los términos de búsqueda de todos los usuarios"""
+    help = 'Reconstruye la tabla user_search_terms a partir de los usuarios'
+
+    def add_arguments(self, parser):
+        """Argumentos del comando"""
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Términos insertados por lote',
+        )
+
+    def handle(self, *args, **options):
+        """Ejecuta la reconstrucción del índice"""
+        total = user_search_service.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Índice de búsqueda reconstruido: {total} usuarios.')
+        )
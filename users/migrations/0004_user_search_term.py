@@ -0,0 +1,91 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:47
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Copia fija del tokenizador de users.search en el momento de esta
+# migración: los cambios posteriores del módulo no deben alterarla
+INDEXED_FIELDS = ('username', 'first_name', 'last_name', 'bio')
+MAX_BIO_TERMS = 50
+MIN_BIO_TERM_LENGTH = 3
+TERM_MAX_LENGTH = 150
+
+# Términos insertados por cada bulk_create
+BATCH_SIZE = 500
+
+
+def normalize(text):
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).lower().strip()
+
+
+def tokenize(text):
+    return re.findall(r'\w+', normalize(text))
+
+
+def build_terms(username, first_name, last_name, bio):
+    terms = set()
+    if username:
+        terms.add((normalize(username)[:TERM_MAX_LENGTH], 'username'))
+        terms.update((part[:TERM_MAX_LENGTH], 'name')
+                     for part in re.split(r'[._\-]+', normalize(username)) if part)
+    for text in (first_name, last_name):
+        terms.update((token[:TERM_MAX_LENGTH], 'name') for token in tokenize(text))
+
+    bio_tokens = [token for token in dict.fromkeys(tokenize(bio))
+                  if len(token) >= MIN_BIO_TERM_LENGTH]
+    terms.update((token[:TERM_MAX_LENGTH], 'bio')
+                 for token in bio_tokens[:MAX_BIO_TERMS])
+    return terms
+
+
+def index_existing_users(apps, schema_editor):
+    """Indexar los usuarios existentes por lotes"""
+    User = apps.get_model('users', 'User')
+    UserSearchTerm = apps.get_model('users', 'UserSearchTerm')
+    batch = []
+    users = User.objects.only('id', *INDEXED_FIELDS).iterator(
+        chunk_size=BATCH_SIZE)
+    for user in users:
+        batch.extend(
+            UserSearchTerm(user_id=user.pk, term=term, kind=kind)
+            for term, kind in build_terms(
+                *(getattr(user, field) for field in INDEXED_FIELDS)))
+        if len(batch) >= BATCH_SIZE:
+            UserSearchTerm.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            batch = []
+    if batch:
+        UserSearchTerm.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_avatar_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=150)),
+                ('kind', models.CharField(choices=[('username', 'Username'), ('name', 'Nombre'), ('bio', 'Bio')], max_length=10)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Término de búsqueda',
+                'verbose_name_plural': 'Términos de búsqueda',
+                'db_table': 'user_search_terms',
+                'indexes': [models.Index(fields=['term', 'kind'], name='user_search_term_prefix_idx', opclasses=['varchar_pattern_ops', 'varchar_pattern_ops'])],
+                'unique_together': {('user', 'term', 'kind')},
+            },
+        ),
+        migrations.RunPython(index_existing_users, migrations.RunPython.noop),
+    ]
@@ -16,6 +16,8 @@ class User(AbstractUser):
     bio = models.TextField(max_length=500, blank=True, null=True)
     avatar = models.ImageField(
         upload_to=user_avatar_path, blank=True, null=True)
+    # Manifiesto de variantes responsivas del avatar
+    avatar_variants = models.JSONField(default=dict, blank=True)
     birth_date = models.DateField(blank=True, null=True)
     location = models.CharField(max_length=100, blank=True, null=True)
     website = models.URLField(blank=True, null=True)
@@ -42,6 +44,16 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.first_name} {self.last_name} (@{self.username})"
 
+    def refresh_from_db(self, using=None, fields=None):
+        """
+        En usuarios reconstruidos desde la caché de autenticación, el primer
+        acceso a un campo diferido carga todos los pendientes de una vez
+        """
+        if fields is not None and getattr(self, '_from_auth_snapshot', False):
+            fields = list(set(fields) | self.get_deferred_fields())
+            self._from_auth_snapshot = False
+        super().refresh_from_db(using=using, fields=fields)
+
     @property
     def full_name(self):
         return f"{self.first_name} {self.last_name}".strip()
@@ -58,9 +70,18 @@ class User(AbstractUser):
         """Obtiene la URL completa del avatar usando el FileUploadHandler"""
         return FileUploadHandler.get_file_url(self.avatar)
 
-    def get_avatar_url(self):
-        """Método alternativo para compatibilidad"""
-        return self.avatar_url
+    def get_avatar_url(self, size=None):
+        """Obtiene la URL del avatar o de la variante del tamaño indicado"""
+        if size is None:
+            return self.avatar_url
+        return FileUploadHandler.get_variant_url(
+            self.avatar, self.avatar_variants, size)
+
+    @property
+    def avatar_variant_urls(self):
+        """URLs de las variantes del avatar agrupadas por tamaño"""
+        return FileUploadHandler.get_variant_urls(
+            self.avatar, self.avatar_variants)
 
     def delete_avatar(self):
         """Elimina el avatar del almacenamiento"""
@@ -68,3 +89,38 @@ class User(AbstractUser):
             FileUploadHandler.delete_file(self.avatar)
             self.avatar = None
             self.save()
+
+
+class UserSearchTerm(models.Model):
+    """
+    Términos normalizados para la búsqueda de usuarios
+
+    Cada usuario tiene una fila por término (username completo, palabras de
+    nombre/apellido/username y palabras de la bio). La búsqueda por prefijo
+    usa el índice de term: como rango en SQLite y como LIKE 'prefijo%' con
+    varchar_pattern_ops en PostgreSQL.
+    """
+    KINDS = [
+        ('username', 'Username'),
+        ('name', 'Nombre'),
+        ('bio', 'Bio'),
+    ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=150)
+    kind = models.CharField(max_length=10, choices=KINDS)
+
+    class Meta:
+        db_table = 'user_search_terms'
+        verbose_name = 'Término de búsqueda'
+        verbose_name_plural = 'Términos de búsqueda'
+        indexes = [
+            models.Index(
+                fields=['term', 'kind'], name='user_search_term_prefix_idx',
+                opclasses=['varchar_pattern_ops', 'varchar_pattern_ops']),
+        ]
+        unique_together = ['user', 'term', 'kind']
+
+    def __str__(self):
+        return f"{self.term} ({self.kind})"
@@ -0,0 +1,232 @@
+"""
+Búsqueda indexada de usuarios
+
+Los textos buscables de cada usuario se normalizan (minúsculas, sin
+acentos) y se guardan como términos en UserSearchTerm. Una búsqueda toma
+cada palabra de la consulta como prefijo y la resuelve con un recorrido
+por rango sobre el índice de term, en lugar de varios icontains sobre toda
+la tabla users.
+
+El typeahead ordena primero la coincidencia exacta de username, después
+los usernames que empiezan por la consulta y por último por número de
+seguidores, y se ejecuta con un presupuesto de tiempo: si la consulta lo
+supera se cancela en la base de datos y se devuelve una respuesta vacía.
+"""
+import logging
+import re
+import time
+import unicodedata
+from contextlib import contextmanager
+from functools import reduce
+from operator import or_
+from django.conf import settings
+from django.db import connection, transaction, OperationalError
+from django.db.models import Case, IntegerField, Max, Min, Q, Value, When
+from rest_framework.filters import SearchFilter
+
+from social_network_backend.lookups import prefix_filter
+from social_network_backend.metrics import metrics
+from .models import User, UserSearchTerm
+
+logger = logging.getLogger(__name__)
+
+# Campos del usuario que alimentan el índice
+INDEXED_FIELDS = ('username', 'first_name', 'last_name', 'bio')
+
+# Tipos de término usados por el typeahead (la bio solo en el listado)
+TYPEAHEAD_KINDS = ('username', 'name')
+ALL_KINDS = ('username', 'name', 'bio')
+
+# Límite de palabras de la bio indexadas por usuario
+MAX_BIO_TERMS = 50
+MIN_BIO_TERM_LENGTH = 3
+
+TERM_MAX_LENGTH = 150
+
+# Instrucciones de SQLite entre comprobaciones del presupuesto
+SQLITE_PROGRESS_STEPS = 100
+
+
+def normalize(text):
+    """Minúsculas y sin marcas diacríticas"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(
+        char for char in decomposed if not unicodedata.combining(char)
+    ).lower().strip()
+
+
+def tokenize(text):
+    return re.findall(r'\w+', normalize(text))
+
+
+def build_terms(username, first_name, last_name, bio):
+    """Conjunto de (término, tipo) de un usuario"""
+    terms = set()
+    if username:
+        terms.add((normalize(username)[:TERM_MAX_LENGTH], 'username'))
+        # Partes del username: "ana_garcia" también se encuentra por "garcia"
+        terms.update((part[:TERM_MAX_LENGTH], 'name')
+                     for part in re.split(r'[._\-]+', normalize(username)) if part)
+    for text in (first_name, last_name):
+        terms.update((token[:TERM_MAX_LENGTH], 'name') for token in tokenize(text))
+
+    bio_tokens = [token for token in dict.fromkeys(tokenize(bio))
+                  if len(token) >= MIN_BIO_TERM_LENGTH]
+    terms.update((token[:TERM_MAX_LENGTH], 'bio')
+                 for token in bio_tokens[:MAX_BIO_TERMS])
+    return terms
+
+
+@contextmanager
+def query_budget(milliseconds):
+    """
+    Cancelar en la base de datos las consultas que superen el presupuesto.
+
+    Al agotarse se lanza OperationalError desde la consulta en curso.
+    """
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL statement_timeout = %s',
+                               [int(milliseconds)])
+            yield
+        return
+
+    if connection.vendor == 'sqlite':
+        deadline = time.monotonic() + milliseconds / 1000
+        connection.ensure_connection()
+        raw = connection.connection
+        raw.set_progress_handler(
+            lambda: int(time.monotonic() > deadline), SQLITE_PROGRESS_STEPS)
+        try:
+            yield
+        finally:
+            raw.set_progress_handler(None, 0)
+        return
+
+    yield
+
+
+class UserSearchService:
+    """Servicio de indexación y búsqueda de usuarios"""
+
+    def index_user(self, user):
+        """Sincronizar los términos de un usuario con sus datos actuales"""
+        wanted = build_terms(*(getattr(user, field) for field in INDEXED_FIELDS))
+        existing = set(UserSearchTerm.objects.filter(
+            user=user).values_list('term', 'kind'))
+
+        stale = existing - wanted
+        if stale:
+            UserSearchTerm.objects.filter(user=user).filter(reduce(or_, (
+                Q(term=term, kind=kind) for term, kind in stale
+            ))).delete()
+        UserSearchTerm.objects.bulk_create([
+            UserSearchTerm(user=user, term=term, kind=kind)
+            for term, kind in wanted - existing
+        ], ignore_conflicts=True)
+
+    def rebuild(self, batch_size=500):
+        """Reconstruir el índice completo; devuelve los usuarios indexados"""
+        UserSearchTerm.objects.all().delete()
+        total = 0
+        users = User.objects.only('id', *INDEXED_FIELDS).order_by('pk')
+        batch = []
+        for user in users.iterator(chunk_size=batch_size):
+            batch.extend(
+                UserSearchTerm(user_id=user.pk, term=term, kind=kind)
+                for term, kind in build_terms(
+                    *(getattr(user, field) for field in INDEXED_FIELDS)))
+            total += 1
+            if len(batch) >= batch_size:
+                UserSearchTerm.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        UserSearchTerm.objects.bulk_create(batch, ignore_conflicts=True)
+        return total
+
+    def matching_terms(self, query, kinds=ALL_KINDS):
+        """
+        Términos cuyo usuario coincide con todas las palabras de la consulta.
+
+        Devuelve None si la consulta no tiene palabras.
+        """
+        tokens = sorted(set(tokenize(query)), key=len, reverse=True)
+        if not tokens:
+            return None
+
+        # La palabra más larga es la más selectiva para el recorrido por rango
+        terms = UserSearchTerm.objects.filter(
+            kind__in=kinds, **prefix_filter(tokens[0]))
+        for token in tokens[1:]:
+            terms = terms.filter(user__in=UserSearchTerm.objects.filter(
+                kind__in=kinds, **prefix_filter(token)).values('user'))
+        return terms
+
+    def matching_user_ids(self, query, kinds=ALL_KINDS):
+        """Subconsulta con los ids de usuarios que coinciden"""
+        terms = self.matching_terms(query, kinds)
+        if terms is None:
+            return User.objects.none().values('id')
+        return terms.values('user_id')
+
+    def search(self, query, limit=10, exclude_user=None):
+        """Usuarios activos ordenados por relevancia para el typeahead"""
+        terms = self.matching_terms(query, TYPEAHEAD_KINDS)
+        if terms is None:
+            return []
+
+        terms = terms.filter(user__is_active=True)
+        if exclude_user is not None:
+            terms = terms.exclude(user=exclude_user)
+
+        exact = normalize(query)
+        rows = list(
+            terms.values('user_id').annotate(
+                rank=Min(Case(
+                    When(kind='username', term=exact, then=Value(0)),
+                    When(kind='username', **prefix_filter(exact), then=Value(1)),
+                    default=Value(2),
+                    output_field=IntegerField(),
+                )),
+                followers=Max('user__followers_count'),
+            ).order_by('rank', '-followers', 'user_id')[:limit]
+        )
+
+        users = User.objects.in_bulk([row['user_id'] for row in rows])
+        return [users[row['user_id']] for row in rows if row['user_id'] in users]
+
+    def typeahead(self, query, limit=None, exclude_user=None, budget_ms=None):
+        """
+        Búsqueda con presupuesto de tiempo.
+
+        Devuelve (usuarios, timed_out).
+        """
+        limit = limit or settings.USER_SEARCH_TYPEAHEAD_LIMIT
+        budget_ms = settings.USER_SEARCH_BUDGET_MS if budget_ms is None else budget_ms
+
+        started = time.monotonic()
+        try:
+            with query_budget(budget_ms):
+                users = self.search(query, limit, exclude_user)
+        except OperationalError as e:
+            metrics.increment('user_search.timeouts')
+            logger.warning(f"Búsqueda de usuarios cancelada ({query!r}): {e}")
+            return [], True
+        finally:
+            metrics.observe('user_search.seconds', time.monotonic() - started)
+        return users, False
+
+
+# Instancia global del servicio
+user_search_service = UserSearchService()
+
+
+class UserIndexSearchFilter(SearchFilter):
+    """SearchFilter que resuelve ?search= con el índice de términos"""
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+        return queryset.filter(id__in=user_search_service.matching_user_ids(
+            ' '.join(search_terms)))
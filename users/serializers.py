@@ -2,6 +2,8 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import User
+from uploads.media_urls import MediaURLListSerializer
+from utils import AVATAR_THUMBNAIL_SIZE
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -71,12 +73,14 @@ class UserProfileSerializer(serializers.ModelSerializer):
     full_name = serializers.ReadOnlyField()
     age = serializers.ReadOnlyField()
     avatar_url = serializers.SerializerMethodField()
+    avatar_variants = serializers.ReadOnlyField(source='avatar_variant_urls')
 
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'first_name', 'last_name',
-            'full_name', 'bio', 'avatar', 'avatar_url', 'birth_date',
+            'full_name', 'bio', 'avatar', 'avatar_url', 'avatar_variants',
+            'birth_date',
             'age', 'location', 'website', 'phone_number', 'is_verified',
             'is_private', 'followers_count', 'following_count',
             'posts_count', 'created_at', 'updated_at'
@@ -110,11 +114,13 @@ class UserBasicSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
+        list_serializer_class = MediaURLListSerializer
+        media_fields = ['avatar', 'avatar_variants']
         fields = ['id', 'username', 'first_name',
                   'last_name', 'avatar_url', 'is_verified']
 
     def get_avatar_url(self, obj):
-        return obj.get_avatar_url()
+        return obj.get_avatar_url(AVATAR_THUMBNAIL_SIZE)
 
 
 class UserListSerializer(serializers.ModelSerializer):
@@ -126,6 +132,8 @@ class UserListSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = User
+        list_serializer_class = MediaURLListSerializer
+        media_fields = ['avatar', 'avatar_variants']
         fields = [
             'id', 'username', 'first_name', 'last_name', 'full_name',
             'avatar_url', 'bio', 'is_verified', 'followers_count',
@@ -133,7 +141,7 @@ class UserListSerializer(serializers.ModelSerializer):
         ]
 
     def get_avatar_url(self, obj):
-        return obj.get_avatar_url()
+        return obj.get_avatar_url(AVATAR_THUMBNAIL_SIZE)
 
 
 class ChangePasswordSerializer(serializers.Serializer):
@@ -0,0 +1,27 @@
+"""
+Señales para invalidar las cachés de usuarios (autenticación y objetos) y
+mantener el índice de búsqueda
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from social_network_backend.object_cache import object_cache
+from .authentication import invalidate_cached_user
+from .search import user_search_service, INDEXED_FIELDS
+
+object_cache.register('users.User')
+
+
+@receiver(post_save, sender='users.User')
+@receiver(post_delete, sender='users.User')
+def invalidate_user_snapshot(sender, instance, **kwargs):
+    """Descartar la instantánea cacheada al guardar o borrar el usuario"""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender='users.User')
+def index_user_search_terms(sender, instance, update_fields=None, **kwargs):
+    """Actualizar los términos de búsqueda si cambió algún campo indexado"""
+    if update_fields is not None and not set(update_fields) & set(INDEXED_FIELDS):
+        return
+    user_search_service.index_user(instance)
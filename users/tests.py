@@ -1,3 +1,228 @@
-from django.test import TestCase
+"""
+Tests para la autenticación JWT con caché y la búsqueda de usuarios
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .authentication import CachedJWTAuthentication, user_cache_key
+from .checks import check_shared_cache
+from .models import UserSearchTerm
+from .search import user_search_service
+
+User = get_user_model()
+
+
+@override_settings(SHARED_CACHE=True)
+class CachedJWTAuthenticationTest(APITestCase):
+    """Tests para CachedJWTAuthentication"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cached',
+            email='cached@example.com',
+            password='testpass123',
+            first_name='Cached',
+            bio='Bio larga que no hace falta en cada petición'
+        )
+        self.token = AccessToken.for_user(self.user)
+        self.auth = CachedJWTAuthentication()
+
+    def test_second_lookup_hits_cache(self):
+        """Test la segunda resolución del usuario no consulta la base de datos"""
+        with self.assertNumQueries(1):
+            self.auth.get_user(self.token)
+
+        with self.assertNumQueries(0):
+            user = self.auth.get_user(self.token)
+
+        self.assertEqual(user, self.user)
+        self.assertEqual(user.username, 'cached')
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+
+    @override_settings(SHARED_CACHE=False)
+    def test_no_snapshot_cache_without_shared_cache(self):
+        """Test sin caché compartida la instantánea se lee cada vez"""
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.auth.get_user(self.token), self.user)
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+    def test_snapshot_read_from_primary(self):
+        """Test la instantánea se lee de la primaria aunque el router mande
+        las lecturas a una réplica"""
+        router = 'social_network_backend.tests.UnreachableReplicaRouter'
+        with override_settings(DATABASE_ROUTERS=[router]):
+            user = self.auth.get_user(self.token)
+        self.assertEqual(user, self.user)
+        self.assertEqual(user._state.db, 'default')
+
+    def test_deferred_fields_load_once(self):
+        """Test el primer campo diferido carga el resto de la fila"""
+        user = self.auth.get_user(self.token)
+        self.assertIn('bio', user.get_deferred_fields())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.bio, self.user.bio)
+            self.assertEqual(user.followers_count, 0)
+        self.assertEqual(user.get_deferred_fields(), set())
+
+    def test_save_invalidates_snapshot(self):
+        """Test guardar el usuario descarta la instantánea"""
+        self.auth.get_user(self.token)
+
+        self.user.first_name = 'Renombrado'
+        self.user.save()
+
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(self.auth.get_user(self.token).first_name, 'Renombrado')
+
+    def test_inactive_user_rejected(self):
+        """Test un usuario desactivado deja de autenticarse"""
+        self.auth.get_user(self.token)
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(self.token)
+
+    def test_change_password_with_cached_user(self):
+        """Test cambiar la contraseña funciona con el usuario cacheado"""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.client.get(reverse('users:profile'))
+
+        response = self.client.post(reverse('users:change_password'), {
+            'old_password': 'testpass123',
+            'new_password': 'NuevaClave456!',
+            'new_password_confirm': 'NuevaClave456!',
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('NuevaClave456!'))
+
+
+# Presupuesto amplio para que la carga de la máquina no vacíe los resultados
+@override_settings(USER_SEARCH_BUDGET_MS=5000)
+class SharedCacheCheckTest(SimpleTestCase):
+    """Tests para el aviso de caché no compartida"""
+
+    @override_settings(DEBUG=False, SHARED_CACHE=False)
+    def test_warns_without_shared_cache(self):
+        """Test fuera de DEBUG sin caché compartida se avisa"""
+        self.assertEqual(
+            [warning.id for warning in check_shared_cache(None)], ['users.W001'])
+
+    @override_settings(DEBUG=False, SHARED_CACHE=True)
+    def test_silent_with_shared_cache(self):
+        """Test con caché compartida no hay aviso"""
+        self.assertEqual(check_shared_cache(None), [])
+
+
+class UserSearchTest(APITestCase):
+    """Tests para la búsqueda indexada y el typeahead de usuarios"""
+
+    def make_user(self, username, first_name='', last_name='', **extra):
+        return User.objects.create_user(
+            username=username, email=f'{username}@example.com',
+            password='testpass123', first_name=first_name,
+            last_name=last_name, **extra)
+
+    def setUp(self):
+        self.me = self.make_user('buscador')
+        self.client.force_authenticate(user=self.me)
+
+    def test_typeahead_ranking(self):
+        """Test exacto primero, luego prefijo de username, luego seguidores"""
+        self.make_user('anabel', followers_count=5)
+        self.make_user('ana')
+        self.make_user('maria', 'Ana', 'López', followers_count=100)
+        self.make_user('anastasia', followers_count=50)
+
+        response = self.client.get(reverse('users:user_search'), {'q': 'Ana'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['timed_out'])
+        self.assertEqual(
+            [user['username'] for user in response.data['results']],
+            ['ana', 'anastasia', 'anabel', 'maria'])
+
+    def test_accents_and_multiple_words(self):
+        """Test la búsqueda ignora acentos y exige todas las palabras"""
+        self.make_user('jgarcia', 'José', 'García')
+        self.make_user('jperez', 'José', 'Pérez')
+
+        users, _ = user_search_service.typeahead('jose garc')
+        self.assertEqual([user.username for user in users], ['jgarcia'])
+
+    def test_index_follows_changes(self):
+        """Test renombrar un usuario actualiza sus términos"""
+        user = self.make_user('viejo', 'Nombre')
+        user.username = 'nuevo'
+        user.save()
+
+        terms = set(UserSearchTerm.objects.filter(
+            user=user, kind='username').values_list('term', flat=True))
+        self.assertEqual(terms, {'nuevo'})
+
+    def test_list_search_uses_bio_terms(self):
+        """Test ?search= del listado también encuentra palabras de la bio"""
+        self.make_user('fotografa', bio='Fotógrafa de montaña')
+        self.make_user('otro', bio='Nada que ver')
+
+        response = self.client.get(reverse('users:user_list'), {'search': 'fotog'})
+
+        self.assertEqual(
+            [user['username'] for user in response.data['results']],
+            ['fotografa'])
+
+    def test_budget_exceeded_returns_empty(self):
+        """Test superar el presupuesto cancela la consulta"""
+        User.objects.bulk_create([
+            User(username=f'usuario{i}', email=f'usuario{i}@example.com')
+            for i in range(300)
+        ])
+        user_search_service.rebuild()
+
+        users, timed_out = user_search_service.typeahead('usuario', budget_ms=0)
+        self.assertTrue(timed_out)
+        self.assertEqual(users, [])
+
+        users, timed_out = user_search_service.typeahead('usuario')
+        self.assertFalse(timed_out)
+        self.assertEqual(len(users), 10)
+
+
+@override_settings(SHARED_CACHE=True)
+class UserProfileConditionalGetTest(APITestCase):
+    """Tests para el ETag del perfil propio"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='perfil', email='perfil@example.com', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('users:profile')
+
+    def test_profile_not_modified_until_updated(self):
+        """Test el perfil responde 304 hasta que se actualiza"""
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.patch(
+            reverse('users:profile_update'), {'bio': 'Nueva bio'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['bio'], 'Nueva bio')
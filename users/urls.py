@@ -19,5 +19,6 @@ urlpatterns = [
 
     # Usuarios
     path('list/', views.UserListView.as_view(), name='user_list'),
+    path('search/', views.UserTypeaheadView.as_view(), name='user_search'),
     path('<str:username>/', views.UserDetailView.as_view(), name='user_detail'),
 ]
@@ -1,4 +1,5 @@
 from django.shortcuts import render
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
@@ -6,13 +7,19 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from django.db.models import Q
+from django.http import Http404
 
+from social_network_backend.etags import ConditionalRetrieveMixin, make_etag
+from social_network_backend.object_cache import object_cache
+from .authentication import invalidate_cached_user
 from .models import User
+from .search import user_search_service, UserIndexSearchFilter
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
-    UserUpdateSerializer, UserListSerializer, ChangePasswordSerializer
+    UserUpdateSerializer, UserListSerializer, UserBasicSerializer,
+    ChangePasswordSerializer
 )
 
 User = get_user_model()
@@ -70,15 +77,28 @@ class UserLoginView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class UserProfileView(generics.RetrieveAPIView):
+class UserProfileView(ConditionalRetrieveMixin, generics.RetrieveAPIView):
     """
-    Vista para obtener el perfil del usuario autenticado
+    Vista para obtener el perfil del usuario autenticado (con ETag)
     """
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        """
+        Perfil completo desde la caché de objetos: request.user solo trae
+        las columnas de la instantánea de autenticación
+        """
+        return object_cache.get(User, self.request.user.pk) or self.request.user
+
+    def get_etag(self, user):
+        """Versión del perfil: updated_at, contadores y variantes del avatar"""
+        return make_etag(
+            'profile', user.pk, user.updated_at, user.followers_count,
+            user.following_count, user.posts_count, user.avatar_variants,
+            # La edad cambia con la fecha aunque no cambie la fila
+            user.age,
+        )
 
 
 class UserUpdateView(generics.UpdateAPIView):
@@ -100,6 +120,16 @@ class UserDetailView(generics.RetrieveAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'username'
+    # Lecturas desde réplicas (ver social_network_backend/replicas.py)
+    replica_read_actions = {'get'}
+
+    def get_object(self):
+        """Leer el usuario desde la caché de objetos"""
+        user = object_cache.get_by(User, 'username', self.kwargs['username'])
+        if user is None:
+            raise Http404
+        self.check_object_permissions(self.request, user)
+        return user
 
 
 class UserListView(generics.ListAPIView):
@@ -109,7 +139,9 @@ class UserListView(generics.ListAPIView):
     queryset = User.objects.filter(is_active=True)
     serializer_class = UserListSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend,
+                       UserIndexSearchFilter, OrderingFilter]
+    # Se resuelven con el índice de términos (ver users/search.py)
     search_fields = ['username', 'first_name', 'last_name', 'bio']
     ordering_fields = ['created_at', 'followers_count', 'posts_count']
     ordering = ['-created_at']
@@ -120,6 +152,25 @@ class UserListView(generics.ListAPIView):
         return queryset.exclude(id=self.request.user.id)
 
 
+class UserTypeaheadView(APIView):
+    """
+    Vista de autocompletado de usuarios por prefijo con presupuesto de tiempo
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if len(query) < settings.USER_SEARCH_MIN_LENGTH:
+            return Response({'results': [], 'timed_out': False})
+
+        users, timed_out = user_search_service.typeahead(
+            query, exclude_user=request.user)
+        return Response({
+            'results': UserBasicSerializer(users, many=True).data,
+            'timed_out': timed_out,
+        })
+
+
 class ChangePasswordView(APIView):
     """
     Vista para cambiar contraseña del usuario
@@ -136,6 +187,7 @@ class ChangePasswordView(APIView):
         user = request.user
         user.set_password(serializer.validated_data['new_password'])
         user.save()
+        invalidate_cached_user(user.pk)
 
         return Response({
             'message': 'Contraseña actualizada exitosamente'
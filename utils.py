@@ -56,16 +56,75 @@ class FileUploadHandler:
         if not file_field:
             return None
 
-        if settings.USE_S3:
-            return file_field.url
-        else:
-            # Para desarrollo local
-            return f"{settings.MEDIA_URL}{file_field.name}"
+        return FileUploadHandler.get_url_for_name(file_field.name)
+
+    @staticmethod
+    def get_url_for_name(name):
+        """
+        Obtiene la URL de un archivo a partir de su ruta en el almacenamiento.
+
+        Con S3 las URLs se cachean (las firmadas hasta poco antes de expirar).
+        """
+        from uploads.media_urls import media_url_resolver
+
+        return media_url_resolver.resolve(name)
+
+    @staticmethod
+    def get_urls_for_names(names):
+        """
+        Resuelve varias rutas de una vez y devuelve un diccionario ruta -> URL
+        """
+        from uploads.media_urls import media_url_resolver
+
+        return media_url_resolver.resolve_many(names)
+
+    @staticmethod
+    def get_variant_url(file_field, manifest, size, fmt='jpeg'):
+        """
+        Obtiene la URL de la variante más pequeña que cubre el tamaño pedido.
+
+        Si el manifiesto no corresponde al archivo actual (aún se está
+        procesando) devuelve la URL del archivo original.
+        """
+        if not file_field:
+            return None
+
+        manifest = manifest or {}
+        variants = manifest.get('variants')
+        if not variants or manifest.get('source') != file_field.name:
+            return FileUploadHandler.get_file_url(file_field)
+
+        sizes = sorted(int(s) for s in variants)
+        chosen = next((s for s in sizes if s >= size), sizes[-1])
+        entry = variants[str(chosen)]
+        return FileUploadHandler.get_url_for_name(
+            entry.get(fmt) or entry.get('jpeg'))
+
+    @staticmethod
+    def get_variant_urls(file_field, manifest):
+        """
+        Obtiene las URLs de todas las variantes agrupadas por tamaño
+        """
+        manifest = manifest or {}
+        if not file_field or manifest.get('source') != file_field.name:
+            return {}
+
+        urls = {}
+        for size, entry in manifest.get('variants', {}).items():
+            urls[size] = {
+                key: (FileUploadHandler.get_url_for_name(value)
+                      if key in settings.IMAGE_VARIANT_FORMATS else value)
+                for key, value in entry.items()
+            }
+        return urls
 
     @staticmethod
     def delete_file(file_field):
         """
-        Elimina un archivo del almacenamiento
+        Elimina un archivo del almacenamiento.
+
+        Con almacenamiento deduplicado solo libera una referencia: el archivo
+        físico se borra cuando ningún otro objeto comparte su contenido.
         """
         if file_field:
             try:
@@ -105,6 +164,18 @@ class FileUploadHandler:
         if file.size > max_size:
             return False, "El archivo es demasiado grande. Máximo 5MB."
 
+        # Verificar dimensiones leyendo solo la cabecera (sin decodificar)
+        from uploads.imaging import open_image, ImageTooLarge
+        try:
+            file.seek(0)
+            open_image(file, settings.IMAGE_MAX_PIXELS)
+        except ImageTooLarge:
+            return False, "La imagen tiene demasiados píxeles."
+        except Exception:
+            return False, "El archivo no es una imagen válida."
+        finally:
+            file.seek(0)
+
         return True, "Archivo válido"
 
 
@@ -113,36 +184,26 @@ IMAGE_QUALITY = 85
 IMAGE_MAX_WIDTH = 1920
 IMAGE_MAX_HEIGHT = 1080
 
+# Tamaño de variante usado por cada superficie de la API
+AVATAR_THUMBNAIL_SIZE = 64
+FEED_IMAGE_SIZE = 1080
+
 
 def compress_image(image_field):
     """
     Comprime una imagen para optimizar el almacenamiento
     """
     try:
-        from PIL import Image
-        import io
         from django.core.files.base import ContentFile
+        from uploads.imaging import compress_image_data
 
-        # Abrir la imagen
-        img = Image.open(image_field)
-
-        # Convertir a RGB si es necesario
-        if img.mode in ('RGBA', 'LA', 'P'):
-            img = img.convert('RGB')
-
-        # Redimensionar si es muy grande
-        if img.width > IMAGE_MAX_WIDTH or img.height > IMAGE_MAX_HEIGHT:
-            img.thumbnail((IMAGE_MAX_WIDTH, IMAGE_MAX_HEIGHT),
-                          Image.Resampling.LANCZOS)
-
-        # Guardar con compresión
-        output = io.BytesIO()
-        img.save(output, format='JPEG', quality=IMAGE_QUALITY, optimize=True)
-        output.seek(0)
+        image_field.seek(0)
+        data = compress_image_data(
+            image_field.read(), IMAGE_MAX_WIDTH, IMAGE_MAX_HEIGHT,
+            IMAGE_QUALITY, settings.IMAGE_MAX_PIXELS)
 
         # Crear nuevo archivo
-        compressed_file = ContentFile(output.read())
-        return compressed_file
+        return ContentFile(data)
 
     except Exception as e:
         print(f"Error compressing image: {e}")